@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Import-time budget check.
+
+Imports each module in a fresh interpreter with ``python -X importtime`` and
+fails if its cumulative import time is over budget, or if it pulled in a
+heavy SDK (firebase_admin, google.cloud, numpy) that should only be loaded
+when actually used. The Streamlit app itself can't be imported outside
+``streamlit run``, so its cold start is measured as the project modules it
+imports at the top level, all in one interpreter.
+
+This is a manual check: the project has no test suite or CI, so nothing
+runs it automatically. Run it from the project directory after changing
+imports or dependencies (it exits with status 1 on any problem)::
+
+    python check_import_time.py
+"""
+
+import ast
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Measured through its top-level project imports (see app_imports)
+APP = "streamlit_app"
+
+# Cumulative import time budget per module, in milliseconds. The Firebase
+# SDK alone takes about a second to import, so it can't sneak in unnoticed.
+BUDGETS_MS = {
+    "quiz_core": 50,
+    "translations": 50,
+    "test": 150,
+    "local_storage": 150,
+    "firebase_client": 150,
+    "firebase_outbox": 150,
+    "write_behind": 100,
+    APP: 250,
+}
+
+# Modules that must not be imported as a side effect
+FORBIDDEN_PREFIXES = ("firebase_admin", "google.cloud", "numpy", "streamlit")
+
+# Best of N runs, to keep the check stable on a busy machine
+RUNS = 3
+
+PROBE = (
+    "import sys; import {modules}; "
+    "print(','.join(m for m in sys.modules if m.startswith({forbidden!r})))"
+)
+
+
+def app_imports(path=APP + ".py"):
+    """Project modules the Streamlit app imports at the top level."""
+    with open(os.path.join(HERE, path), "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and not node.level and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            is_local = os.path.exists(os.path.join(HERE, name + ".py"))
+            if is_local and name not in modules:
+                modules.append(name)
+    return modules
+
+
+def measure(modules):
+    """
+    Import ``modules`` together in a fresh interpreter.
+
+    Returns:
+        tuple: (cumulative import time in ms, list of forbidden modules loaded)
+    """
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            PROBE.format(modules=", ".join(modules), forbidden=FORBIDDEN_PREFIXES),
+        ],
+        capture_output=True,
+        text=True,
+        cwd=HERE,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line.split("|")
+        # Top-level entries have no indentation before the module name. A
+        # module already imported by an earlier one has no entry of its own,
+        # its time is in that module's
+        name = parts[-1].strip()
+        if name in modules and parts[-1].rstrip() == " " + name:
+            cumulative_us = (cumulative_us or 0) + int(parts[1])
+    if cumulative_us is None:
+        raise RuntimeError(
+            f"no import time reported for {', '.join(modules)} "
+            "(already imported at interpreter startup?)"
+        )
+    loaded = [m for m in result.stdout.strip().split(",") if m]
+    return cumulative_us / 1000, loaded
+
+
+def main():
+    print("=" * 80)
+    print("IMPORT TIME CHECK")
+    print("=" * 80 + "\n")
+
+    failures = 0
+    for module, budget in BUDGETS_MS.items():
+        modules = app_imports() if module == APP else [module]
+        try:
+            runs = [measure(modules) for _ in range(RUNS)]
+        except Exception as e:
+            print(f"❌ {module}: import failed: {e}")
+            failures += 1
+            continue
+
+        elapsed = min(ms for ms, _ in runs)
+        loaded = runs[0][1]
+        status = "✅" if elapsed <= budget and not loaded else "❌"
+        print(f"{status} {module:<20} {elapsed:7.1f} ms (budget {budget} ms)")
+        if elapsed > budget:
+            failures += 1
+        if loaded:
+            print(f"   ⚠️ Heavy modules imported: {', '.join(sorted(loaded)[:5])}")
+            failures += 1
+
+    print()
+    if failures:
+        print(f"❌ {failures} import-time problem(s)")
+        sys.exit(1)
+    print("✅ All imports within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""
+Process-wide church registry cache.
+
+Step 2 of the Streamlit app needs the sorted church list on every rerun,
+including every keystroke in the "add new church" input. The list is kept
+here for all sessions. It is refreshed at most once per TTL, and add_church
+writes new names straight into it. When the list expires, only one caller
+loads it from storage; concurrent callers wait for that load instead of
+each streaming the whole collection.
+
+Lives in its own module so the cache survives Streamlit reruns.
+
+In Firestore the registry is also kept as a compact manifest. The sorted
+names are stored in a few chunk documents of the ``church_manifest``
+collection, each holding up to MANIFEST_CHUNK_SIZE names. Document "0" also
+carries the header: a version counter, the chunk count and the first name of
+each chunk. Loading the picker therefore costs one document read instead of
+one read per church. add_church updates the manifest and the per-church
+document in one transaction. Build the manifest from the existing
+``churches`` collection with ``python migrate_church_manifest.py``.
+
+Settings (environment variables):
+    QUIZ_CHURCH_CACHE_TTL   seconds before the list is reloaded (default 60)
+"""
+
+import bisect
+import difflib
+import os
+import re
+import threading
+import time
+import unicodedata
+from datetime import datetime
+
+from firebase_access import firestore_call
+
+MANIFEST_COLLECTION = "church_manifest"
+MANIFEST_HEAD = "0"
+
+# Names per manifest document (well below Firestore's 1 MiB document limit)
+MANIFEST_CHUNK_SIZE = 5000
+
+# Similarity (0-1) at which an existing church counts as a near-duplicate
+DUPLICATE_THRESHOLD = 0.85
+
+
+def fold_church_name(name):
+    """
+    Fold a church name for searching and duplicate checks.
+
+    Removes accents and punctuation, lowercases and collapses whitespace, so
+    "Igreja Batista  Central " and "igreja batista central" fold the same.
+    """
+    if not name.isascii():
+        name = unicodedata.normalize("NFKD", name)
+        name = "".join(c for c in name if not unicodedata.combining(c))
+    name = re.sub(r"[^\w\s]", " ", name.casefold())
+    return " ".join(name.split())
+
+
+class ChurchIndex:
+    """
+    Read-only search index over church names.
+
+    Every word of every folded name starts an entry in one sorted array of
+    (text from that word on, name number). A prefix query is a binary search
+    plus a short scan, so "bat" finds "Igreja Batista Central" in well
+    under a millisecond even with tens of thousands of churches. Word
+    tokens also map to names for near-duplicate lookups.
+    """
+
+    def __init__(self, names):
+        self.names = list(names)
+        self.folded = [fold_church_name(name) for name in self.names]
+        self._by_folded = {}
+        entries = []
+        self._by_token = {}
+        for i, folded in enumerate(self.folded):
+            self._by_folded.setdefault(folded, i)
+            start = 0
+            for token in folded.split(" "):
+                entries.append((folded[start:], i))
+                start += len(token) + 1
+                self._by_token.setdefault(token, set()).add(i)
+        entries.sort()
+        self._by_initial = {}
+        for token in self._by_token:
+            self._by_initial.setdefault(token[:1], []).append(token)
+        self._keys = [key for key, _ in entries]
+        self._ids = [i for _, i in entries]
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, query, limit=20, offset=0):
+        """
+        Find churches with a word starting with ``query``.
+
+        Args:
+            query: Typed text (accents and case are ignored)
+            limit: Page size
+            offset: Number of matches to skip (for pagination)
+
+        Returns:
+            tuple: (list of names, True if there are more matches)
+        """
+        prefix = fold_church_name(query)
+        if not prefix:
+            page = self.names[offset : offset + limit]
+            return page, offset + limit < len(self.names)
+
+        seen = set()
+        results = []
+        position = bisect.bisect_left(self._keys, prefix)
+        while position < len(self._keys) and self._keys[position].startswith(prefix):
+            i = self._ids[position]
+            position += 1
+            if i in seen:
+                continue
+            seen.add(i)
+            if len(seen) > offset + limit:
+                return results, True
+            if len(seen) > offset:
+                results.append(self.names[i])
+        return results, False
+
+    def find_duplicate(self, name):
+        """Return the existing name that folds the same as ``name``, or None."""
+        i = self._by_folded.get(fold_church_name(name))
+        return None if i is None else self.names[i]
+
+    def find_similar(self, name, threshold=DUPLICATE_THRESHOLD, limit=5):
+        """
+        Find existing churches that look like ``name``.
+
+        Candidates share the query's rarest words, so only a handful of
+        names are compared, not the whole registry.
+
+        Returns:
+            list: (name, similarity) pairs, most similar first
+        """
+        folded = fold_church_name(name)
+        if not folded:
+            return []
+        tokens = sorted(
+            set(folded.split(" ")), key=lambda t: len(self._by_token.get(t, ()))
+        )
+        candidates = set()
+        for token in tokens[:2]:
+            candidates |= self._by_token.get(token, set())
+        # Unknown words may be typos: add close spellings with the same
+        # first letter
+        for token in tokens[:2]:
+            if token not in self._by_token:
+                words = self._by_initial.get(token[0], ())
+                for close in difflib.get_close_matches(token, words, n=3):
+                    candidates |= self._by_token[close]
+
+        matches = []
+        matcher = difflib.SequenceMatcher(b=folded, autojunk=False)
+        for i in candidates:
+            matcher.set_seq1(self.folded[i])
+            if matcher.real_quick_ratio() < threshold:
+                continue
+            if matcher.quick_ratio() < threshold:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= threshold:
+                matches.append((self.names[i], ratio))
+        matches.sort(key=lambda m: (-m[1], m[0]))
+        return matches[:limit]
+
+
+class ChurchListCache:
+    """
+    Sorted church list with a TTL, write-through adds and single-flight
+    refreshes.
+    """
+
+    def __init__(self, ttl=60.0):
+        self.ttl = ttl
+        self._cond = threading.Condition()
+        self._churches = None
+        self._loaded_at = 0.0
+        self._refreshing = False
+        self._added = []  # names added while a refresh is in flight
+        self._index = None
+        self._index_version = -1
+        self.version = 0  # bumped whenever the cached list changes
+        self.refresh_count = 0
+
+    def _fresh(self):
+        return (
+            self._churches is not None
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    def get(self, loader):
+        """
+        Return the cached sorted list, calling ``loader()`` when it expired.
+
+        Only one thread runs ``loader`` at a time; others wait for its
+        result. If the refresh fails, waiters get the previous list when
+        there is one.
+
+        Args:
+            loader: callable returning the full list of church names
+
+        Returns:
+            list: sorted church names (a copy)
+        """
+        with self._cond:
+            while self._refreshing:
+                self._cond.wait()
+                if self._churches is not None:
+                    return list(self._churches)
+            if self._fresh():
+                return list(self._churches)
+            self._refreshing = True
+            self._added = []
+
+        churches = None
+        try:
+            churches = sorted(set(loader()))
+        finally:
+            with self._cond:
+                if churches is not None:
+                    for name in self._added:
+                        if name not in churches:
+                            bisect.insort(churches, name)
+                    if churches != self._churches:
+                        self.version += 1
+                    self._churches = churches
+                    self._loaded_at = time.monotonic()
+                    self.refresh_count += 1
+                self._refreshing = False
+                self._added = []
+                self._cond.notify_all()
+        return list(churches)
+
+    def add(self, church_name):
+        """Insert a newly added church into the cached list (write-through)."""
+        with self._cond:
+            if self._refreshing:
+                self._added.append(church_name)
+            if self._churches is not None and church_name not in self._churches:
+                bisect.insort(self._churches, church_name)
+                self.version += 1
+
+    def index(self, loader):
+        """
+        Return a ChurchIndex over the cached list, rebuilt only when the
+        list changed.
+
+        Args:
+            loader: callable returning the full list of church names
+        """
+        self.get(loader)
+        with self._cond:
+            if self._index is None or self._index_version != self.version:
+                self._index = ChurchIndex(self._churches or [])
+                self._index_version = self.version
+            return self._index
+
+    def invalidate(self):
+        """Force the next get() to reload."""
+        with self._cond:
+            self._loaded_at = 0.0
+
+
+def _env_ttl():
+    try:
+        return float(os.environ.get("QUIZ_CHURCH_CACHE_TTL", 60))
+    except ValueError:
+        return 60.0
+
+
+church_cache = ChurchListCache(ttl=_env_ttl())
+
+
+def manifest_documents(names, version, chunk_size=None):
+    """
+    Lay out sorted church names as manifest documents.
+
+    Args:
+        names: sorted list of church names
+        version: version counter to store in the header
+        chunk_size: names per document (default MANIFEST_CHUNK_SIZE)
+
+    Returns:
+        dict: {document_id: data}
+    """
+    chunk_size = chunk_size or MANIFEST_CHUNK_SIZE
+    chunks = [names[i : i + chunk_size] for i in range(0, len(names), chunk_size)]
+    chunks = chunks or [[]]
+    docs = {str(i): {"names": chunk} for i, chunk in enumerate(chunks)}
+    docs[MANIFEST_HEAD].update(
+        {
+            "version": version,
+            "chunk_count": len(chunks),
+            "count": len(names),
+            "firsts": [chunk[0] if chunk else "" for chunk in chunks],
+            "updated_at": datetime.now().isoformat(),
+        }
+    )
+    return docs
+
+
+def read_manifest(db):
+    """
+    Read the church list from the manifest.
+
+    Returns:
+        list: sorted church names, or None if the manifest was never built
+    """
+    collection = db.collection(MANIFEST_COLLECTION)
+    head = firestore_call(collection.document(MANIFEST_HEAD).get)
+    if not head.exists:
+        return None
+    data = head.to_dict()
+    names = list(data.get("names", []))
+    chunk_count = data.get("chunk_count", 1)
+    if chunk_count > 1:
+        refs = [collection.document(str(i)) for i in range(1, chunk_count)]
+        chunks = {}
+        for snapshot in firestore_call(db.get_all, refs):
+            if snapshot.exists:
+                chunks[snapshot.id] = snapshot.to_dict().get("names", [])
+        for i in range(1, chunk_count):
+            names.extend(chunks.get(str(i), []))
+    return names
+
+
+def add_to_manifest(db, church_name, doc_id, church_data):
+    """
+    Write a church document and insert its name into the manifest, in one
+    transaction.
+
+    Only the chunk the name sorts into is read and rewritten; when it grows
+    past MANIFEST_CHUNK_SIZE the whole manifest is re-chunked. Without a
+    manifest only the church document is written.
+
+    Args:
+        db: Firestore client
+        church_name: Name to add
+        doc_id: ID of the document in the ``churches`` collection
+        church_data: Data for that document
+
+    Returns:
+        bool: True if the manifest was updated
+    """
+    from firebase_admin import firestore
+
+    collection = db.collection(MANIFEST_COLLECTION)
+    head_ref = collection.document(MANIFEST_HEAD)
+    church_ref = db.collection("churches").document(doc_id)
+
+    @firestore.transactional
+    def update(transaction, timeout):
+        head = head_ref.get(transaction=transaction, timeout=timeout)
+        if not head.exists:
+            transaction.set(church_ref, church_data)
+            return False
+        header = head.to_dict()
+        firsts = header.get("firsts") or [""]
+        index = max(bisect.bisect_right(firsts, church_name) - 1, 0)
+        if index == 0:
+            names = list(header.get("names", []))
+        else:
+            chunk = collection.document(str(index)).get(
+                transaction=transaction, timeout=timeout
+            )
+            names = list(chunk.to_dict().get("names", [])) if chunk.exists else []
+
+        position = bisect.bisect_left(names, church_name)
+        if position < len(names) and names[position] == church_name:
+            transaction.set(church_ref, church_data)
+            return True  # Already listed
+        names.insert(position, church_name)
+        version = header.get("version", 0) + 1
+
+        if len(names) > MANIFEST_CHUNK_SIZE:
+            # Rare: re-chunk everything (reads must come before writes)
+            all_names = []
+            for i in range(header.get("chunk_count", 1)):
+                if i == index:
+                    all_names.extend(names)
+                elif i == 0:
+                    all_names.extend(header.get("names", []))
+                else:
+                    other = collection.document(str(i)).get(
+                        transaction=transaction, timeout=timeout
+                    )
+                    if other.exists:
+                        all_names.extend(other.to_dict().get("names", []))
+            for chunk_id, data in manifest_documents(all_names, version).items():
+                transaction.set(collection.document(chunk_id), data)
+        else:
+            firsts = list(firsts)
+            firsts[index] = names[0]
+            header_update = {
+                "version": version,
+                "count": header.get("count", 0) + 1,
+                "firsts": firsts,
+                "updated_at": datetime.now().isoformat(),
+            }
+            if index == 0:
+                header_update["names"] = names
+            else:
+                transaction.set(collection.document(str(index)), {"names": names})
+            transaction.update(head_ref, header_update)
+        transaction.set(church_ref, church_data)
+        return True
+
+    def run(timeout=None):
+        return update(db.transaction(), timeout)
+
+    return firestore_call(run)
+
+
+def write_manifest(db, names):
+    """
+    Replace the manifest with ``names`` (used by the migration).
+
+    Returns:
+        int: the new manifest version
+    """
+    collection = db.collection(MANIFEST_COLLECTION)
+    head = firestore_call(collection.document(MANIFEST_HEAD).get)
+    old = head.to_dict() if head.exists else {}
+    version = old.get("version", 0) + 1
+    docs = manifest_documents(sorted(set(names)), version)
+
+    batch = db.batch()
+    for chunk_id, data in docs.items():
+        batch.set(collection.document(chunk_id), data)
+    # Drop chunks left over from a larger manifest
+    for i in range(len(docs), old.get("chunk_count", 0)):
+        batch.delete(collection.document(str(i)))
+    firestore_call(batch.commit)
+    return version
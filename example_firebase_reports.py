@@ -5,10 +5,11 @@ Run this to see how to use the Firebase-enabled reporting features.
 """
 
 from test import (
-    FIREBASE_ENABLED,
     display_gift_report,
+    display_participant_stats,
     display_participant_summary,
     generate_gift_report,
+    get_participant_stats,
     get_top_performers_by_gift,
     init_firebase,
 )
@@ -21,28 +22,26 @@ def main():
 
     # Initialize Firebase
     print("\n1️⃣  Initializing Firebase...")
-    init_firebase()
-
-    if FIREBASE_ENABLED:
+    if init_firebase():
         print("✅ Firebase is enabled and ready!")
     else:
         print("📄 Firebase not available, using JSON fallback")
 
     print("\n" + "-" * 80)
 
-    # Example 1: Display full gift report
+    # Example 2: Display full gift report
     print("\n2️⃣  Displaying full gift report (from Firebase if available):")
     display_gift_report()
 
     print("-" * 80)
 
-    # Example 2: Display participant summary
+    # Example 3: Display participant summary
     print("\n3️⃣  Displaying participant summary:")
     display_participant_summary()
 
     print("-" * 80)
 
-    # Example 3: Get top performers programmatically
+    # Example 4: Get top performers programmatically
     print("\n4️⃣  Getting top 3 performers for each gift (programmatic access):")
     top_performers = get_top_performers_by_gift(top_n=3)
 
@@ -54,17 +53,13 @@ def main():
 
     print("\n" + "-" * 80)
 
-    # Example 4: Get raw report data
+    # Example 5: Get raw report data
     print("\n5️⃣  Getting raw report data for custom processing:")
     report = generate_gift_report()
 
-    # Count total participants
-    all_participants = set()
-    for gift, rankings in report.items():
-        for name, score in rankings:
-            all_participants.add(name)
-
-    print(f"\nTotal unique participants: {len(all_participants)}")
+    # Totals come from aggregation queries, not from the downloaded report
+    stats = get_participant_stats(only_completed=True)
+    print(f"\nTotal participants who completed the quiz: {stats['count']}")
     print(f"Total gifts tracked: {len(report)}")
 
     # Find highest scores across all gifts
@@ -80,7 +75,13 @@ def main():
         for i, (name, gift, score) in enumerate(all_scores[:5], 1):
             print(f"  {i}. {name} - Gift {gift}: {score} pontos")
 
-    print("\n" + "=" * 80)
+    print("\n" + "-" * 80)
+
+    # Example 6: Totals and averages without downloading participants
+    print("\n6️⃣  Participant statistics (aggregation queries in Firebase):")
+    display_participant_stats()
+
+    print("=" * 80)
     print("Example completed!")
     print("=" * 80 + "\n")
 
@@ -0,0 +1,154 @@
+"""
+Disk-backed external merge sort for report rows.
+
+A participant summary of a multi-year archive can be larger than memory.
+ExternalSort holds at most ``run_size`` rows in memory at a time. Each full
+buffer is sorted and spilled to a temporary file as one sorted run, and
+iteration k-way merges the runs with heapq.merge. When there are more runs
+than ``fan_in``, they are first merged in groups, so only a bounded number
+of files is open at once. Inputs that fit in one run never touch the disk.
+
+Rows are stored as JSON lines, so they must be JSON-serializable; tuples
+come back as tuples. The sort is stable, like sorted().
+
+Settings (environment variables):
+    QUIZ_SORT_MEMORY_ROWS   rows kept in memory per run (default 100000)
+"""
+
+import heapq
+import json
+import os
+import shutil
+import tempfile
+
+DEFAULT_RUN_SIZE = 100_000
+DEFAULT_FAN_IN = 64
+
+
+def default_run_size():
+    """Rows per in-memory run, from QUIZ_SORT_MEMORY_ROWS."""
+    try:
+        return max(1, int(os.environ.get("QUIZ_SORT_MEMORY_ROWS", DEFAULT_RUN_SIZE)))
+    except ValueError:
+        return DEFAULT_RUN_SIZE
+
+
+def _encode(row):
+    return json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+
+def _decode(line):
+    row = json.loads(line)
+    return tuple(row) if isinstance(row, list) else row
+
+
+class ExternalSort:
+    """
+    Sort an arbitrarily long stream of rows with bounded memory.
+
+    Usage:
+        with ExternalSort(key=lambda row: row[2], reverse=True) as rows:
+            rows.extend(stream)
+            for row in rows:
+                ...
+
+    Iterate once; the temporary files are removed when the iteration ends
+    or when the sort is closed.
+    """
+
+    def __init__(
+        self, key=None, reverse=False, run_size=None, fan_in=DEFAULT_FAN_IN, tmpdir=None
+    ):
+        self.key = key
+        self.reverse = reverse
+        self.run_size = run_size or default_run_size()
+        self.fan_in = max(2, fan_in)
+        self.tmpdir = tmpdir
+
+        self._buffer = []
+        self._runs = []  # paths of the sorted run files
+        self._dir = None
+        self._run_files = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, row):
+        """Add one row, spilling a sorted run when the buffer is full."""
+        self._buffer.append(row)
+        self._count += 1
+        if len(self._buffer) >= self.run_size:
+            self._spill()
+
+    def extend(self, rows):
+        """Add every row of an iterable."""
+        for row in rows:
+            self.add(row)
+
+    def _new_run_path(self):
+        if self._dir is None:
+            self._dir = tempfile.mkdtemp(prefix="quiz-sort-", dir=self.tmpdir)
+        self._run_files += 1
+        return os.path.join(self._dir, f"run-{self._run_files}.jsonl")
+
+    def _write_run(self, rows):
+        path = self._new_run_path()
+        with open(path, "w", encoding="utf-8") as f:
+            f.writelines(_encode(row) for row in rows)
+        return path
+
+    def _spill(self):
+        self._buffer.sort(key=self.key, reverse=self.reverse)
+        self._runs.append(self._write_run(self._buffer))
+        self._buffer = []
+
+    def _read_run(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                yield _decode(line)
+
+    def _merge(self, sources):
+        # heapq.merge breaks ties by source order, and runs hold consecutive
+        # parts of the input, so the merge stays stable
+        return heapq.merge(*sources, key=self.key, reverse=self.reverse)
+
+    def _reduce_runs(self):
+        """Merge consecutive groups of runs until at most ``fan_in`` remain."""
+        while len(self._runs) > self.fan_in:
+            runs, self._runs = self._runs, []
+            for start in range(0, len(runs), self.fan_in):
+                group = runs[start : start + self.fan_in]
+                self._runs.append(
+                    self._write_run(self._merge([self._read_run(p) for p in group]))
+                )
+                for path in group:
+                    os.remove(path)
+
+    def __iter__(self):
+        if not self._runs:
+            self._buffer.sort(key=self.key, reverse=self.reverse)
+            rows, self._buffer = self._buffer, []
+            yield from rows
+            return
+        if self._buffer:
+            self._spill()
+        try:
+            self._reduce_runs()
+            yield from self._merge([self._read_run(path) for path in self._runs])
+        finally:
+            self.close()
+
+    def close(self):
+        """Remove the temporary files."""
+        self._buffer = []
+        self._runs = []
+        if self._dir is not None:
+            shutil.rmtree(self._dir, ignore_errors=True)
+            self._dir = None
@@ -0,0 +1,195 @@
+"""
+Shared Firebase access layer: per-call deadlines and a circuit breaker.
+
+Every Firestore call in streamlit_app.py and test.py goes through
+``firestore_call``. Each call gets a deadline (``timeout``), and failures
+feed one process-wide circuit breaker. After ``FIREBASE_BREAKER_THRESHOLD``
+consecutive failures the breaker opens. Calls then fail at once with
+FirebaseUnavailable, so the callers' existing JSON fallback runs without
+waiting for a client timeout. After ``FIREBASE_BREAKER_COOLDOWN`` seconds a
+single half-open probe is let through. Its result closes the breaker again
+or starts a new cooldown. Client errors (NotFound, InvalidArgument, ...)
+mean Firestore answered, so they are re-raised without counting as
+failures.
+
+Settings (environment variables):
+    FIREBASE_DEADLINE            seconds per call (default 5)
+    FIREBASE_BREAKER_THRESHOLD   failures before opening (default 5)
+    FIREBASE_BREAKER_COOLDOWN    seconds before a probe (default 30)
+"""
+
+import os
+import threading
+import time
+from collections.abc import Iterator
+from datetime import datetime
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class FirebaseUnavailable(Exception):
+    """Raised instead of calling Firestore while the breaker is open."""
+
+
+def _env_float(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return default
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker with half-open probes.
+    """
+
+    def __init__(self, threshold=5, cooldown=30.0):
+        self.threshold = threshold
+        self.cooldown = cooldown
+
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.total_successes = 0
+        self.rejected_calls = 0
+        self.trip_count = 0
+        self.last_trip_at = None
+        self.last_error = None
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self):
+        """
+        Return True if a call may go to Firestore now.
+
+        In the half-open state only one probe call is allowed at a time.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown:
+                    self.rejected_calls += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probe_in_flight = False
+            if self._probe_in_flight:
+                self.rejected_calls += 1
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.total_successes += 1
+            self.consecutive_failures = 0
+            if self.state != CLOSED:
+                print("✅ Firebase circuit breaker closed")
+            self.state = CLOSED
+            self._probe_in_flight = False
+
+    def record_failure(self, error):
+        with self._lock:
+            self.total_failures += 1
+            self.consecutive_failures += 1
+            self.last_error = str(error)
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self.consecutive_failures >= self.threshold
+            ):
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+                self.trip_count += 1
+                self.last_trip_at = datetime.now().isoformat()
+                print(
+                    f"🔌 Firebase circuit breaker opened for {self.cooldown:.0f}s "
+                    f"after {self.consecutive_failures} failures: {error}"
+                )
+            self._probe_in_flight = False
+
+    @property
+    def is_open(self):
+        """True while calls are being short-circuited."""
+        with self._lock:
+            return (
+                self.state == OPEN
+                and time.monotonic() - self._opened_at < self.cooldown
+            )
+
+    def snapshot(self):
+        """Breaker state and counters, for monitoring."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutive_failures": self.consecutive_failures,
+                "total_failures": self.total_failures,
+                "total_successes": self.total_successes,
+                "rejected_calls": self.rejected_calls,
+                "trip_count": self.trip_count,
+                "last_trip_at": self.last_trip_at,
+                "last_error": self.last_error,
+            }
+
+
+breaker = CircuitBreaker(
+    threshold=int(_env_float("FIREBASE_BREAKER_THRESHOLD", 5)),
+    cooldown=_env_float("FIREBASE_BREAKER_COOLDOWN", 30),
+)
+
+DEFAULT_DEADLINE = _env_float("FIREBASE_DEADLINE", 5)
+
+# Errors about the request itself rather than the service's health
+CLIENT_ERRORS = ("NotFound", "AlreadyExists", "InvalidArgument", "FailedPrecondition")
+
+
+def is_client_error(error):
+    """True if ``error`` is a Firestore rejection of the request itself."""
+    try:
+        from google.api_core import exceptions
+    except ImportError:
+        return False
+    client_errors = tuple(getattr(exceptions, name) for name in CLIENT_ERRORS)
+    return isinstance(error, client_errors)
+
+
+def firestore_call(fn, *args, deadline=None, **kwargs):
+    """
+    Call a Firestore method with a deadline, through the circuit breaker.
+
+    Args:
+        fn: Firestore method accepting ``timeout`` (get, set, update,
+            delete, stream, get_all, commit, ...)
+        deadline: Seconds for this call (default FIREBASE_DEADLINE)
+
+    Returns:
+        whatever ``fn`` returns; iterators (stream, get_all) are
+        materialized into a list so errors mid-iteration are counted too
+
+    Raises:
+        FirebaseUnavailable: if the breaker is open
+        Exception: the Firestore error, after recording it (client errors
+            such as NotFound count as a healthy response)
+    """
+    if not breaker.allow():
+        raise FirebaseUnavailable("Firebase circuit breaker is open")
+    kwargs["timeout"] = DEFAULT_DEADLINE if deadline is None else deadline
+    try:
+        result = fn(*args, **kwargs)
+        # stream() returns a StreamGenerator, which is not a GeneratorType
+        if isinstance(result, Iterator):
+            result = list(result)
+    except Exception as e:
+        if is_client_error(e):
+            breaker.record_success()
+        else:
+            breaker.record_failure(e)
+        raise
+    breaker.record_success()
+    return result
+
+
+def get_breaker_status():
+    """Return the circuit breaker state and trip counts."""
+    return breaker.snapshot()
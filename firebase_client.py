@@ -0,0 +1,160 @@
+"""
+Process-wide Firestore client.
+
+The Firebase app and Firestore client are created once per process and
+shared by every Streamlit session, rerun and ``test.init_firebase``. The
+Streamlit script used to rebuild the credentials and call
+``firestore.client()`` on every rerun. Now reruns only get the cached
+client back. Right after the client is created, a background thread sends a
+cheap document read. That opens the gRPC channel before the first user
+needs it.
+
+The Firebase SDK (firebase_admin, google.cloud.firestore) is only imported
+once one of these credential sources is found, in order:
+    1. ``[firebase]`` in Streamlit secrets (when running under Streamlit)
+    2. FIREBASE_CREDENTIALS: path to a service account JSON file
+    3. ``serviceAccountKey.json`` in the working directory
+"""
+
+import os
+import sys
+import threading
+import time
+
+from firebase_access import firestore_call
+
+# Document read by the warm-up ping (it does not need to exist)
+WARMUP_COLLECTION = "meta"
+WARMUP_DOCUMENT = "warmup"
+
+SECRET_FIELDS = (
+    "type",
+    "project_id",
+    "private_key_id",
+    "private_key",
+    "client_email",
+    "client_id",
+    "auth_uri",
+    "token_uri",
+    "auth_provider_x509_cert_url",
+    "client_x509_cert_url",
+)
+
+_lock = threading.Lock()
+_initialized = False
+_client = None
+_source = None
+
+
+def _secrets_credentials():
+    """Return the credential dict from Streamlit secrets, or None."""
+    try:
+        import streamlit as st
+
+        if "firebase" not in st.secrets:
+            return None
+        secrets = st.secrets["firebase"]
+        # Explicitly convert to string to ensure compatibility
+        cred_dict = {field: str(secrets[field]) for field in SECRET_FIELDS}
+        if "universe_domain" in secrets:
+            cred_dict["universe_domain"] = str(secrets["universe_domain"])
+        return cred_dict
+    except ImportError:
+        return None  # Streamlit not available
+    except Exception:
+        return None  # No secrets file outside a Streamlit app
+
+
+def _find_credentials():
+    """
+    Return (credentials, source) from the first available source.
+
+    ``credentials`` is a dict or a file path; (None, None) if nothing is
+    configured. Nothing from the Firebase SDK is imported here.
+    """
+    cred_dict = _secrets_credentials()
+    if cred_dict is not None:
+        return cred_dict, "Streamlit secrets"
+
+    firebase_cred_path = os.environ.get("FIREBASE_CREDENTIALS")
+    if firebase_cred_path and os.path.exists(firebase_cred_path):
+        return firebase_cred_path, "credentials file"
+
+    if os.path.exists("serviceAccountKey.json"):
+        return "serviceAccountKey.json", "serviceAccountKey.json"
+
+    return None, None
+
+
+def _create_client():
+    """Initialize the Firebase app and return (client, source) or (None, None)."""
+    # An app initialized elsewhere in this process is reused as-is
+    if "firebase_admin" in sys.modules and sys.modules["firebase_admin"]._apps:
+        from firebase_admin import firestore
+
+        return firestore.client(), "existing app"
+
+    cred, source = _find_credentials()
+    if cred is None:
+        # Don't pay for importing the SDK when it can't be used
+        return None, None
+
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
+    if not firebase_admin._apps:
+        firebase_admin.initialize_app(credentials.Certificate(cred))
+    return firestore.client(), source
+
+
+def _warm_up(client):
+    started = time.monotonic()
+    try:
+        firestore_call(
+            client.collection(WARMUP_COLLECTION).document(WARMUP_DOCUMENT).get
+        )
+        print(f"🔥 Firestore warmed up in {time.monotonic() - started:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Firestore warm-up failed: {e}")
+
+
+def get_firestore_client(warm_up=True):
+    """
+    Get the process-wide Firestore client, creating it on first use.
+
+    A failed or unconfigured initialization is remembered as well, so later
+    calls return at once instead of retrying on every rerun.
+
+    Args:
+        warm_up: Ping Firestore in the background after creating the client
+
+    Returns:
+        Firestore client, or None if Firebase is not available
+    """
+    global _initialized, _client, _source
+    if _initialized:
+        return _client
+    with _lock:
+        if _initialized:
+            return _client
+        try:
+            _client, _source = _create_client()
+            if _client is not None:
+                print(f"✅ Firebase initialized from {_source}")
+            else:
+                print("ℹ️ Firebase credentials not found, using JSON file fallback")
+        except Exception as e:
+            _client, _source = None, None
+            print(f"⚠️ Firebase initialization failed: {e}")
+        _initialized = True
+
+    if _client is not None and warm_up:
+        threading.Thread(
+            target=_warm_up, args=(_client,), name="firestore-warmup", daemon=True
+        ).start()
+    return _client
+
+
+def get_client_source():
+    """Return where the credentials came from, or None."""
+    return _source
@@ -0,0 +1,166 @@
+"""
+Paginated, concurrent export of quiz progress documents from Firestore.
+
+``iter_progress_documents`` replaces one long ``stream()`` over the whole
+collection. Each collection is split into document-ID ranges that are read
+concurrently by a thread pool. Every range is read in cursor-based pages
+(``order_by(__name__)`` + ``start_after``), and a page that fails is
+retried with backoff without starting over. Pages go through a bounded
+queue to a generator, so callers hold at most a few pages in memory. If a
+page still fails after its retries, the error is raised from the generator.
+Callers can then fall back instead of silently getting partial data.
+
+Collection group queries (all churches in the church layout) can't be
+filtered by document-ID range, so they are read as a single paginated
+range.
+"""
+
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from firebase_access import firestore_call
+from progress_layout import participant_key, progress_sources
+
+PAGE_SIZE = 500
+PARTITIONS = 4
+PAGE_RETRIES = 3
+RETRY_BASE = 1.0  # seconds, doubled per attempt
+
+# Document IDs are normalize_username_key() output, in byte order; legacy
+# IDs outside this alphabet still fall into the first or last range
+KEY_ALPHABET = "-0123456789_abcdefghijklmnopqrstuvwxyz"
+
+_DONE = object()
+
+
+def key_ranges(partitions):
+    """
+    Split the document-ID space into ``partitions`` ranges.
+
+    Returns:
+        list: (start, end) pairs, ``None`` meaning unbounded
+    """
+    if partitions <= 1:
+        return [(None, None)]
+    step = len(KEY_ALPHABET) / partitions
+    bounds = [KEY_ALPHABET[round(i * step)] for i in range(1, partitions)]
+    starts = [None] + bounds
+    ends = bounds + [None]
+    return list(zip(starts, ends))
+
+
+def _range_query(collection, query, start, end):
+    if start is not None:
+        query = query.where("__name__", ">=", collection.document(start))
+    if end is not None:
+        query = query.where("__name__", "<", collection.document(end))
+    return query
+
+
+def _fetch_page(query, last, page_size, retries):
+    page_query = query.order_by("__name__").limit(page_size)
+    if last is not None:
+        page_query = page_query.start_after(last)
+    for attempt in range(retries + 1):
+        try:
+            return firestore_call(page_query.get, deadline=60)
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = RETRY_BASE * 2**attempt * random.uniform(0.5, 1.0)
+            print(f"⚠️ Export page failed ({e}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+
+def _put(pages, item, stop):
+    """Put ``item`` on the bounded queue unless the consumer went away."""
+    while not stop.is_set():
+        try:
+            pages.put(item, timeout=0.5)
+            return
+        except queue.Full:
+            continue
+
+
+def _read_range(query, pages, stop, page_size, retries):
+    """Read one range page by page into the ``pages`` queue."""
+    last = None
+    while not stop.is_set():
+        docs = _fetch_page(query, last, page_size, retries)
+        if docs:
+            _put(pages, docs, stop)
+        if len(docs) < page_size:
+            return
+        last = docs[-1]
+
+
+def iter_progress_documents(
+    db,
+    church_name=None,
+    only_completed=False,
+    fields=None,
+    page_size=PAGE_SIZE,
+    partitions=PARTITIONS,
+    retries=PAGE_RETRIES,
+):
+    """
+    Yield progress documents page by page, reading ranges concurrently.
+
+    Args:
+        db: Firestore client
+        church_name: If set, only this church's participants
+        only_completed: If True, only completed quizzes
+        fields: If set, only these fields are returned
+        page_size: Documents per page
+        partitions: Concurrent document-ID ranges per collection
+        retries: Retries per page before giving up
+
+    Yields:
+        (key, document data): key as in progress_layout.participant_key
+
+    Raises:
+        Exception: the Firestore error of a page that failed every retry
+    """
+    jobs = []
+    sources = progress_sources(db, church_name, only_completed, fields)
+    for collection, query in sources:
+        if collection is None:
+            jobs.append(query)
+        else:
+            for start, end in key_ranges(partitions):
+                jobs.append(_range_query(collection, query, start, end))
+
+    pages = queue.Queue(maxsize=2 * len(jobs))
+    stop = threading.Event()
+
+    def run(job):
+        try:
+            _read_range(job, pages, stop, page_size, retries)
+        except Exception as e:
+            _put(pages, e, stop)
+        finally:
+            _put(pages, _DONE, stop)
+
+    executor = ThreadPoolExecutor(
+        max_workers=len(jobs), thread_name_prefix="firestore-export"
+    )
+    try:
+        for job in jobs:
+            executor.submit(run, job)
+        remaining = len(jobs)
+        while remaining:
+            item = pages.get()
+            if item is _DONE:
+                remaining -= 1
+            elif isinstance(item, Exception):
+                raise item
+            else:
+                for doc in item:
+                    yield participant_key(doc), doc.to_dict()
+    finally:
+        # Workers notice within half a second and stop after their page
+        stop.set()
+        executor.shutdown(wait=False)
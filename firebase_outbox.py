@@ -0,0 +1,348 @@
+"""
+Durable outbox for Firestore writes that failed.
+
+When a Firestore write in save_progress_web or add_church fails, the data
+still goes to the local fallback, and the intended document write is also
+appended to ``firebase_outbox.jsonl``. A reconciler drains the outbox back
+to Firestore in batched writes. It keeps only the newest entry per document
+and never overwrites a document whose ``last_updated`` is newer than the
+queued one. Replayed progress documents also update the gift leaderboards
+(leaderboard.py), and replayed churches are added to the church manifest
+(church_registry.py). It runs in a background thread of the Streamlit app (with
+exponential backoff while Firestore is down) and from the command line::
+
+    python firebase_outbox.py
+
+Enqueuing is a single appended line, so the save hot path never waits for
+retries.
+"""
+
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from datetime import datetime
+
+from firebase_access import breaker, firestore_call
+from progress_layout import CHURCH_COLLECTION, FLAT_COLLECTION, PROGRESS_SUBCOLLECTION
+
+OUTBOX_FILE = "firebase_outbox.jsonl"
+
+# Firestore allows at most 500 writes per batch
+BATCH_SIZE = 200
+
+# Reconciler timing (seconds)
+IDLE_INTERVAL = 30
+BACKOFF_BASE = 5
+BACKOFF_MAX = 300
+
+_lock = threading.Lock()
+_reconciler = None
+
+
+def enqueue_write(collection, doc_id, data, path=OUTBOX_FILE, merge=False):
+    """
+    Append a failed Firestore document write to the outbox.
+
+    Args:
+        collection: Firestore collection name
+        doc_id: Document ID
+        data: Full document data to set()
+        path: Outbox file
+        merge: If True, merge ``data`` into the document instead (always
+            written, there is no version to compare)
+    """
+    entry = {
+        "id": uuid.uuid4().hex,
+        "collection": collection,
+        "doc_id": doc_id,
+        "data": data,
+        "queued_at": datetime.now().isoformat(),
+    }
+    if merge:
+        entry["merge"] = True
+    line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+    with _lock:
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+    print(f"📮 Queued Firestore write for {collection}/{doc_id}")
+
+
+def pending_count(path=OUTBOX_FILE):
+    """Return the number of writes waiting in the outbox."""
+    count = 0
+    for candidate in (path, path + ".draining"):
+        if os.path.exists(candidate):
+            with open(candidate, "r", encoding="utf-8") as f:
+                count += sum(1 for line in f if line.strip())
+    return count
+
+
+def _read_entries(path):
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                continue  # Torn line from a crash mid-append
+    return entries
+
+
+def _version(data):
+    """Timestamp used to resolve conflicts between outbox and Firestore."""
+    if not data:
+        return ""
+    return data.get("last_updated") or data.get("created_at") or ""
+
+
+def _coalesce(entries):
+    """Keep the newest queued write per document, in queue order."""
+    latest = {}
+    for entry in entries:
+        key = (entry["collection"], entry["doc_id"])
+        current = latest.get(key)
+        if current is None or _version(entry["data"]) >= _version(current["data"]):
+            latest[key] = entry
+    return list(latest.values())
+
+
+def _progress_key(collection, doc_id):
+    """Participant key of a progress document path, or None for other documents."""
+    if collection == FLAT_COLLECTION:
+        return doc_id
+    parts = collection.split("/")
+    if (
+        len(parts) == 3
+        and parts[0] == CHURCH_COLLECTION
+        and parts[2] == PROGRESS_SUBCOLLECTION
+    ):
+        return f"{parts[1]}/{doc_id}"
+    return None
+
+
+def _after_write(db, entry, previous):
+    """
+    Update what is derived from a replayed document.
+
+    Args:
+        db: Firestore client
+        entry: The outbox entry just written
+        previous: The document data it replaced in Firestore, or None
+    """
+    key = _progress_key(entry["collection"], entry["doc_id"])
+    if key is not None:
+        from leaderboard import record_result
+
+        data = entry["data"]
+        record_result(
+            db,
+            key,
+            entry["doc_id"],
+            data.get("display_name", entry["doc_id"]),
+            # A replayed incomplete quiz (a retake) leaves the boards
+            data.get("scores") if data.get("completed", False) else None,
+            data.get("church_name"),
+            (previous or {}).get("church_name"),
+        )
+
+
+def _write_church(db, entry):
+    """Write a church with its manifest entry; pickers only read the manifest."""
+    from church_registry import add_to_manifest, church_cache
+
+    data = entry["data"]
+    church_name = data.get("name", entry["doc_id"])
+    add_to_manifest(db, church_name, entry["doc_id"], data)
+    church_cache.add(church_name)
+
+
+def _write_batch(db, entries):
+    """Write one batch, skipping documents that are newer in Firestore."""
+    refs = [db.collection(e["collection"]).document(e["doc_id"]) for e in entries]
+    existing = {}
+    for snapshot in firestore_call(db.get_all, refs):
+        if snapshot.exists:
+            existing[snapshot.reference.path] = snapshot.to_dict()
+
+    batch = db.batch()
+    batched = 0
+    written = []
+    for ref, entry in zip(refs, entries):
+        current = existing.get(ref.path)
+        if entry.get("merge", False):
+            batch.set(ref, entry["data"], merge=True)
+        elif current is not None and _version(current) >= _version(entry["data"]):
+            continue  # Firestore already has this or a newer version
+        elif entry["collection"] == CHURCH_COLLECTION:
+            # Its own transaction, before the batch: if it fails, the whole
+            # chunk is queued again and the batch was not written yet
+            _write_church(db, entry)
+            written.append((entry, current))
+            continue
+        else:
+            batch.set(ref, entry["data"])
+        batched += 1
+        written.append((entry, current))
+    if batched:
+        firestore_call(batch.commit)
+    for entry, current in written:
+        _after_write(db, entry, current)
+    return len(written)
+
+
+def drain(db, path=OUTBOX_FILE, batch_size=BATCH_SIZE):
+    """
+    Send every queued write to Firestore.
+
+    The outbox is moved aside while draining so new failures keep being
+    queued; whatever could not be sent is put back.
+
+    Returns:
+        int: number of documents written
+
+    Raises:
+        Exception: the Firestore error that stopped the drain
+    """
+    draining = path + ".draining"
+    with _lock:
+        if os.path.exists(path):
+            if os.path.exists(draining):
+                # Leftover from an interrupted drain: merge both
+                with open(path, "r", encoding="utf-8") as src, open(
+                    draining, "a", encoding="utf-8"
+                ) as dst:
+                    dst.write(src.read())
+                os.remove(path)
+            else:
+                os.replace(path, draining)
+        entries = _coalesce(_read_entries(draining))
+
+    written = 0
+    sent = 0
+    try:
+        for start in range(0, len(entries), batch_size):
+            chunk = entries[start : start + batch_size]
+            written += _write_batch(db, chunk)
+            sent += len(chunk)
+    finally:
+        with _lock:
+            unsent = entries[sent:]
+            if unsent:
+                with open(path, "a", encoding="utf-8") as f:
+                    for entry in unsent:
+                        f.write(
+                            json.dumps(entry, ensure_ascii=False, separators=(",", ":"))
+                            + "\n"
+                        )
+            if os.path.exists(draining):
+                os.remove(draining)
+
+    if entries:
+        print(
+            f"✅ Reconciled outbox: {written} written, "
+            f"{sent - written} already newer"
+        )
+    return written
+
+
+class Reconciler:
+    """
+    Background thread draining the outbox, backing off while Firestore fails.
+    """
+
+    def __init__(self, get_db, path=OUTBOX_FILE):
+        self.get_db = get_db
+        self.path = path
+        self.failures = 0
+        self.last_error = None
+        self.last_run = None
+        self._wake = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="firebase-outbox-reconciler", daemon=True
+        )
+
+    def start(self):
+        self._thread.start()
+
+    def wake(self):
+        """Ask for a drain as soon as possible."""
+        self._wake.set()
+
+    def _delay(self):
+        if not self.failures:
+            return IDLE_INTERVAL
+        delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (self.failures - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self._delay())
+            self._wake.clear()
+            if pending_count(self.path) == 0 or breaker.is_open:
+                continue
+            db = self.get_db()
+            if db is None:
+                continue
+            try:
+                drain(db, self.path)
+                self.failures = 0
+                self.last_error = None
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                print(
+                    f"⚠️ Outbox reconciliation failed "
+                    f"(attempt {self.failures}): {e}"
+                )
+            self.last_run = datetime.now()
+
+
+def start_reconciler(get_db, path=OUTBOX_FILE):
+    """
+    Start the process-wide background reconciler (once).
+
+    Args:
+        get_db: callable returning the Firestore client, or None
+        path: Outbox file
+
+    Returns:
+        Reconciler
+    """
+    global _reconciler
+    with _lock:
+        if _reconciler is None:
+            _reconciler = Reconciler(get_db, path)
+            _reconciler.start()
+        return _reconciler
+
+
+if __name__ == "__main__":
+    import test
+
+    if not test.init_firebase():
+        print("❌ Cannot reconcile without Firebase")
+        raise SystemExit(1)
+
+    print(f"📮 {pending_count()} writes waiting in {OUTBOX_FILE}")
+    attempt = 0
+    while pending_count():
+        try:
+            drain(test.db)
+        except Exception as e:
+            attempt += 1
+            if attempt >= 5:
+                print(f"❌ Giving up after {attempt} attempts: {e}")
+                raise SystemExit(1)
+            delay = min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+            print(f"⚠️ Reconciliation failed: {e}, retrying in {delay}s")
+            time.sleep(delay)
+    print("✅ Outbox is empty")
@@ -0,0 +1,205 @@
+"""
+Incremental reader for large JSON progress files.
+
+``json.load`` on quiz_progress.json builds every participant's record at
+once, answers included, although the reports only need ``scores``,
+``completed`` and the names. iter_object_items() reads the file in chunks
+and yields the top-level members one at a time. Fields listed in ``skip``
+are stepped over inside each record without being decoded. Memory then
+depends on the largest record, not on the size of the file.
+
+Standard library only: the scalars and small subtrees are decoded with
+json.JSONDecoder.raw_decode, and only the skipped subtrees are scanned by
+hand.
+"""
+
+import json
+import re
+
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = " \t\n\r"
+_NON_WHITESPACE = re.compile(r"[^ \t\n\r]")
+_KEY = re.compile(r'[ \t\n\r]*"([^"\\]*(?:\\.[^"\\]*)*)"[ \t\n\r]*:', re.DOTALL)
+_SEPARATOR = re.compile(r"[ \t\n\r]*([,}])")
+_SCALAR_END = re.compile(r"[ \t\n\r,:\]}]")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_TO_BRACKET = re.compile(
+    r'(?:[^"\[\]{}]|"[^"\\]*(?:\\.[^"\\]*)*")*([\[\]{}])', re.DOTALL
+)
+_NUMBER_START = "-0123456789"
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Chunked buffer over a text file, with JSON token helpers."""
+
+    def __init__(self, f, chunk_size=CHUNK_SIZE):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self):
+        """Read one more chunk; False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        # Drop what was consumed so the buffer stays about one record long
+        self.buffer = self.buffer[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """Next non-whitespace character (not consumed), or "" at the end."""
+        while True:
+            match = _NON_WHITESPACE.search(self.buffer, self.pos)
+            if match:
+                self.pos = match.start()
+                return self.buffer[self.pos]
+            self.pos = len(self.buffer)
+            if not self.fill():
+                return ""
+
+    def expect(self, chars):
+        """Consume the next non-whitespace character, one of ``chars``."""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(
+                f"Expected one of {chars!r} at offset {self.pos}, got {char!r}"
+            )
+        self.pos += 1
+        return char
+
+    def key(self):
+        """Consume the next ``"key":`` of an object and return the key."""
+        while True:
+            match = _KEY.match(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+                key = match.group(1)
+                return json.loads(f'"{key}"') if "\\" in key else key
+            if not self.fill():
+                raise ValueError(f"Expected an object key at offset {self.pos}")
+
+    def separator(self):
+        """Consume the "," or "}" after an object member and return it."""
+        while True:
+            match = _SEPARATOR.match(self.buffer, self.pos)
+            if match:
+                self.pos = match.end()
+                return match.group(1)
+            if _NON_WHITESPACE.search(self.buffer, self.pos) or not self.fill():
+                raise ValueError(f"Expected ',' or '}}' at offset {self.pos}")
+
+    def decode(self):
+        """Decode the next JSON value."""
+        buffer, pos = self.buffer, self.pos
+        char = buffer[pos] if pos < len(buffer) else ""
+        if not char or char in _WHITESPACE:
+            char = self.peek()
+        if char in _NUMBER_START:
+            # "1." of a cut "1.25" would decode as 1; read to its end first
+            while not _SCALAR_END.search(self.buffer, self.pos) and self.fill():
+                pass
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.fill():
+                    continue
+                raise
+            self.pos = end
+            return value
+
+    def skip(self):
+        """Step over the next JSON value without decoding it."""
+        char = self.peek()
+        if char == '"':
+            while True:
+                match = _STRING.match(self.buffer, self.pos)
+                if match:
+                    self.pos = match.end()
+                    return
+                if not self.fill():
+                    raise ValueError("Unexpected end of JSON input")
+        if char not in "[{":
+            # A number or literal ends at the next delimiter
+            while True:
+                match = _SCALAR_END.search(self.buffer, self.pos)
+                if match:
+                    self.pos = match.start()
+                    return
+                self.pos = len(self.buffer)
+                if not self.fill():
+                    return
+
+        depth = 0
+        while True:
+            # Everything up to the next bracket outside a string, in one match
+            match = _TO_BRACKET.match(self.buffer, self.pos)
+            if match is None:
+                # Cut at the chunk boundary: rescan with more input
+                if not self.fill():
+                    raise ValueError("Unexpected end of JSON input")
+                continue
+            self.pos = match.end()
+            if match.group(1) in "[{":
+                depth += 1
+            else:
+                depth -= 1
+            if depth == 0:
+                return
+
+
+def _read_object(reader, skip):
+    """Decode one object, leaving out the members named in ``skip``."""
+    reader.expect("{")
+    result = {}
+    if reader.peek() == "}":
+        reader.pos += 1
+        return result
+    while True:
+        key = reader.key()
+        if key in skip:
+            reader.skip()
+        else:
+            result[key] = reader.decode()
+        if reader.separator() == "}":
+            return result
+
+
+def iter_object_items(f, skip=(), chunk_size=CHUNK_SIZE):
+    """
+    Yield the members of the JSON object in ``f`` one at a time.
+
+    Args:
+        f: Text file positioned at a JSON object
+        skip: Field names to leave out of each member that is an object
+        chunk_size: Characters read at a time
+
+    Yields:
+        (key, value) for each top-level member
+
+    Raises:
+        ValueError: if the file is not a well-formed JSON object
+    """
+    reader = _Reader(f, chunk_size)
+    skip = frozenset(skip)
+    reader.expect("{")
+    if reader.peek() == "}":
+        return
+    while True:
+        key = reader.key()
+        if reader.peek() == "{":
+            value = _read_object(reader, skip)
+        else:
+            value = reader.decode()
+        yield key, value
+        if reader.separator() == "}":
+            return
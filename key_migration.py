@@ -0,0 +1,116 @@
+"""
+Migration-state registry for legacy (non-normalized) Firebase document IDs.
+
+Older versions stored progress under the user's raw name ("Maíra Silva")
+instead of the normalized key ("maira_silva"). Saves and loads used to probe
+the legacy document on every call. This registry limits that probe to at
+most once per user per process, and skips it entirely once
+migrate_firebase_keys.py has written its completion marker (except for the
+legacy IDs the migration could not move, which the marker lists).
+
+Lives in its own module so the state survives Streamlit reruns.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+MARKER_COLLECTION = "meta"
+MARKER_DOCUMENT = "key_migration"
+
+# Seconds before the migration marker is read again
+MARKER_TTL = 300
+
+
+class LegacyKeyRegistry:
+    """
+    Process-wide record of which legacy document IDs still need probing.
+    """
+
+    def __init__(self, marker_ttl=MARKER_TTL):
+        self.marker_ttl = marker_ttl
+        self._lock = threading.Lock()
+        self._probed = set()  # names already probed in this process
+        self._known_legacy = set()  # names known to still have a legacy doc
+        self._marker = None
+        self._marker_read_at = 0.0
+
+    def _read_marker(self, db):
+        now = time.monotonic()
+        with self._lock:
+            if self._marker_read_at and now - self._marker_read_at < self.marker_ttl:
+                return self._marker
+        try:
+            from firebase_access import firestore_call
+
+            doc = firestore_call(
+                db.collection(MARKER_COLLECTION).document(MARKER_DOCUMENT).get
+            )
+            marker = doc.to_dict() if doc.exists else None
+        except Exception as e:
+            print(f"⚠️ Could not read key migration marker: {e}")
+            marker = None
+        with self._lock:
+            self._marker = marker
+            self._marker_read_at = now
+            if marker and marker.get("completed"):
+                self._known_legacy.update(marker.get("remaining_legacy_ids", []))
+        return marker
+
+    def needs_probe(self, db, name, normalized_key):
+        """
+        Return True if the legacy document ``name`` should be looked up.
+
+        Each name is probed at most once per process; after a completed
+        migration only the IDs listed as remaining are probed.
+        """
+        if name == normalized_key:
+            return False
+        with self._lock:
+            if name in self._known_legacy:
+                return True
+            if name in self._probed:
+                return False
+        marker = self._read_marker(db)
+        with self._lock:
+            if name in self._known_legacy:
+                return True
+            if marker and marker.get("completed"):
+                return False
+            if name in self._probed:
+                return False
+            self._probed.add(name)
+            return True
+
+    def found_legacy(self, name):
+        """Remember that a legacy document exists for ``name``."""
+        with self._lock:
+            self._known_legacy.add(name)
+
+    def removed_legacy(self, name):
+        """Remember that the legacy document for ``name`` is gone."""
+        with self._lock:
+            self._known_legacy.discard(name)
+            self._probed.add(name)
+
+
+legacy_keys = LegacyKeyRegistry()
+
+
+def write_migration_marker(db, migrated_count, remaining_legacy_ids):
+    """
+    Record that the key migration ran.
+
+    Args:
+        db: Firestore client
+        migrated_count: Number of documents migrated
+        remaining_legacy_ids: Legacy IDs that were not migrated
+    """
+    db.collection(MARKER_COLLECTION).document(MARKER_DOCUMENT).set(
+        {
+            "completed": True,
+            "completed_at": datetime.now().isoformat(),
+            "migrated_count": migrated_count,
+            "remaining_legacy_ids": sorted(remaining_legacy_ids),
+        }
+    )
@@ -0,0 +1,518 @@
+"""
+Materialized per-gift leaderboards in Firestore.
+
+Top-N queries (get_top_performers_by_gift) read one small document instead
+of every participant. Collection ``leaderboards`` holds one document per
+church, ``church_{church_id}``, and ALL_SHARDS documents ``all_0``,
+``all_1``, ... for everyone. Each participant's entries live in the shard
+of their key, so completions spread their transactions over the shards
+instead of all writing one document (Firestore sustains about one write
+per second per document). Each document keeps the nine gift rankings (best
+LEADERBOARD_SIZE completed quizzes per gift):
+
+    {
+        "building": False,
+        "updated_at": "...",
+        "boards": {"A": [{"k": key, "n": display name, "s": score}, ...], ...},
+        "floors": {"A": {"s": score, "k": key}, ...},
+    }
+
+Entries are ranked by score, ties by participant key; the full scan in
+test.get_top_performers_by_gift breaks ties the same way. save_progress_web
+updates the participant's entries in one transaction whenever a completed
+quiz is saved, including retakes, and removes them when a retake starts.
+A board only keeps its best entries, so after a retake with a lower score
+someone who was cut earlier may belong on it. The floor of a board is the
+best-ranked entry ever cut from it, and every participant who is not on
+the board ranks at or below it. A top-N that ranks above the floors of all
+the boards it was merged from is therefore exact. Otherwise the query
+returns None, and the caller falls back to a full scan.
+
+A board that missed an update (the update failed) is marked ``stale``, and
+queries on it fall back to the scan until the boards are rebuilt.
+
+Boards start once ``python migrate_leaderboards.py --execute`` has built
+them from the existing progress. Before that, updates are skipped and
+queries return None.
+"""
+
+import bisect
+import zlib
+from datetime import datetime
+
+from firebase_access import firestore_call
+from progress_layout import church_doc_id
+from quiz_core import gifts
+
+LEADERBOARD_COLLECTION = "leaderboards"
+ALL_SCOPE = "all"
+
+# Documents the "all" boards are split into
+ALL_SHARDS = 10
+
+# Entries kept per gift and scope; top-N queries can ask for up to this many
+LEADERBOARD_SIZE = 100
+
+
+def scope_id(church_name=None):
+    """Leaderboard document ID of a church, or of everyone."""
+    if church_name:
+        return f"church_{church_doc_id(church_name)}"
+    return ALL_SCOPE
+
+
+def all_shard_id(key):
+    """Document ID of the ``all`` shard that holds participant ``key``."""
+    return f"{ALL_SCOPE}_{zlib.crc32(key.encode('utf-8')) % ALL_SHARDS}"
+
+
+def all_shard_ids():
+    """Document IDs of every ``all`` shard."""
+    return [f"{ALL_SCOPE}_{shard}" for shard in range(ALL_SHARDS)]
+
+
+def affected_scopes(key, church_name=None, previous_church=None):
+    """Document IDs an update of participant ``key`` writes to."""
+    scopes = [all_shard_id(key)]
+    for church in (church_name, previous_church):
+        if church and scope_id(church) not in scopes:
+            scopes.append(scope_id(church))
+    return scopes
+
+
+def _rank(entry):
+    # Highest score first, ties by participant key
+    return (-entry["s"], entry["k"])
+
+
+def _cut(entries, floor, capacity):
+    """Keep the best ``capacity`` sorted entries, lowering the floor."""
+    if len(entries) <= capacity:
+        return entries, floor
+    dropped = entries[capacity]
+    if floor is None or _rank(dropped) < _rank(floor):
+        floor = {"s": dropped["s"], "k": dropped["k"]}
+    return entries[:capacity], floor
+
+
+def place_entry(entries, floor, key, name, score, capacity=None):
+    """
+    Put a participant's score on one gift board.
+
+    Args:
+        entries: Board entries, best first
+        floor: Best-ranked entry cut from the board so far, or None
+        key: Participant key (replaces an existing entry)
+        name: Display name
+        score: New score, or None to only remove the participant
+        capacity: Entries to keep (default LEADERBOARD_SIZE)
+
+    Returns:
+        tuple: (new entries, new floor)
+    """
+    capacity = capacity or LEADERBOARD_SIZE
+    entries = [entry for entry in entries if entry["k"] != key]
+    if score is not None:
+        entry = {"k": key, "n": name, "s": score}
+        ranks = [_rank(e) for e in entries]
+        entries.insert(bisect.bisect_left(ranks, _rank(entry)), entry)
+    return _cut(entries, floor, capacity)
+
+
+def top_entries(boards, top_n):
+    """
+    The best ``top_n`` entries of one or more boards, or None if they can't tell.
+
+    Args:
+        boards: (entries, floor) of each board, e.g. one per ``all`` shard
+        top_n: Number of entries wanted
+
+    Participants missing from a board rank at or below its floor, so the
+    merged top ``top_n`` is exact only if it ranks above every floor.
+    """
+    if top_n <= 0:
+        return []
+    merged = sorted((entry for entries, _ in boards for entry in entries), key=_rank)
+    top = merged[:top_n]
+    for _, floor in boards:
+        if floor is not None and (
+            len(top) < top_n or _rank(top[-1]) >= _rank(floor)
+        ):
+            return None
+    return top
+
+
+def _empty_board(building=False):
+    return {
+        "building": building,
+        "updated_at": datetime.now().isoformat(),
+        "boards": {gift: [] for gift in sorted(gifts)},
+        "floors": {},
+    }
+
+
+def _has_entry(data, key):
+    boards = data.get("boards") or {}
+    return any(entry["k"] == key for entries in boards.values() for entry in entries)
+
+
+def _placed(data, key, name, scores, capacity=None):
+    """Return board document ``data`` with the participant's scores placed."""
+    boards = dict(data.get("boards") or {})
+    floors = dict(data.get("floors") or {})
+    for gift in sorted(gifts):
+        score = scores.get(gift) if scores is not None else None
+        entries, floor = place_entry(
+            boards.get(gift, []), floors.get(gift), key, name, score, capacity
+        )
+        boards[gift] = entries
+        if floor is not None:
+            floors[gift] = floor
+    return dict(
+        data,
+        boards=boards,
+        floors=floors,
+        updated_at=datetime.now().isoformat(),
+    )
+
+
+def update_leaderboards(
+    db,
+    key,
+    church_key,
+    name,
+    scores,
+    church_name=None,
+    previous_church=None,
+):
+    """
+    Put a completed quiz on the boards of everyone and of its church.
+
+    The participant's ``all`` shard and church documents are updated in one
+    transaction. The church document is created if the church has none
+    yet. Removing a participant who is on no board writes nothing. Nothing
+    happens until the boards have been built (migrate_leaderboards.py).
+
+    Args:
+        db: Firestore client
+        key: Participant key among all participants
+            (progress_layout.progress_cache_key)
+        church_key: Participant key within the church (normalized name)
+        name: Display name
+        scores: {gift: score}, or None to remove the participant (a retake
+            was started)
+        church_name: The participant's church
+        previous_church: Church the participant just left, if any
+
+    Returns:
+        bool: True if the boards were updated
+    """
+    from firebase_admin import firestore
+
+    collection = db.collection(LEADERBOARD_COLLECTION)
+    shard_ref = collection.document(all_shard_id(key))
+    church_ref = collection.document(scope_id(church_name)) if church_name else None
+    old_ref = None
+    if previous_church and previous_church != church_name:
+        old_ref = collection.document(scope_id(previous_church))
+
+    @firestore.transactional
+    def update(transaction, timeout):
+        shard = shard_ref.get(transaction=transaction, timeout=timeout)
+        if not shard.exists:
+            return False
+        shard_data = shard.to_dict()
+        # Reads must come before writes
+        church = old = None
+        if church_ref is not None:
+            church = church_ref.get(transaction=transaction, timeout=timeout)
+        if old_ref is not None:
+            old = old_ref.get(transaction=transaction, timeout=timeout)
+
+        if scores is not None or _has_entry(shard_data, key):
+            transaction.set(shard_ref, _placed(shard_data, key, name, scores))
+        if church is not None:
+            if church.exists:
+                church_data = church.to_dict()
+            elif scores is not None:
+                church_data = _empty_board(shard_data.get("building", False))
+            else:
+                church_data = None
+            if church_data is not None and (
+                scores is not None or _has_entry(church_data, church_key)
+            ):
+                transaction.set(
+                    church_ref, _placed(church_data, church_key, name, scores)
+                )
+        if old is not None and old.exists:
+            old_data = old.to_dict()
+            if _has_entry(old_data, church_key):
+                transaction.set(old_ref, _placed(old_data, church_key, name, None))
+        return True
+
+    def run(timeout=None):
+        return update(db.transaction(), timeout)
+
+    return firestore_call(run)
+
+
+def mark_stale(db, scopes):
+    """
+    Flag boards that missed an update, so queries on them scan instead.
+
+    A flag that can't be written now is queued in the outbox
+    (firebase_outbox.py). migrate_leaderboards.py clears the flags.
+
+    Args:
+        db: Firestore client
+        scopes: Leaderboard document IDs (see affected_scopes)
+    """
+    from firebase_outbox import enqueue_write
+
+    collection = db.collection(LEADERBOARD_COLLECTION)
+    for scope in scopes:
+        try:
+            firestore_call(collection.document(scope).set, {"stale": True}, merge=True)
+        except Exception as e:
+            print(f"⚠️ Could not mark leaderboard {scope} stale: {e}")
+            enqueue_write(LEADERBOARD_COLLECTION, scope, {"stale": True}, merge=True)
+
+
+def record_result(
+    db,
+    key,
+    church_key,
+    name,
+    scores,
+    church_name=None,
+    previous_church=None,
+):
+    """
+    update_leaderboards(), marking the boards stale if the update fails.
+
+    Takes the same arguments as update_leaderboards().
+
+    Returns:
+        bool: True if the boards were updated
+    """
+    try:
+        return update_leaderboards(
+            db, key, church_key, name, scores, church_name, previous_church
+        )
+    except Exception as e:
+        print(f"⚠️ Leaderboard update failed for {name}: {e}, marking it stale")
+        mark_stale(db, affected_scopes(key, church_name, previous_church))
+        return False
+
+
+def _readable(data):
+    return not data.get("building", False) and not data.get("stale", False)
+
+
+def read_top_performers(db, church_name=None, top_n=3):
+    """
+    Top ``top_n`` participants per gift from the materialized boards.
+
+    One document read for a church, one batched read of the shards for
+    everyone.
+
+    Returns:
+        dict: {gift: [(name, score), ...]}, or None if the boards are not
+        built yet, are stale, or can't answer for this ``top_n``
+    """
+    if top_n > LEADERBOARD_SIZE:
+        return None
+    collection = db.collection(LEADERBOARD_COLLECTION)
+
+    def read_shards():
+        refs = [collection.document(shard) for shard in all_shard_ids()]
+        snapshots = firestore_call(db.get_all, refs)
+        if len(snapshots) < ALL_SHARDS or not all(s.exists for s in snapshots):
+            return None
+        return [snapshot.to_dict() for snapshot in snapshots]
+
+    if church_name:
+        snapshot = firestore_call(collection.document(scope_id(church_name)).get)
+        if not snapshot.exists:
+            # Boards built and nobody from this church completed the quiz yet
+            shards = read_shards()
+            if shards is not None and all(
+                not shard.get("building", False) for shard in shards
+            ):
+                return {gift: [] for gift in gifts}
+            return None
+        documents = [snapshot.to_dict()]
+    else:
+        documents = read_shards()
+        if documents is None:
+            return None
+    if not all(_readable(data) for data in documents):
+        return None
+
+    result = {}
+    for gift in gifts:
+        entries = top_entries(
+            [
+                (
+                    (data.get("boards") or {}).get(gift, []),
+                    (data.get("floors") or {}).get(gift),
+                )
+                for data in documents
+            ],
+            top_n,
+        )
+        if entries is None:
+            return None
+        result[gift] = [(entry["n"], entry["s"]) for entry in entries]
+    return result
+
+
+def collect_boards(records, capacity=None):
+    """
+    Build the boards of every scope from completed progress records.
+
+    Args:
+        records: iterable of (key, record) pairs, as from
+            firebase_export.iter_progress_documents; keys of church
+            partitions are ``{church_id}/{user}``
+        capacity: Entries to keep per gift (default LEADERBOARD_SIZE)
+
+    Returns:
+        dict: {scope ID: {gift: (entries, floor)}}
+    """
+    capacity = capacity or LEADERBOARD_SIZE
+    pending = {}  # scope -> gift -> unsorted entries
+    floors = {}  # scope -> gift -> floor
+
+    def trim(scope, gift):
+        scope_floors = floors.setdefault(scope, {})
+        entries, floor = _cut(
+            sorted(pending[scope][gift], key=_rank), scope_floors.get(gift), capacity
+        )
+        pending[scope][gift] = entries
+        if floor is not None:
+            scope_floors[gift] = floor
+
+    for key, record in records:
+        if not record.get("completed", False):
+            continue
+        name = record.get("display_name", key)
+        scores = record.get("scores") or {}
+        scopes = [(all_shard_id(key), key)]
+        if record.get("church_name"):
+            scopes.append((scope_id(record["church_name"]), key.split("/")[-1]))
+        for scope, scope_key in scopes:
+            boards = pending.setdefault(scope, {gift: [] for gift in gifts})
+            for gift, score in scores.items():
+                if gift not in boards:
+                    continue
+                boards[gift].append({"k": scope_key, "n": name, "s": score})
+                # Sort and cut only now and then: O(N log capacity) overall
+                if len(boards[gift]) >= 2 * capacity:
+                    trim(scope, gift)
+
+    result = {}
+    for scope, boards in pending.items():
+        for gift in boards:
+            trim(scope, gift)
+        result[scope] = {
+            gift: (entries, floors.get(scope, {}).get(gift))
+            for gift, entries in boards.items()
+        }
+    return result
+
+
+def _merge_built(data, built, capacity=None):
+    """
+    Merge scanned boards into a document that was updated during the build.
+
+    Entries written by updates during the build are newer than the scan,
+    and an update that failed during the build keeps the board stale.
+    """
+    capacity = capacity or LEADERBOARD_SIZE
+    boards = data.get("boards") or {}
+    floors = data.get("floors") or {}
+    merged = _empty_board()
+    for gift in sorted(gifts):
+        entries, floor = built.get(gift, ([], None))
+        current = boards.get(gift, [])
+        keys = {entry["k"] for entry in current}
+        entries = sorted(
+            current + [entry for entry in entries if entry["k"] not in keys],
+            key=_rank,
+        )
+        current_floor = floors.get(gift)
+        if floor is None or (
+            current_floor is not None and _rank(current_floor) < _rank(floor)
+        ):
+            floor = current_floor
+        entries, floor = _cut(entries, floor, capacity)
+        merged["boards"][gift] = entries
+        if floor is not None:
+            merged["floors"][gift] = floor
+    if data.get("stale", False):
+        merged["stale"] = True
+    return merged
+
+
+def _board_scope(scope):
+    return scope.startswith("church_") or scope in all_shard_ids()
+
+
+def rebuild_leaderboards(db, load_records):
+    """
+    Rebuild every board from the progress documents.
+
+    The boards are first reset and marked ``building``, so queries fall
+    back to a scan while ``load_records()`` is read. Quizzes completed
+    meanwhile still update the reset boards, and they win over the scan
+    when the results are merged in. The rebuilt boards are not stale.
+    Documents of an older layout (a single ``all`` board) are removed.
+
+    Args:
+        db: Firestore client
+        load_records: callable returning the (key, record) pairs of
+            completed quizzes
+
+    Returns:
+        int: number of boards written
+    """
+    from firebase_admin import firestore
+
+    collection = db.collection(LEADERBOARD_COLLECTION)
+    existing = [ref.id for ref in firestore_call(collection.list_documents)]
+
+    batch = db.batch()
+    for scope in set(existing) | set(all_shard_ids()):
+        if _board_scope(scope):
+            batch.set(collection.document(scope), _empty_board(building=True))
+        else:
+            batch.delete(collection.document(scope))
+    firestore_call(batch.commit)
+
+    built = collect_boards(load_records())
+
+    @firestore.transactional
+    def finish(transaction, ref, scope_boards, timeout):
+        snapshot = ref.get(transaction=transaction, timeout=timeout)
+        data = snapshot.to_dict() if snapshot.exists else {}
+        transaction.set(ref, _merge_built(data, scope_boards))
+
+    # Include church boards first created by updates during the build.
+    # The shards last: the boards count as built once they are all done
+    existing = [ref.id for ref in firestore_call(collection.list_documents)]
+    shards = all_shard_ids()
+    scopes = sorted(
+        scope
+        for scope in set(existing) | set(built)
+        if _board_scope(scope) and scope not in shards
+    )
+    scopes += shards
+    for scope in scopes:
+        ref = collection.document(scope)
+
+        def run(timeout=None, ref=ref, scope=scope):
+            return finish(db.transaction(), ref, built.get(scope, {}), timeout)
+
+        firestore_call(run)
+    return len(scopes)
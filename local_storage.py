@@ -0,0 +1,221 @@
+"""
+Local (non-Firebase) progress storage.
+
+Dispatches the JSON-fallback saves, loads and report scans to the backend
+selected with the ``QUIZ_STORAGE_BACKEND`` environment variable:
+
+- ``json`` (default): journaled quiz_progress.json (progress_journal.py)
+- ``sqlite``: WAL-mode SQLite database (sqlite_store.py), path taken from
+  ``QUIZ_SQLITE_PATH``
+- ``sharded``: one file per participant (shard_store.py), directory taken
+  from ``QUIZ_SHARD_DIR``
+- ``mmap``: fixed-size binary records with a hash index (mmap_store.py),
+  path taken from ``QUIZ_MMAP_PATH``
+"""
+
+import os
+import threading
+
+import progress_journal
+
+DEFAULT_BACKEND = "json"
+
+# (backend, name) pairs whose legacy key was already checked by a save in
+# this process, like key_migration.LegacyKeyRegistry does for Firebase.
+# New saves never write legacy keys, so one probe per user is enough.
+_legacy_probed = set()
+_legacy_lock = threading.Lock()
+
+
+def get_backend():
+    """Return the name of the configured local storage backend."""
+    return os.environ.get("QUIZ_STORAGE_BACKEND", DEFAULT_BACKEND).strip().lower()
+
+
+def use_sqlite():
+    """Return True when the SQLite backend is configured."""
+    return get_backend() == "sqlite"
+
+
+def _keyed_store():
+    """Return the per-key store for the sqlite/sharded/mmap backends, else None."""
+    backend = get_backend()
+    if backend == "sqlite":
+        from sqlite_store import get_sqlite_store
+
+        return get_sqlite_store()
+    if backend == "sharded":
+        from shard_store import DEFAULT_SHARD_DIR, ShardStore
+
+        return ShardStore(os.environ.get("QUIZ_SHARD_DIR", DEFAULT_SHARD_DIR))
+    if backend == "mmap":
+        from mmap_store import get_mmap_store
+
+        return get_mmap_store()
+    return None
+
+
+def save_record(
+    name, normalized_key, record, filename="quiz_progress.json", background=False
+):
+    """
+    Save a progress record, migrating a legacy (non-normalized) key.
+
+    Args:
+        name: Original user name (possible legacy key)
+        normalized_key: Normalized storage key
+        record: Progress dict to store
+        filename: JSON progress file (json backend only)
+        background: If True, compact the JSON journal in the background
+    """
+    store = _keyed_store()
+    if store is None:
+        progress_journal.save_record(
+            name, normalized_key, record, filename, background
+        )
+        return
+
+    probe_id = (get_backend(), name)
+    with _legacy_lock:
+        probe = name != normalized_key and probe_id not in _legacy_probed
+    items = []
+    if probe and store.get(name) is not None:
+        items.append((name, None))
+        print(f"🔄 Migrated data from '{name}' to '{normalized_key}'")
+    items.append((normalized_key, record))
+    store.write_many(items)
+    if probe:
+        # Only once the legacy record is gone; a failed write probes again
+        with _legacy_lock:
+            _legacy_probed.add(probe_id)
+
+
+def load_record(name, normalized_key, filename="quiz_progress.json"):
+    """Load a progress record by normalized key, falling back to the legacy key."""
+    store = _keyed_store()
+    if store is None:
+        return progress_journal.load_record(name, normalized_key, filename)
+
+    record = store.get(normalized_key)
+    if record is None and name != normalized_key:
+        record = store.get(name)
+    return record
+
+
+def load_all_records(
+    filename="quiz_progress.json", church_name=None, only_completed=False
+):
+    """
+    Load every progress record matching the filters.
+
+    Args:
+        filename: JSON progress file (json backend only)
+        church_name: Only participants from this church
+        only_completed: Only completed quizzes
+
+    Returns:
+        dict: {key: record}, or None if no local data exists
+    """
+    backend = get_backend()
+    if backend == "sqlite":
+        return _keyed_store().load_all(church_name, only_completed)
+
+    if backend == "mmap":
+        store = _keyed_store()
+        if not store.exists():
+            return None
+        # Filtered on the stored church name (long names are shortened)
+        return dict(store.iter_records(church_name, only_completed))
+
+    if backend == "sharded":
+        store = _keyed_store()
+        if not store.exists():
+            return None
+        data = dict(store.iter_records())
+    else:
+        data = progress_journal.load_all_records(filename)
+        if data is None:
+            return None
+
+    return {
+        key: record
+        for key, record in data.items()
+        if (church_name is None or record.get("church_name") == church_name)
+        and (not only_completed or record.get("completed", False))
+    }
+
+
+def iter_all_records(
+    filename="quiz_progress.json",
+    church_name=None,
+    only_completed=False,
+    skip_fields=(),
+):
+    """
+    Stream the progress records matching the filters, one at a time.
+
+    Same filters as load_all_records(), for reports that shouldn't hold
+    every record in memory. The JSON snapshot is parsed incrementally, and
+    ``skip_fields`` (e.g. the answers) are not even decoded there; the mmap
+    backend skips the answers by reading its fixed-size rows.
+
+    Returns:
+        iterator of (key, record), or None if no local data exists
+    """
+    backend = get_backend()
+    if backend == "sqlite":
+        return _keyed_store().iter_records(church_name, only_completed)
+
+    if backend in ("sharded", "mmap"):
+        store = _keyed_store()
+        if not store.exists():
+            return None
+        if backend == "mmap":
+            if {"answers", "answers_packed"} <= set(skip_fields):
+                # Straight from the binary rows, filtered before building dicts
+                return store.iter_report_records(church_name, only_completed)
+            return store.iter_records(church_name, only_completed)
+        records = store.iter_records()
+    else:
+        records = progress_journal.iter_all_records(filename, skip_fields)
+        if records is None:
+            return None
+
+    return (
+        (key, record)
+        for key, record in records
+        if (church_name is None or record.get("church_name") == church_name)
+        and (not only_completed or record.get("completed", False))
+    )
+
+
+def load_stats(
+    filename="quiz_progress.json", church_name=None, only_completed=False
+):
+    """
+    Count participants and sum/average gift scores in local storage.
+
+    SQLite aggregates in SQL and mmap scans its binary records; the other
+    backends sum over the loaded records.
+
+    Args:
+        filename: JSON progress file (json backend only)
+        church_name: Only participants from this church
+        only_completed: Only completed quizzes
+
+    Returns:
+        dict: see progress_stats.py, or None if no local data exists
+    """
+    from progress_stats import make_stats, stats_from_records
+
+    backend = get_backend()
+    if backend in ("sqlite", "mmap"):
+        store = _keyed_store()
+        if backend == "mmap" and not store.exists():
+            return None
+        return make_stats(*store.stats(church_name, only_completed))
+
+    data = load_all_records(filename, church_name, only_completed)
+    if data is None:
+        return None
+    return stats_from_records(data.values())
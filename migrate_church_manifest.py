@@ -0,0 +1,86 @@
+"""
+Migration script to build the church manifest.
+
+The church picker reads the church list from a few manifest documents (see
+church_registry.py) instead of streaming the whole ``churches`` collection.
+This script:
+1. Reads all documents from the churches collection
+2. Builds the sorted, de-duplicated list of names
+3. Writes it as the manifest, bumping its version counter
+
+It is safe to run again at any time. Rerun it after firebase_outbox.py has
+replayed church writes that failed, because those are written to the
+``churches`` collection only.
+"""
+
+import sys
+
+from church_registry import MANIFEST_CHUNK_SIZE, read_manifest, write_manifest
+from firebase_access import firestore_call
+from firebase_client import get_firestore_client
+
+
+def migrate_church_manifest(dry_run=True):
+    """
+    Build the church manifest from the churches collection.
+
+    Args:
+        dry_run: If True, only show what would be written
+    """
+    db = get_firestore_client(warm_up=False)
+    if not db:
+        print("❌ Cannot proceed without Firebase connection")
+        return
+
+    print("\n" + "=" * 80)
+    if dry_run:
+        print("🔍 DRY RUN MODE - No changes will be made")
+    else:
+        print("🚀 MIGRATION MODE - Changes will be saved")
+    print("=" * 80 + "\n")
+
+    try:
+        docs = firestore_call(db.collection("churches").stream, deadline=120)
+        names = set()
+        for doc in docs:
+            data = doc.to_dict()
+            names.add(data.get("name", doc.id) if data else doc.id)
+        names = sorted(names)
+        print(f"📊 Found {len(names)} churches in Firebase")
+
+        current = read_manifest(db)
+        if current is None:
+            print("ℹ️ No manifest yet")
+        else:
+            missing = set(names) - set(current)
+            print(f"📋 Current manifest: {len(current)} names, {len(missing)} missing")
+
+        chunks = max(1, -(-len(names) // MANIFEST_CHUNK_SIZE))
+        if dry_run:
+            print(f"\n✅ Would write {len(names)} names in {chunks} document(s)")
+            print("\n💡 To build the manifest, run:")
+            print("   python migrate_church_manifest.py --execute")
+        else:
+            version = write_manifest(db, names)
+            print(
+                f"\n✅ Manifest version {version} written: "
+                f"{len(names)} names in {chunks} document(s)"
+            )
+
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    # Check for --execute flag
+    dry_run = "--execute" not in sys.argv
+
+    if dry_run:
+        print(
+            "⚠️  Running in DRY RUN mode. Use --execute to perform actual migration.\n"
+        )
+
+    migrate_church_manifest(dry_run=dry_run)
@@ -17,6 +17,8 @@ import re
 import sys
 import unicodedata
 
+from key_migration import write_migration_marker
+
 try:
     import firebase_admin
     from firebase_admin import credentials, firestore
@@ -115,11 +117,15 @@ def migrate_firebase_keys(dry_run=True):
 
         if len(all_docs) == 0:
             print("✅ No documents to migrate")
+            if not dry_run:
+                write_migration_marker(db, 0, [])
             return
 
         migrated_count = 0
         skipped_count = 0
         error_count = 0
+        # Legacy IDs left in place (target conflict or error)
+        remaining_legacy_ids = []
 
         for doc in all_docs:
             old_key = doc.id
@@ -144,6 +150,7 @@ def migrate_firebase_keys(dry_run=True):
                     f"⚠️  Skipping '{old_key}' -> '{normalized_key}' (target already exists)"
                 )
                 skipped_count += 1
+                remaining_legacy_ids.append(old_key)
                 continue
 
             # Prepare data for migration
@@ -167,6 +174,7 @@ def migrate_firebase_keys(dry_run=True):
                 except Exception as e:
                     print(f"   ❌ Error migrating: {e}")
                     error_count += 1
+                    remaining_legacy_ids.append(old_key)
             else:
                 migrated_count += 1
 
@@ -182,6 +190,8 @@ def migrate_firebase_keys(dry_run=True):
             print("\n💡 To perform the actual migration, run:")
             print("   python migrate_firebase_keys.py --execute")
         else:
+            # Lets the app stop probing for legacy documents on every save
+            write_migration_marker(db, migrated_count, remaining_legacy_ids)
             print("\n✅ Migration completed!")
 
     except Exception as e:
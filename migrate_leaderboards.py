@@ -0,0 +1,77 @@
+"""
+Migration script to build the materialized gift leaderboards.
+
+Top-N queries read the ``leaderboards`` collection (see leaderboard.py)
+instead of every participant. The app keeps the boards current on every
+completed quiz once they exist. This script:
+1. Reads all completed quizzes (scores and names only)
+2. Ranks them per gift, for everyone and for each church
+3. Writes one leaderboard document per church and the shards of the
+   everyone board, and removes documents of the older single ``all`` board
+
+It is safe to run again at any time, for example after a leaderboard update
+failed and left boards marked stale.
+"""
+
+import sys
+
+from firebase_client import get_firestore_client
+from firebase_export import iter_progress_documents
+from leaderboard import collect_boards, rebuild_leaderboards
+
+# Fields the boards need; answers stay on the server
+FIELDS = ("display_name", "scores", "completed", "church_name")
+
+
+def migrate_leaderboards(dry_run=True):
+    """
+    Build the gift leaderboards from the completed quizzes.
+
+    Args:
+        dry_run: If True, only show what would be written
+    """
+    db = get_firestore_client(warm_up=False)
+    if not db:
+        print("❌ Cannot proceed without Firebase connection")
+        return
+
+    print("\n" + "=" * 80)
+    if dry_run:
+        print("🔍 DRY RUN MODE - No changes will be made")
+    else:
+        print("🚀 MIGRATION MODE - Changes will be saved")
+    print("=" * 80 + "\n")
+
+    def load_records():
+        return iter_progress_documents(db, only_completed=True, fields=FIELDS)
+
+    try:
+        if dry_run:
+            boards = collect_boards(load_records())
+            print(f"📊 Would write {len(boards)} leaderboards")
+            for scope in sorted(boards):
+                longest = max(len(entries) for entries, _ in boards[scope].values())
+                print(f"   🏆 {scope}: {longest} entries per gift")
+            print("\n💡 To build the leaderboards, run:")
+            print("   python migrate_leaderboards.py --execute")
+        else:
+            written = rebuild_leaderboards(db, load_records)
+            print(f"\n✅ {written} leaderboards written")
+
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    # Check for --execute flag
+    dry_run = "--execute" not in sys.argv
+
+    if dry_run:
+        print(
+            "⚠️  Running in DRY RUN mode. Use --execute to perform actual migration.\n"
+        )
+
+    migrate_leaderboards(dry_run=dry_run)
@@ -0,0 +1,149 @@
+"""
+Migration script to move quiz progress into church partitions.
+
+Moves documents from the flat ``quiz_progress`` collection to
+``churches/{church_id}/progress/{user}`` (see progress_layout.py). It:
+1. Reads all documents from the quiz_progress collection
+2. Leaves documents without a church_name where they are
+3. Writes each other document to its church's partition and deletes the
+   flat copy, in batched writes
+4. Keeps the partition copy if it is already newer than the flat one
+
+Set QUIZ_FIREBASE_LAYOUT=church for the app once the migration has run.
+Until then, the app keeps reading and writing the flat collection. In the
+church layout, documents that were not migrated are still found and moved
+when their owner saves again.
+"""
+
+import sys
+
+from firebase_access import firestore_call
+from firebase_client import get_firestore_client
+from progress_layout import (
+    CHURCH,
+    FLAT_COLLECTION,
+    church_doc_id,
+    progress_collection_path,
+)
+
+# Each move is two writes (set + delete); Firestore allows 500 per batch
+BATCH_SIZE = 200
+
+
+def _move_batch(db, docs):
+    """
+    Move one batch of flat documents in a single batched write.
+
+    Returns:
+        tuple: (documents moved, documents whose partition copy was newer)
+    """
+    targets = [
+        db.collection(
+            progress_collection_path(doc.to_dict()["church_name"], CHURCH)
+        ).document(doc.id)
+        for doc in docs
+    ]
+    existing = {}
+    for snapshot in firestore_call(db.get_all, targets, deadline=60):
+        if snapshot.exists:
+            existing[snapshot.reference.path] = snapshot.to_dict()
+
+    batch = db.batch()
+    moved = kept = 0
+    for doc, target in zip(docs, targets):
+        data = doc.to_dict()
+        current = existing.get(target.path)
+        if current is not None and current.get("last_updated", "") >= data.get(
+            "last_updated", ""
+        ):
+            kept += 1  # Partition already has this or a newer version
+        else:
+            batch.set(target, data)
+            moved += 1
+        batch.delete(doc.reference)
+    firestore_call(batch.commit, deadline=60)
+    return moved, kept
+
+
+def migrate_progress_layout(dry_run=True):
+    """
+    Move progress documents into their church partitions.
+
+    Args:
+        dry_run: If True, only show what would be moved
+    """
+    db = get_firestore_client(warm_up=False)
+    if not db:
+        print("❌ Cannot proceed without Firebase connection")
+        return
+
+    print("\n" + "=" * 80)
+    if dry_run:
+        print("🔍 DRY RUN MODE - No changes will be made")
+    else:
+        print("🚀 MIGRATION MODE - Changes will be saved")
+    print("=" * 80 + "\n")
+
+    try:
+        all_docs = firestore_call(
+            db.collection(FLAT_COLLECTION).stream, deadline=300
+        )
+        print(f"📊 Found {len(all_docs)} documents in {FLAT_COLLECTION}\n")
+
+        to_move = []
+        per_church = {}
+        without_church = 0
+        for doc in all_docs:
+            church_name = (doc.to_dict() or {}).get("church_name")
+            if not church_name:
+                without_church += 1
+                continue
+            to_move.append(doc)
+            church_id = church_doc_id(church_name)
+            per_church[church_id] = per_church.get(church_id, 0) + 1
+
+        for church_id, count in sorted(per_church.items()):
+            print(f"   🏛️  {church_id}: {count}")
+
+        moved = kept = 0
+        if not dry_run:
+            for start in range(0, len(to_move), BATCH_SIZE):
+                chunk = to_move[start : start + BATCH_SIZE]
+                chunk_moved, chunk_kept = _move_batch(db, chunk)
+                moved += chunk_moved
+                kept += chunk_kept
+                print(f"   ✅ Batch {start // BATCH_SIZE + 1}: {len(chunk)} documents")
+
+        print("\n" + "=" * 80)
+        print("📊 MIGRATION SUMMARY")
+        print("=" * 80)
+        if dry_run:
+            print(f"✅ Would move: {len(to_move)} into {len(per_church)} churches")
+        else:
+            print(f"✅ Moved: {moved}")
+            print(f"⏭️  Partition already newer: {kept}")
+        print(f"📄 Left in {FLAT_COLLECTION} (no church): {without_church}")
+
+        if dry_run:
+            print("\n💡 To perform the actual migration, run:")
+            print("   python migrate_progress_layout.py --execute")
+        else:
+            print("\n✅ Migration completed! Now set QUIZ_FIREBASE_LAYOUT=church")
+
+    except Exception as e:
+        print(f"\n❌ Error during migration: {e}")
+        import traceback
+
+        traceback.print_exc()
+
+
+if __name__ == "__main__":
+    # Check for --execute flag
+    dry_run = "--execute" not in sys.argv
+
+    if dry_run:
+        print(
+            "⚠️  Running in DRY RUN mode. Use --execute to perform actual migration.\n"
+        )
+
+    migrate_progress_layout(dry_run=dry_run)
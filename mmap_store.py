@@ -0,0 +1,553 @@
+"""
+Memory-mapped binary progress store.
+
+Used when ``QUIZ_STORAGE_BACKEND=mmap``. Participants are kept as
+fixed-size binary records in ``quiz_progress.bin`` (path from
+``QUIZ_MMAP_PATH``), next to an open-addressing hash index from the progress
+key to the record number. The file is accessed through ``mmap``, so a lookup
+or a save touches a few hundred bytes no matter how many participants there
+are, and reports scan the records sequentially without parsing JSON or
+decoding the answers.
+
+Names are stored in fixed 96-byte fields: longer display names are cut at
+a character boundary, and longer keys and church names are stored as a
+prefix plus a checksum of the whole value (see _stored_key), so church
+filters still match them exactly.
+
+Scans copy the records out in chunks of SCAN_CHUNK under the lock and
+decode them after releasing it, so reports use bounded memory.
+
+File layout::
+
+    header   64 bytes   magic, version, record size, slot count, record count
+    index    8 bytes/slot    (crc32 of key, record number + 1)
+    records  RECORD.size bytes each, up to slot count / 2 records
+
+The file is rebuilt with twice the slots when the records region fills up.
+"""
+
+import base64
+import mmap
+import os
+import struct
+import sys
+import threading
+import zlib
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+DEFAULT_MMAP_PATH = "quiz_progress.bin"
+
+MAGIC = b"QPRG"
+FORMAT_VERSION = 1
+INITIAL_SLOTS = 1024
+
+GIFT_ORDER = "ABCDEFGHI"
+
+# magic, version, record size, slot count, record count
+HEADER = struct.Struct("<4sHHII44x")
+# crc32 of key, record number + 1 (0 = empty, TOMBSTONE = deleted)
+SLOT = struct.Struct("<II")
+# key, display_name, church_name, answered mask, answer values, scores,
+# flags, last_updated (unix time)
+RECORD = struct.Struct("<96s96s96s6s12s9sBd")
+
+TOMBSTONE = 0xFFFFFFFF
+
+FLAG_COMPLETED = 0x01
+FLAG_DELETED = 0x02
+FLAG_HAS_TIMESTAMP = 0x04
+
+TEXT_SIZE = 96
+
+# Records copied per lock hold by the sequential scans
+SCAN_CHUNK = 1024
+
+# Offset of the flags byte inside a record
+_FLAGS_OFFSET = TEXT_SIZE * 3 + 6 + 12 + 9
+
+
+def _text(value, size=TEXT_SIZE):
+    """UTF-8 bytes of ``value``, cut at a character boundary to fit ``size``."""
+    raw = (value or "").encode("utf-8")
+    if len(raw) > size:
+        raw = raw[:size].decode("utf-8", "ignore").encode("utf-8")
+    return raw
+
+
+def _stored_key(key):
+    """
+    The key (or church name) as stored: values longer than TEXT_SIZE bytes
+    keep a prefix and the crc32 of the whole value, so they still fit and
+    stay distinct.
+    """
+    encoded = key.encode("utf-8")
+    if len(encoded) <= TEXT_SIZE:
+        return key
+    prefix = _text(key, TEXT_SIZE - 9).decode("utf-8")
+    return f"{prefix}~{zlib.crc32(encoded):08x}"
+
+
+def _untext(raw):
+    return raw.rstrip(b"\0").decode("utf-8")
+
+
+def _hash(key):
+    return zlib.crc32(key.encode("utf-8")) or 1
+
+
+class MmapStore:
+    """
+    Fixed-size binary progress records with a hash index, accessed via mmap.
+    """
+
+    def __init__(self, path=DEFAULT_MMAP_PATH):
+        self.path = path
+        self._lock = threading.RLock()
+        self._file = None
+        self._mm = None
+        self._inode = None
+        self._slots = 0
+
+    # ------------------------------------------------------------------
+    # File handling
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _file_size(slots):
+        return HEADER.size + slots * SLOT.size + (slots // 2) * RECORD.size
+
+    def _create(self, path, slots):
+        with open(path, "wb") as f:
+            f.truncate(self._file_size(slots))
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, RECORD.size, slots, 0))
+
+    def _open(self):
+        if not os.path.exists(self.path):
+            self._create(self.path, INITIAL_SLOTS)
+        self._close()
+        self._file = open(self.path, "r+b")
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        magic, version, record_size, slots, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION or record_size != RECORD.size:
+            self._close()
+            raise ValueError(f"{self.path} is not a version {FORMAT_VERSION} store")
+        self._slots = slots
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
+    def _close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _ensure_current(self):
+        """Reopen the file if it was rebuilt (by us or another process)."""
+        try:
+            inode = os.stat(self.path).st_ino
+        except FileNotFoundError:
+            inode = None
+        if self._mm is None or inode != self._inode:
+            self._open()
+
+    def _flock(self, exclusive):
+        if fcntl is not None:
+            fcntl.flock(self._file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+
+    def _funlock(self):
+        if fcntl is not None and self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+
+    def _locked(self, exclusive, fn, *args):
+        with self._lock:
+            while True:
+                self._ensure_current()
+                self._flock(exclusive)
+                # The file may have been replaced while we waited for the lock
+                if os.stat(self.path).st_ino == self._inode:
+                    break
+                self._funlock()
+            try:
+                return fn(*args)
+            finally:
+                self._funlock()
+
+    # ------------------------------------------------------------------
+    # Index
+    # ------------------------------------------------------------------
+
+    @property
+    def _count(self):
+        return HEADER.unpack_from(self._mm, 0)[4]
+
+    def _record_offset(self, index):
+        return HEADER.size + self._slots * SLOT.size + index * RECORD.size
+
+    def _find(self, key):
+        """
+        Probe the index for ``key``.
+
+        Returns:
+            (slot, record index or None, first reusable slot)
+        """
+        h = _hash(key)
+        encoded = key.encode("utf-8")
+        slot = h % self._slots
+        free_slot = None
+        for _ in range(self._slots):
+            slot_hash, ref = SLOT.unpack_from(
+                self._mm, HEADER.size + slot * SLOT.size
+            )
+            if ref == 0:
+                return slot, None, free_slot if free_slot is not None else slot
+            if ref == TOMBSTONE:
+                if free_slot is None:
+                    free_slot = slot
+            elif slot_hash == h:
+                offset = self._record_offset(ref - 1)
+                if self._mm[offset : offset + 96].rstrip(b"\0") == encoded:
+                    return slot, ref - 1, free_slot
+            slot = (slot + 1) % self._slots
+        return None, None, free_slot
+
+    def _set_slot(self, slot, h, ref):
+        SLOT.pack_into(self._mm, HEADER.size + slot * SLOT.size, h, ref)
+
+    def _grow(self):
+        """Rebuild the file with twice the slots, keeping live records."""
+        live = []
+        for index in range(self._count):
+            offset = self._record_offset(index)
+            raw = bytes(self._mm[offset : offset + RECORD.size])
+            if not raw[_FLAGS_OFFSET] & FLAG_DELETED:
+                live.append(raw)
+
+        slots = self._slots * 2
+        while len(live) + 1 > slots // 2:
+            slots *= 2
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        self._create(tmp_path, slots)
+        with open(tmp_path, "r+b") as f:
+            mm = mmap.mmap(f.fileno(), 0)
+            records_start = HEADER.size + slots * SLOT.size
+            for index, raw in enumerate(live):
+                key = _untext(raw[:96])
+                h = _hash(key)
+                slot = h % slots
+                while SLOT.unpack_from(mm, HEADER.size + slot * SLOT.size)[1]:
+                    slot = (slot + 1) % slots
+                SLOT.pack_into(mm, HEADER.size + slot * SLOT.size, h, index + 1)
+                start = records_start + index * RECORD.size
+                mm[start : start + RECORD.size] = raw
+            HEADER.pack_into(
+                mm, 0, MAGIC, FORMAT_VERSION, RECORD.size, slots, len(live)
+            )
+            mm.flush()
+            mm.close()
+        os.replace(tmp_path, self.path)
+        self._open()
+        self._flock(True)  # Reopening dropped the exclusive lock
+
+    # ------------------------------------------------------------------
+    # Record encoding
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _pack_record(key, record):
+        if "answers_packed" in record:
+            raw_answers = base64.b64decode(record["answers_packed"])[1:]
+        else:
+            from quiz_core import pack_answers
+
+            packed = pack_answers(record.get("answers", {}))
+            raw_answers = base64.b64decode(packed)[1:]
+
+        scores = record.get("scores", {})
+        flags = 0
+        if record.get("completed"):
+            flags |= FLAG_COMPLETED
+        timestamp = 0.0
+        if record.get("last_updated"):
+            timestamp = datetime.fromisoformat(record["last_updated"]).timestamp()
+            flags |= FLAG_HAS_TIMESTAMP
+
+        return RECORD.pack(
+            _text(key),
+            _text(record.get("display_name", key)),
+            _text(_stored_key(record.get("church_name") or "")),
+            raw_answers[:6],
+            raw_answers[6:18],
+            bytes(int(scores.get(gift, 0)) for gift in GIFT_ORDER),
+            flags,
+            timestamp,
+        )
+
+    @staticmethod
+    def _unpack_record(raw):
+        key, display_name, church_name, mask, values, scores, flags, timestamp = (
+            RECORD.unpack(raw)
+        )
+        record = {
+            "display_name": _untext(display_name),
+            "answers_packed": base64.b64encode(bytes([1]) + mask + values).decode(
+                "ascii"
+            ),
+            "scores": dict(zip(GIFT_ORDER, scores)),
+            "last_updated": (
+                datetime.fromtimestamp(timestamp).isoformat()
+                if flags & FLAG_HAS_TIMESTAMP
+                else None
+            ),
+            "completed": bool(flags & FLAG_COMPLETED),
+        }
+        church_name = _untext(church_name)
+        if church_name:
+            record["church_name"] = church_name
+        return _untext(key), record
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key):
+        """Return the record stored under ``key``, or None."""
+        key = _stored_key(key)
+
+        def op():
+            _, index, _ = self._find(key)
+            if index is None:
+                return None
+            offset = self._record_offset(index)
+            return self._unpack_record(self._mm[offset : offset + RECORD.size])[1]
+
+        if not os.path.exists(self.path):
+            return None
+        return self._locked(False, op)
+
+    def _put(self, key, raw):
+        slot, index, free_slot = self._find(key)
+        if index is None:
+            if self._count + 1 > self._slots // 2:
+                self._grow()
+                slot, index, free_slot = self._find(key)
+            index = self._count
+            self._set_slot(free_slot, _hash(key), index + 1)
+            HEADER.pack_into(
+                self._mm, 0, MAGIC, FORMAT_VERSION, RECORD.size, self._slots, index + 1
+            )
+        offset = self._record_offset(index)
+        self._mm[offset : offset + RECORD.size] = raw
+
+    def _delete(self, key):
+        slot, index, _ = self._find(key)
+        if index is None:
+            return
+        self._set_slot(slot, _hash(key), TOMBSTONE)
+        self._mm[self._record_offset(index) + _FLAGS_OFFSET] |= FLAG_DELETED
+
+    def write_many(self, items):
+        """
+        Apply several writes under one lock.
+
+        Args:
+            items: iterable of (key, record); a record of None deletes the key
+        """
+        packed = []
+        for key, record in items:
+            key = _stored_key(key)
+            packed.append(
+                (key, None if record is None else self._pack_record(key, record))
+            )
+
+        def op():
+            for key, raw in packed:
+                if raw is None:
+                    self._delete(key)
+                else:
+                    self._put(key, raw)
+
+        self._locked(True, op)
+
+    def put(self, key, record):
+        """Insert or replace the record stored under ``key``."""
+        self.write_many([(key, record)])
+
+    def delete(self, key):
+        """Delete the record stored under ``key``."""
+        self.write_many([(key, None)])
+
+    def exists(self):
+        """Return True if the store file exists."""
+        return os.path.exists(self.path)
+
+    def _scan_chunks(self):
+        """
+        Yield the records region in chunks of SCAN_CHUNK raw records.
+
+        Each chunk is copied under the lock and the lock is released before
+        it is yielded. A rebuild by _grow() between chunks keeps the record
+        order and drops deleted records, so the scan resumes after the last
+        live key it returned.
+        """
+        if not self.exists():
+            return
+        position = {"index": 0, "slots": None, "last_key": None}
+
+        def op():
+            index = position["index"]
+            # Rebuilds always grow the slot count (inode numbers get reused)
+            if position["slots"] not in (None, self._slots):
+                if position["last_key"] is None:
+                    index = 0  # Everything scanned so far was deleted
+                else:
+                    _, found, _ = self._find(position["last_key"])
+                    if found is not None:
+                        index = found + 1
+                index = min(index, self._count)
+            end = min(index + SCAN_CHUNK, self._count)
+            start = self._record_offset(index)
+            chunk = bytes(self._mm[start : self._record_offset(end)])
+            position.update(index=end, slots=self._slots)
+            return chunk
+
+        while True:
+            chunk = self._locked(False, op)
+            if not chunk:
+                return
+            for offset in range(len(chunk) - RECORD.size, -1, -RECORD.size):
+                if not chunk[offset + _FLAGS_OFFSET] & FLAG_DELETED:
+                    position["last_key"] = _untext(chunk[offset : offset + TEXT_SIZE])
+                    break
+            yield chunk
+
+    def iter_rows(self, only_completed=False):
+        """
+        Scan records sequentially without building dicts.
+
+        Yields:
+            (key, display_name, church_name as stored, scores tuple in
+            GIFT_ORDER, completed, last_updated unix time or None)
+        """
+        for chunk in self._scan_chunks():
+            for key, display_name, church_name, _, _, scores, flags, timestamp in (
+                RECORD.iter_unpack(chunk)
+            ):
+                if flags & FLAG_DELETED:
+                    continue
+                if only_completed and not flags & FLAG_COMPLETED:
+                    continue
+                yield (
+                    _untext(key),
+                    _untext(display_name),
+                    _untext(church_name) or None,
+                    tuple(scores),
+                    bool(flags & FLAG_COMPLETED),
+                    timestamp if flags & FLAG_HAS_TIMESTAMP else None,
+                )
+
+    def stats(self, church_name=None, only_completed=False):
+        """
+        Count participants and sum each gift score from the fixed-size
+        records, without building record dicts.
+
+        Returns:
+            tuple: (count, completed count, {gift: total score})
+        """
+        count = completed = 0
+        sums = [0] * len(GIFT_ORDER)
+        stored_church = None if church_name is None else _stored_key(church_name)
+        for _, _, row_church, scores, row_completed, _ in self.iter_rows(
+            only_completed
+        ):
+            if stored_church is not None and row_church != stored_church:
+                continue
+            count += 1
+            completed += row_completed
+            for i, score in enumerate(scores):
+                sums[i] += score
+        return count, completed, dict(zip(GIFT_ORDER, sums))
+
+    def iter_report_records(self, church_name=None, only_completed=False):
+        """
+        Yield (key, record) without the answers, built from iter_rows().
+
+        For reports: the answers are neither copied nor base64-encoded, and
+        the filters run on the rows before any dict is built.
+        """
+        stored_church = None if church_name is None else _stored_key(church_name)
+        for key, display_name, row_church, scores, completed, timestamp in (
+            self.iter_rows(only_completed)
+        ):
+            if stored_church is not None:
+                if row_church != stored_church:
+                    continue
+                row_church = church_name  # The full name, not the stored one
+            record = {
+                "display_name": display_name,
+                "scores": dict(zip(GIFT_ORDER, scores)),
+                "last_updated": (
+                    datetime.fromtimestamp(timestamp).isoformat()
+                    if timestamp is not None
+                    else None
+                ),
+                "completed": completed,
+            }
+            if row_church:
+                record["church_name"] = row_church
+            yield key, record
+
+    def iter_records(self, church_name=None, only_completed=False):
+        """
+        Yield (key, record) for the stored participants matching the filters.
+
+        Args:
+            church_name: Only participants from this church
+            only_completed: Only completed quizzes
+        """
+        stored_church = None if church_name is None else _stored_key(church_name)
+        for chunk in self._scan_chunks():
+            for offset in range(0, len(chunk), RECORD.size):
+                raw = chunk[offset : offset + RECORD.size]
+                flags = raw[_FLAGS_OFFSET]
+                if flags & FLAG_DELETED:
+                    continue
+                if only_completed and not flags & FLAG_COMPLETED:
+                    continue
+                key, record = self._unpack_record(raw)
+                if stored_church is not None:
+                    if record.get("church_name") != stored_church:
+                        continue
+                    record["church_name"] = church_name
+                yield key, record
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_mmap_store(path=None):
+    """Get the shared MmapStore for ``path`` (one per process)."""
+    path = os.path.abspath(path or os.environ.get("QUIZ_MMAP_PATH", DEFAULT_MMAP_PATH))
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = MmapStore(path)
+            _stores[path] = store
+        return store
+
+
+if __name__ == "__main__":
+    # Usage: python mmap_store.py [quiz_progress.json] [quiz_progress.bin]
+    from progress_journal import load_all_records
+
+    source = sys.argv[1] if len(sys.argv) > 1 else "quiz_progress.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_MMAP_PATH
+    data = load_all_records(source) or {}
+    get_mmap_store(target).write_many(data.items())
+    print(f"✅ Converted {len(data)} participants from {source} into {target}")
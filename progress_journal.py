@@ -0,0 +1,465 @@
+"""
+Append-only journal store for the local JSON progress fallback.
+
+Instead of rewriting the whole progress file on every answer, each save
+appends one small JSON line to ``<filename>.journal``. The journal is folded
+back into the snapshot (the regular ``quiz_progress.json`` file, same format
+as before) once it grows past a threshold or when the background compactor
+runs. Loads replay snapshot + journal, and the replayed state is kept in
+memory so that subsequent loads only read the journal lines appended since
+the last call.
+
+Appends and compactions hold an exclusive ``flock`` on
+``<filename>.journal.lock`` so a compaction in one process never rotates
+the journal away while another process is writing to it.
+"""
+
+import copy
+import json
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows: only in-process locking
+    fcntl = None
+
+# Number of journal records that triggers an automatic compaction
+DEFAULT_COMPACT_THRESHOLD = 500
+
+# Seconds between background compaction passes
+DEFAULT_COMPACT_INTERVAL = 60
+
+
+class JournalStore:
+    """
+    Snapshot + append-only journal for progress records.
+
+    Time Complexity: O(1) per save (one appended line),
+                     O(new lines) per load after the first replay
+    """
+
+    def __init__(self, filename, compact_threshold=DEFAULT_COMPACT_THRESHOLD):
+        self.filename = filename
+        self.journal_filename = filename + ".journal"
+        # Journal moved aside by a compaction that has not finished (or crashed)
+        self.compacting_filename = self.journal_filename + ".compacting"
+        self.lock_filename = self.journal_filename + ".lock"
+        self.compact_threshold = compact_threshold
+
+        self._lock = threading.RLock()
+        self._state = None  # key -> record, replayed snapshot + journal
+        self._snapshot_stat = None  # (mtime_ns, size) of the replayed snapshot
+        self._compacting_stat = None  # same, for the rotated journal
+        self._journal_offset = 0  # bytes of the journal already replayed
+        self._journal_records = 0  # records currently in the journal
+        self._compactor = None
+        self._lock_file = None
+
+    def _locked(self, fn, *args):
+        """Run ``fn`` holding the cross-process journal lock."""
+        if fcntl is None:
+            return fn(*args)
+        if self._lock_file is None:
+            # Never removed, so every process locks the same inode
+            self._lock_file = open(self.lock_filename, "a")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        try:
+            return fn(*args)
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    # ------------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------------
+
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _read_snapshot(self):
+        if not os.path.exists(self.filename):
+            return {}
+        try:
+            with open(self.filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (json.JSONDecodeError, IOError):
+            return {}
+
+    def _apply(self, state, entry):
+        key = entry.get("key")
+        if key is None:
+            return
+        if entry.get("deleted"):
+            state.pop(key, None)
+        else:
+            state[key] = entry.get("value")
+
+    def _replay(self, data):
+        """Apply the complete lines of journal bytes; return bytes consumed."""
+        # Only consume complete lines; a concurrent writer may be mid-append
+        end = data.rfind(b"\n") + 1
+        for raw in data[:end].splitlines():
+            if not raw.strip():
+                continue
+            try:
+                entry = json.loads(raw.decode("utf-8"))
+            except (ValueError, UnicodeDecodeError):
+                continue  # Torn or corrupt line, skip it
+            self._apply(self._state, entry)
+            self._journal_records += 1
+        return end
+
+    def _read_bytes(self, path, offset=0):
+        try:
+            with open(path, "rb") as f:
+                f.seek(offset)
+                return f.read()
+        except OSError:
+            return b""
+
+    def _refresh(self):
+        """Bring the in-memory state up to date with the files on disk."""
+        snapshot_stat = self._stat(self.filename)
+        compacting_stat = self._stat(self.compacting_filename)
+        journal_stat = self._stat(self.journal_filename)
+
+        # The snapshot changed under us (first load, another process compacted,
+        # or the file was replaced) - replay everything from scratch.
+        journal_shrunk = (
+            journal_stat is not None and journal_stat[1] < self._journal_offset
+        )
+        if (
+            self._state is None
+            or snapshot_stat != self._snapshot_stat
+            or compacting_stat != self._compacting_stat
+            or (journal_stat is None and self._journal_offset)
+            or journal_shrunk
+        ):
+            self._state = self._read_snapshot()
+            self._snapshot_stat = snapshot_stat
+            self._compacting_stat = compacting_stat
+            self._journal_offset = 0
+            self._journal_records = 0
+            # A rotated journal holds records older than the current journal
+            # that may not be in the snapshot yet (compaction in progress, or
+            # a crash before the new snapshot was renamed into place)
+            if compacting_stat is not None:
+                self._replay(self._read_bytes(self.compacting_filename))
+                self._journal_records = 0  # only count the live journal
+
+        if journal_stat is None or journal_stat[1] == self._journal_offset:
+            return
+
+        chunk = self._read_bytes(self.journal_filename, self._journal_offset)
+        self._journal_offset += self._replay(chunk)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def get(self, key, default=None):
+        """Return the record stored under ``key``."""
+        with self._lock:
+            self._refresh()
+            record = self._state.get(key)
+        return copy.deepcopy(record) if record is not None else default
+
+    def __contains__(self, key):
+        with self._lock:
+            self._refresh()
+            return key in self._state
+
+    def load_all(self):
+        """Return a copy of all records as {key: record}."""
+        with self._lock:
+            self._refresh()
+            # Like get(): callers must not see into the replayed state
+            return copy.deepcopy(self._state)
+
+    def _append(self, entries):
+        lines = "".join(
+            json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for entry in entries
+        )
+        with open(self.journal_filename, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def put(self, key, value):
+        """Append a record for ``key`` to the journal."""
+        self.write_many([(key, value)])
+
+    def delete(self, key):
+        """Append a tombstone for ``key`` to the journal."""
+        self.write_many([(key, None)])
+
+    def write_many(self, items):
+        """
+        Append several records in a single journal write.
+
+        Args:
+            items: iterable of (key, value); a value of None deletes the key
+        """
+        entries = []
+        for key, value in items:
+            if value is None:
+                entries.append({"key": key, "deleted": True})
+            else:
+                entries.append({"key": key, "value": value})
+        if not entries:
+            return
+
+        with self._lock:
+            self._locked(self._append, entries)
+            # Replaying our own lines keeps in-memory state identical to what
+            # a fresh process would see (string answer keys, other writers).
+            self._refresh()
+
+            if self.compact_threshold and self._journal_records >= self.compact_threshold:
+                self.compact()
+
+    def _write_snapshot(self):
+        tmp_filename = self.filename + ".tmp"
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(self._state, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, self.filename)
+        self._snapshot_stat = self._stat(self.filename)
+
+    def _remove_rotated(self):
+        try:
+            os.remove(self.compacting_filename)
+        except FileNotFoundError:
+            pass
+        self._compacting_stat = None
+
+    def compact(self):
+        """
+        Fold the journal into the snapshot.
+
+        The snapshot is written to a temporary file and atomically renamed
+        over the old one, then the journal is removed. Appends from any
+        process wait until it is done.
+        """
+        with self._lock:
+            return self._locked(self._compact)
+
+    def _compact(self):
+        self._refresh()
+        rotated = self.compacting_filename
+        recovered = False
+        if self._compacting_stat is not None:
+            # An earlier compaction stopped after rotating the journal.
+            # _refresh() replayed it, so finish that compaction first.
+            self._write_snapshot()
+            self._remove_rotated()
+            recovered = True
+        if not self._journal_records:
+            return recovered
+
+        # Move the journal aside first so later appends land in a fresh
+        # journal. The journal lock keeps other processes from appending
+        # until the tail below is read, and a hard link never replaces an
+        # existing rotated journal (no lock on Windows).
+        try:
+            os.link(self.journal_filename, rotated)
+        except FileExistsError:
+            return recovered  # Another process is compacting
+        os.remove(self.journal_filename)
+        tail = self._read_bytes(rotated, self._journal_offset)
+        self._replay(tail)
+
+        self._write_snapshot()
+        self._remove_rotated()
+
+        self._journal_offset = 0
+        self._journal_records = 0
+        print(f"🗜️  Compacted progress journal into {self.filename}")
+        return True
+
+    def start_background_compaction(self, interval=DEFAULT_COMPACT_INTERVAL):
+        """Start a daemon thread that compacts the journal periodically."""
+        with self._lock:
+            if self._compactor is not None:
+                return
+            stop = threading.Event()
+
+            def run():
+                while not stop.wait(interval):
+                    try:
+                        self.compact()
+                    except Exception as e:
+                        print(f"⚠️ Journal compaction failed: {e}")
+
+            thread = threading.Thread(
+                target=run, name="progress-journal-compactor", daemon=True
+            )
+            self._compactor = (thread, stop)
+            thread.start()
+
+    def stop_background_compaction(self):
+        """Stop the background compactor, if running."""
+        with self._lock:
+            if self._compactor is None:
+                return
+            thread, stop = self._compactor
+            self._compactor = None
+        stop.set()
+        thread.join()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_journal_store(filename="quiz_progress.json", background=False):
+    """
+    Get the shared JournalStore for ``filename`` (one per process).
+
+    Args:
+        filename: Snapshot file path
+        background: If True, make sure the background compactor is running
+    """
+    path = os.path.abspath(filename)
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = JournalStore(filename)
+            _stores[path] = store
+    if background:
+        store.start_background_compaction()
+    return store
+
+
+def _has_data(filename):
+    """True if the snapshot or a journal (live or rotated) exists."""
+    return any(
+        os.path.exists(path)
+        for path in (filename, filename + ".journal", filename + ".journal.compacting")
+    )
+
+
+def save_record(
+    name, normalized_key, record, filename="quiz_progress.json", background=False
+):
+    """
+    Journal a progress record, migrating a legacy (non-normalized) key.
+
+    Args:
+        name: Original user name (possible legacy key)
+        normalized_key: Normalized storage key
+        record: Progress dict to store
+        filename: Snapshot file path
+        background: If True, compact from a background thread as well
+    """
+    store = get_journal_store(filename, background=background)
+    items = []
+    if name != normalized_key and name in store:
+        items.append((name, None))
+        print(f"🔄 Migrated data from '{name}' to '{normalized_key}'")
+    items.append((normalized_key, record))
+    store.write_many(items)
+
+
+def load_record(name, normalized_key, filename="quiz_progress.json"):
+    """Load a progress record by normalized key, falling back to the legacy key."""
+    if not _has_data(filename):
+        return None
+    store = get_journal_store(filename)
+    record = store.get(normalized_key)
+    if record is None and name != normalized_key:
+        record = store.get(name)
+    return record
+
+
+def load_all_records(filename="quiz_progress.json"):
+    """
+    Load every progress record (snapshot + journal).
+
+    Returns:
+        dict: {key: record}, or None if neither file exists
+    """
+    if not _has_data(filename):
+        return None
+    return get_journal_store(filename).load_all()
+
+
+def _read_journal(path, entries):
+    """Replay the complete lines of a journal file into {key: value or None}."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return
+    # Only complete lines; a concurrent writer may be mid-append
+    for raw in data[: data.rfind(b"\n") + 1].splitlines():
+        if not raw.strip():
+            continue
+        try:
+            entry = json.loads(raw.decode("utf-8"))
+        except (ValueError, UnicodeDecodeError):
+            continue  # Torn or corrupt line, skip it
+        key = entry.get("key")
+        if key is not None:
+            entries[key] = None if entry.get("deleted") else entry.get("value")
+
+
+def iter_all_records(filename="quiz_progress.json", skip_fields=()):
+    """
+    Stream every progress record (snapshot + journal) without loading the
+    whole snapshot.
+
+    The journal (small, it is compacted regularly) is replayed into memory
+    first. Then the snapshot is read one record at a time
+    (see json_stream.py), and journaled records replace or remove
+    snapshot records as they pass. Nothing is cached in the shared store.
+
+    Args:
+        filename: Snapshot file path
+        skip_fields: Record fields to leave out (e.g. the answers)
+
+    Returns:
+        iterator of (key, record), or None if neither file exists
+    """
+    if not _has_data(filename):
+        return None
+    return _iter_all_records(filename, skip_fields)
+
+
+def _iter_all_records(filename, skip_fields):
+    from json_stream import iter_object_items
+
+    # Journal first: a compaction after this point folds it into the
+    # snapshot we open next, so nothing is lost
+    journal = {}
+    _read_journal(filename + ".journal.compacting", journal)
+    _read_journal(filename + ".journal", journal)
+
+    def strip(record):
+        if not isinstance(record, dict):
+            return record
+        return {k: v for k, v in record.items() if k not in skip_fields}
+
+    if os.path.exists(filename):
+        try:
+            with open(filename, "r", encoding="utf-8") as f:
+                for key, record in iter_object_items(f, skip_fields):
+                    if key in journal:
+                        record = journal.pop(key)
+                        if record is None:
+                            continue
+                        record = strip(record)
+                    yield key, record
+        except (ValueError, IOError) as e:
+            print(f"⚠️ Could not read {filename}: {e}")
+
+    for key, record in journal.items():
+        if record is not None:
+            yield key, strip(record)
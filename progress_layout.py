@@ -0,0 +1,165 @@
+"""
+Firestore layout of quiz progress documents.
+
+Two layouts are supported, selected with QUIZ_FIREBASE_LAYOUT:
+
+    flat    (default) quiz_progress/{user}
+    church  churches/{church_id}/progress/{user}
+
+In the church layout each congregation's participants live under its church
+document. Per-church reports read only that partition, and the same name at
+two churches no longer maps to the same document. Documents without a
+church stay in the flat collection, and loads fall back to it. Move the
+existing data with ``python migrate_progress_layout.py`` before switching.
+"""
+
+import os
+import threading
+
+FLAT_COLLECTION = "quiz_progress"
+CHURCH_COLLECTION = "churches"
+PROGRESS_SUBCOLLECTION = "progress"
+
+FLAT = "flat"
+CHURCH = "church"
+
+_lock = threading.Lock()
+_flat_documents = set()  # users loaded from the flat collection (church layout)
+
+
+def get_layout():
+    """Return the configured layout, ``flat`` or ``church``."""
+    layout = os.environ.get("QUIZ_FIREBASE_LAYOUT", FLAT).strip().lower()
+    return CHURCH if layout == CHURCH else FLAT
+
+
+def partitioned():
+    """True when progress is stored under each church."""
+    return get_layout() == CHURCH
+
+
+def church_doc_id(church_name):
+    """Document ID of a church in the ``churches`` collection."""
+    # "/" would start a new path segment
+    return church_name.lower().strip().replace("/", "_")
+
+
+def progress_collection_path(church_name=None, layout=None):
+    """
+    Path of the collection holding a participant's progress.
+
+    Args:
+        church_name: The participant's church, if known
+        layout: ``flat`` or ``church`` (default: the configured layout)
+
+    Returns:
+        str: collection path usable with db.collection()
+    """
+    if (layout or get_layout()) == CHURCH and church_name:
+        return (
+            f"{CHURCH_COLLECTION}/{church_doc_id(church_name)}/"
+            f"{PROGRESS_SUBCOLLECTION}"
+        )
+    return FLAT_COLLECTION
+
+
+def progress_collection(db, church_name=None):
+    """Collection reference for a participant's progress."""
+    return db.collection(progress_collection_path(church_name))
+
+
+def remember_flat_document(normalized_key):
+    """Remember that a user's progress was found in the flat collection."""
+    with _lock:
+        _flat_documents.add(normalized_key)
+
+
+def take_flat_document(normalized_key):
+    """
+    Return True (once) if the user's flat document should be removed, now
+    that their progress is written to the church partition.
+    """
+    with _lock:
+        if normalized_key in _flat_documents:
+            _flat_documents.discard(normalized_key)
+            return True
+        return False
+
+
+def progress_cache_key(normalized_key, church_name=None):
+    """Cache key of a participant: the user key, scoped by church if partitioned."""
+    if partitioned() and church_name:
+        return f"{church_doc_id(church_name)}/{normalized_key}"
+    return normalized_key
+
+
+def participant_key(doc):
+    """
+    Key of a progress document in report data.
+
+    Partitioned documents are prefixed with their church ID so the same
+    name at two churches stays two participants.
+    """
+    parent = doc.reference.parent.parent
+    if parent is None:
+        return doc.id
+    return f"{parent.id}/{doc.id}"
+
+
+def progress_sources(db, church_name=None, only_completed=False, fields=None):
+    """
+    Queries covering the progress documents of one church, or of all.
+
+    In the church layout a church's reports read only its partition; the
+    all-churches case is a collection group query plus the flat collection
+    (participants who never picked a church). In the flat layout the church
+    filter runs in Firestore. Filtering on ``completed`` and projecting
+    ``fields`` also happen server-side, so reports don't download answers
+    (see FIREBASE_SETUP.md for the indexes these queries use).
+
+    Args:
+        church_name: If set, only this church's participants
+        only_completed: If True, only completed quizzes
+        fields: If set, only these fields are returned
+
+    Returns:
+        list: (collection, query) pairs; ``collection`` is the collection
+        reference the query runs on, or None for a collection group query
+    """
+    if partitioned():
+        if church_name:
+            collection = progress_collection(db, church_name)
+            sources = [(collection, collection)]
+        else:
+            flat = db.collection(FLAT_COLLECTION)
+            sources = [
+                (None, db.collection_group(PROGRESS_SUBCOLLECTION)),
+                (flat, flat),
+            ]
+    else:
+        collection = db.collection(FLAT_COLLECTION)
+        query = collection
+        if church_name:
+            query = query.where("church_name", "==", church_name)
+        sources = [(collection, query)]
+
+    if only_completed:
+        sources = [(c, q.where("completed", "==", True)) for c, q in sources]
+    if fields:
+        sources = [(c, q.select(list(fields))) for c, q in sources]
+    return sources
+
+
+def progress_queries(db, church_name=None, only_completed=False, fields=None):
+    """
+    Queries covering the progress documents of one church, or of all.
+
+    See progress_sources() for the arguments.
+
+    Returns:
+        list: queries to stream
+    """
+    return [
+        query
+        for _, query in progress_sources(db, church_name, only_completed, fields)
+    ]
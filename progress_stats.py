@@ -0,0 +1,123 @@
+"""
+Participant statistics without downloading participant records.
+
+In Firebase, counts and per-gift score totals come from aggregation queries
+(count() and sum()). Each query is billed like a handful of document reads,
+not one read per participant. The local backends have matching fast paths:
+SQL aggregates for SQLite and a scan of the fixed-size records for mmap.
+The JSON and sharded backends sum over the records.
+
+All sources return the same dict:
+    {
+        "count": participants matching the filters,
+        "completed": how many of them completed the quiz,
+        "score_sums": {gift: total score},
+        "score_averages": {gift: average score per participant},
+    }
+"""
+
+from quiz_core import gifts
+
+# Firestore allows at most 5 aggregations per query
+MAX_AGGREGATIONS = 5
+
+
+def make_stats(count, completed, score_sums):
+    """Build the stats dict, computing the averages."""
+    score_sums = {gift: score_sums.get(gift, 0) for gift in sorted(gifts)}
+    return {
+        "count": count,
+        "completed": completed,
+        "score_sums": score_sums,
+        "score_averages": {
+            gift: (total / count if count else 0.0)
+            for gift, total in score_sums.items()
+        },
+    }
+
+
+def stats_from_records(records):
+    """
+    Compute stats from an iterable of progress records.
+
+    Args:
+        records: iterable of record dicts (with ``scores`` and ``completed``)
+    """
+    count = completed = 0
+    sums = {gift: 0 for gift in gifts}
+    for record in records:
+        count += 1
+        if record.get("completed", False):
+            completed += 1
+        for gift, score in (record.get("scores") or {}).items():
+            if gift in sums:
+                sums[gift] += score
+    return make_stats(count, completed, sums)
+
+
+def _aggregate(query, aggregations):
+    """
+    Run one aggregation query.
+
+    Args:
+        query: Firestore query or collection reference
+        aggregations: list of (kind, field, alias), kind "count" or "sum"
+
+    Returns:
+        dict: {alias: value}
+    """
+    from firebase_access import firestore_call
+
+    aggregation_query = None
+    for kind, field, alias in aggregations:
+        source = aggregation_query if aggregation_query is not None else query
+        if kind == "count":
+            aggregation_query = source.count(alias=alias)
+        else:
+            aggregation_query = source.sum(field, alias=alias)
+
+    values = {}
+    for result_set in firestore_call(aggregation_query.get, deadline=30):
+        for result in result_set:
+            values[result.alias] = result.value or 0
+    return values
+
+
+def firebase_stats(db, church_name=None, only_completed=False):
+    """
+    Compute stats with Firestore aggregation queries.
+
+    Uses the same church and completion filters (and church partitions) as
+    the reports. That is one count plus nine sums, split into queries of at
+    most five aggregations, plus one filtered count for the number of
+    completed quizzes.
+
+    Args:
+        db: Firestore client
+        church_name: If set, only this church's participants
+        only_completed: If True, only completed quizzes
+
+    Returns:
+        dict: see the module docstring
+    """
+    from progress_layout import progress_queries
+
+    aggregations = [("count", None, "count")] + [
+        ("sum", f"scores.{gift}", gift) for gift in sorted(gifts)
+    ]
+    count = 0
+    sums = {gift: 0 for gift in gifts}
+    for query in progress_queries(db, church_name, only_completed):
+        for start in range(0, len(aggregations), MAX_AGGREGATIONS):
+            values = _aggregate(query, aggregations[start : start + MAX_AGGREGATIONS])
+            count += values.pop("count", 0)
+            for gift, total in values.items():
+                sums[gift] += total
+
+    if only_completed:
+        completed = count
+    else:
+        completed = 0
+        for query in progress_queries(db, church_name, only_completed=True):
+            completed += _aggregate(query, [("count", None, "count")]).get("count", 0)
+    return make_stats(int(count), int(completed), sums)
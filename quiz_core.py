@@ -0,0 +1,337 @@
+"""
+Dependency-free scoring core: gift mapping, QuizScorer and the packed
+answers format.
+
+Only the standard library is imported here, so the Streamlit app, the
+storage backends and scripts can score and decode answers without loading
+the CLI, the reports or any Firebase code. test.py re-exports everything
+for backward compatibility.
+"""
+
+import base64
+import re
+import unicodedata
+
+gifts = {
+    "A": [1, 10, 19, 28, 37],
+    "B": [2, 11, 20, 29, 38],
+    "C": [3, 12, 21, 30, 39],
+    "D": [4, 13, 22, 31, 40],
+    "E": [5, 14, 23, 32, 41],
+    "F": [6, 15, 24, 33, 42],
+    "G": [7, 16, 25, 34, 43],
+    "H": [8, 17, 26, 35, 44],
+    "I": [9, 18, 27, 36, 45],
+}
+
+# Gift names/descriptions (optional)
+gift_names = {
+    "A": "Profecia",
+    "B": "Serviço",
+    "C": "Ensino",
+    "D": "Exortação",
+    "E": "Contribuição",
+    "F": "Liderança",
+    "G": "Misericórdia",
+    "H": "Evangelista",
+    "I": "Pastor",
+}
+
+
+class QuizScorer:
+    """
+    Efficient quiz scorer for spiritual gifts assessment.
+
+    Time Complexity: O(1) per answer update
+    Space Complexity: O(g + q) where g=gifts, q=questions
+    """
+
+    def __init__(self, gifts_config):
+        self.gifts_config = gifts_config
+        self.answers = {}  # question_num -> score (0-3)
+        self.scores = {gift: 0 for gift in gifts_config.keys()}
+
+        # Build inverted index: question -> [gifts]
+        # This allows O(1) updates when answering questions
+        self.question_to_gifts = {}
+        for gift, question_list in gifts_config.items():
+            for q in question_list:
+                if q not in self.question_to_gifts:
+                    self.question_to_gifts[q] = []
+                self.question_to_gifts[q].append(gift)
+
+    def answer_question(self, question_num, value):
+        """
+        Answer a question with a value from 0-3.
+        Updates affected gift scores incrementally.
+
+        Args:
+            question_num: int (1-45)
+            value: int (0-3)
+        """
+        if not (1 <= question_num <= 45):
+            raise ValueError(f"Question number must be 1-45, got {question_num}")
+        if not (0 <= value <= 3):
+            raise ValueError(f"Answer value must be 0-3, got {value}")
+
+        # Get previous value (if answered before)
+        old_value = self.answers.get(question_num, 0)
+        self.answers[question_num] = value
+
+        # Update only affected gifts (O(1) - typically 1 gift per question)
+        delta = value - old_value
+        for gift in self.question_to_gifts[question_num]:
+            self.scores[gift] += delta
+
+    def batch_answer(self, answers_dict):
+        """
+        Answer multiple questions at once.
+
+        Args:
+            answers_dict: dict {question_num: value}
+        """
+        for q_num, value in answers_dict.items():
+            self.answer_question(q_num, value)
+
+    def get_scores(self):
+        """Get all gift scores as dictionary."""
+        return self.scores.copy()
+
+    def get_ranked_results(self):
+        """
+        Get gifts ranked by score (highest first).
+
+        Returns:
+            list of tuples: [(gift, score), ...]
+        """
+        return sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
+
+    def get_top_gift(self):
+        """
+        Get the highest scoring gift.
+
+        Returns:
+            tuple: (gift, score)
+        """
+        return max(self.scores.items(), key=lambda x: x[1])
+
+    def get_top_n_gifts(self, n=3):
+        """
+        Get top N gifts by score.
+
+        Args:
+            n: number of top gifts to return
+
+        Returns:
+            list of tuples: [(gift, score), ...]
+        """
+        return self.get_ranked_results()[:n]
+
+    def get_progress(self):
+        """
+        Get quiz completion progress.
+
+        Returns:
+            dict: {
+                'answered': int,
+                'total': int,
+                'percentage': float
+            }
+        """
+        answered = len(self.answers)
+        total = 45
+        return {
+            "answered": answered,
+            "total": total,
+            "percentage": (answered / total) * 100,
+        }
+
+    def encode_answers(self):
+        """
+        Encode the answers in the compact packed format.
+
+        Layout (19 bytes, base64 encoded to 28 characters):
+            1 byte   format version (PACKED_ANSWERS_VERSION)
+            6 bytes  bitmask of answered questions (bit q-1 = question q)
+            12 bytes 2 bits per question (bits 2(q-1)..2(q-1)+1 = value)
+
+        Returns:
+            str: base64 string
+        """
+        return pack_answers(self.answers)
+
+    @staticmethod
+    def decode_answers(packed):
+        """
+        Decode a string produced by encode_answers().
+
+        Returns:
+            dict: {question_num: value}
+        """
+        return unpack_answers(packed)
+
+    def reset(self):
+        """Reset all answers and scores."""
+        self.answers = {}
+        self.scores = {gift: 0 for gift in self.gifts_config.keys()}
+
+    def validate_config(self):
+        """
+        Validate that gift configuration covers all 45 questions exactly once.
+
+        Returns:
+            dict: validation results
+        """
+        all_questions = []
+        for questions_list in self.gifts_config.values():
+            all_questions.extend(questions_list)
+
+        all_questions_set = set(all_questions)
+        expected_questions = set(range(1, 46))
+
+        return {
+            "valid": all_questions_set == expected_questions,
+            "total_mappings": len(all_questions),
+            "unique_questions": len(all_questions_set),
+            "missing": expected_questions - all_questions_set,
+            "duplicates": len(all_questions) - len(all_questions_set),
+        }
+
+
+# Helper function for batch calculation (if you have all answers)
+def calculate_scores_batch(answers, gifts_config):
+    """
+    Calculate scores directly from complete answers.
+    Use when you have all answers upfront (simpler but less flexible).
+
+    Args:
+        answers: dict {question_num: value}
+        gifts_config: dict {gift: [question_numbers]}
+
+    Returns:
+        dict: {gift: score}
+
+    Time Complexity: O(n) where n = total question mappings (45)
+    """
+    scores = {}
+    for gift, question_list in gifts_config.items():
+        scores[gift] = sum(answers.get(q, 0) for q in question_list)
+    return scores
+
+
+PACKED_ANSWERS_VERSION = 1
+_PACKED_MASK_BYTES = 6  # 45 bits
+_PACKED_VALUE_BYTES = 12  # 90 bits
+
+
+def pack_answers(answers):
+    """
+    Pack a {question_num: value} dict into the versioned base64 format.
+
+    See QuizScorer.encode_answers() for the layout.
+    """
+    mask = 0
+    values = 0
+    for q, value in answers.items():
+        q = int(q) - 1
+        mask |= 1 << q
+        values |= (int(value) & 3) << (2 * q)
+    raw = (
+        bytes([PACKED_ANSWERS_VERSION])
+        + mask.to_bytes(_PACKED_MASK_BYTES, "little")
+        + values.to_bytes(_PACKED_VALUE_BYTES, "little")
+    )
+    return base64.b64encode(raw).decode("ascii")
+
+
+def unpack_answers(packed):
+    """
+    Unpack a string produced by pack_answers().
+
+    Returns:
+        dict: {question_num: value}
+
+    Raises:
+        ValueError: if the format version is unknown
+    """
+    raw = base64.b64decode(packed)
+    if not raw or raw[0] != PACKED_ANSWERS_VERSION:
+        raise ValueError(f"Unknown packed answers version: {raw[:1]!r}")
+    mask = int.from_bytes(raw[1 : 1 + _PACKED_MASK_BYTES], "little")
+    values = int.from_bytes(raw[1 + _PACKED_MASK_BYTES :], "little")
+
+    answers = {}
+    q = 0
+    while mask:
+        if mask & 1:
+            answers[q + 1] = (values >> (2 * q)) & 3
+        mask >>= 1
+        q += 1
+    return answers
+
+
+def expand_packed_answers(record):
+    """
+    Make a stored progress record expose a regular ``answers`` dict.
+
+    Records written in the packed format carry ``answers_packed`` instead of
+    the 45-entry ``answers`` map; older records are returned unchanged.
+    Missing scores are recomputed from the answers.
+
+    Args:
+        record: progress dict as stored (modified in place)
+
+    Returns:
+        the same dict
+    """
+    if record and "answers_packed" in record:
+        record["answers"] = unpack_answers(record.pop("answers_packed"))
+        if "scores" not in record:
+            record["scores"] = calculate_scores_batch(record["answers"], gifts)
+    return record
+
+
+def normalize_username_key(name):
+    """
+    Normalize username to create a safe, consistent key for storage.
+
+    This function:
+    - Converts to lowercase for case-insensitive matching
+    - Removes/replaces special characters that could cause issues
+    - Handles Unicode characters (accents, etc.)
+    - Replaces spaces with underscores
+    - Removes leading/trailing whitespace
+
+    Args:
+        name: Original username string
+
+    Returns:
+        Normalized key string safe for use as document ID or JSON key
+    """
+    if not name:
+        return ""
+
+    # Normalize Unicode characters (e.g., "Maíra" -> "Maira")
+    name = unicodedata.normalize("NFKD", name)
+
+    # Convert to lowercase
+    name = name.lower()
+
+    # Replace spaces with underscores
+    name = name.replace(" ", "_")
+
+    # Remove or replace special characters, keep only alphanumeric and underscores
+    # This ensures Firebase document ID compatibility
+    name = re.sub(r"[^a-z0-9_-]", "", name)
+
+    # Remove multiple consecutive underscores
+    name = re.sub(r"_+", "_", name)
+
+    # Remove leading/trailing underscores
+    name = name.strip("_")
+
+    # Ensure it's not empty (fallback to 'user' if somehow empty)
+    if not name:
+        name = "user"
+
+    return name
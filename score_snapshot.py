@@ -0,0 +1,365 @@
+"""
+Columnar snapshot of the quiz results for analytics.
+
+The reports rebuild Python dicts and lists from JSON or Firestore for every
+question asked. export_snapshot() writes the participants once as columns
+of fixed-size values, in NumPy's .npy format:
+
+    scores.npy        uint8   (N, 9)   gift scores, gifts in GIFT_ORDER
+    answer_mask.npy   uint8   (N, 6)   answered questions, one bit each
+    answer_values.npy uint8   (N, 12)  answer values, two bits each
+    church_ids.npy    uint32  (N,)     index into "churches", or NO_CHURCH
+    completed.npy     uint8   (ceil(N / 8),)  completed flags, one bit each
+                                       (numpy.packbits order)
+    participants.jsonl                 key and display name of each row
+    snapshot.json                      count, gift order, church names, date
+
+The answers use the packed layout of quiz_core.pack_answers() (question
+q is bit q-1 of the mask and bits 2(q-1), 2(q-1)+1 of the values, little
+endian), so they take 18 bytes per participant instead of 45.
+
+The exporter only needs the standard library. Records are streamed into
+the files and the row count is written into the .npy headers at the end.
+ScoreSnapshot opens the files with ``numpy.load(mmap_mode="r")``, so
+opening is instant and the population statistics are vectorized over the
+mapped columns. NumPy is only needed for that part (``pip install numpy``).
+
+Create a snapshot from the same sources as the reports (Firebase, then
+local storage) and print its statistics:
+
+    python score_snapshot.py [directory]
+    python score_snapshot.py --stats [directory]
+"""
+
+import base64
+import json
+import os
+import shutil
+import struct
+import sys
+from datetime import datetime
+
+DEFAULT_SNAPSHOT_DIR = "quiz_snapshot"
+SNAPSHOT_VERSION = 2
+
+GIFT_ORDER = "ABCDEFGHI"
+QUESTIONS = 45
+ANSWER_MISSING = 255
+NO_CHURCH = 0xFFFFFFFF
+
+MASK_BYTES = 6  # 45 bits
+VALUE_BYTES = 12  # 90 bits
+
+# Rows decoded at a time by answer_counts()
+DECODE_CHUNK = 65536
+
+NPY_MAGIC = b"\x93NUMPY\x01\x00"
+# Header padded to a fixed size, so the final shape fits when rewritten
+NPY_HEADER_SIZE = 128
+
+
+def _npy_header(descr, shape):
+    header = repr({"descr": descr, "fortran_order": False, "shape": shape})
+    space = NPY_HEADER_SIZE - len(NPY_MAGIC) - 2 - 1
+    return (
+        NPY_MAGIC
+        + struct.pack("<H", NPY_HEADER_SIZE - len(NPY_MAGIC) - 2)
+        + header.ljust(space).encode("latin1")
+        + b"\n"
+    )
+
+
+class _NpyWriter:
+    """Append rows to a .npy file whose row count is filled in on close."""
+
+    def __init__(self, path, descr, row_shape=()):
+        self.descr = descr
+        self.row_shape = row_shape
+        self.rows = 0
+        self.f = open(path, "wb")
+        self.f.write(_npy_header(descr, (0,) + row_shape))
+
+    def write(self, data, rows=1):
+        self.f.write(data)
+        self.rows += rows
+
+    def close(self):
+        self.f.seek(0)
+        self.f.write(_npy_header(self.descr, (self.rows,) + self.row_shape))
+        self.f.close()
+
+
+def _packed_answers(record):
+    """The mask and value bytes of a record's answers (pack_answers layout)."""
+    if "answers_packed" in record:
+        raw = base64.b64decode(record["answers_packed"])[1:]
+    else:
+        from quiz_core import pack_answers
+
+        answers = {
+            question: value
+            for question, value in (record.get("answers") or {}).items()
+            if 1 <= int(question) <= QUESTIONS and value is not None
+        }
+        raw = base64.b64decode(pack_answers(answers))[1:]
+    return raw[:MASK_BYTES], raw[MASK_BYTES : MASK_BYTES + VALUE_BYTES]
+
+
+def _score_row(scores):
+    scores = scores or {}
+    return bytes(min(255, max(0, int(scores.get(gift, 0)))) for gift in GIFT_ORDER)
+
+
+def export_snapshot(records, directory=DEFAULT_SNAPSHOT_DIR):
+    """
+    Write progress records as a columnar snapshot.
+
+    The snapshot is written next to ``directory`` and then moved into place,
+    so readers never see a half-written one.
+
+    Args:
+        records: iterable of (key, record); records need ``answers`` as a
+            dict (see test.iter_report_records(with_answers=True)) or
+            ``answers_packed``
+        directory: Snapshot directory (replaced if it exists)
+
+    Returns:
+        int: number of participants written
+    """
+    directory = os.path.abspath(directory)
+    building = directory + ".building"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    def path(name):
+        return os.path.join(building, name)
+
+    scores = _NpyWriter(path("scores.npy"), "|u1", (len(GIFT_ORDER),))
+    answer_mask = _NpyWriter(path("answer_mask.npy"), "|u1", (MASK_BYTES,))
+    answer_values = _NpyWriter(path("answer_values.npy"), "|u1", (VALUE_BYTES,))
+    church_ids = _NpyWriter(path("church_ids.npy"), "<u4")
+    completed = _NpyWriter(path("completed.npy"), "|u1")
+    churches = {}
+    bits = 0
+    count = 0
+    try:
+        with open(path("participants.jsonl"), "w", encoding="utf-8") as people:
+            for key, record in records:
+                scores.write(_score_row(record.get("scores")))
+                mask, values = _packed_answers(record)
+                answer_mask.write(mask)
+                answer_values.write(values)
+                church_name = record.get("church_name")
+                if church_name:
+                    church_id = churches.setdefault(church_name, len(churches))
+                else:
+                    church_id = NO_CHURCH
+                church_ids.write(struct.pack("<I", church_id))
+                people.write(
+                    json.dumps(
+                        [key, record.get("display_name", key)], ensure_ascii=False
+                    )
+                    + "\n"
+                )
+
+                # Most significant bit first, like numpy.packbits
+                if record.get("completed", False):
+                    bits |= 0x80 >> (count % 8)
+                count += 1
+                if count % 8 == 0:
+                    completed.write(bytes([bits]))
+                    bits = 0
+            if count % 8:
+                completed.write(bytes([bits]))
+    finally:
+        for writer in (scores, answer_mask, answer_values, church_ids, completed):
+            writer.close()
+
+    with open(path("snapshot.json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {
+                "version": SNAPSHOT_VERSION,
+                "count": count,
+                "gifts": GIFT_ORDER,
+                "churches": list(churches),
+                "created_at": datetime.now().isoformat(),
+            },
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+
+    # Swap the new snapshot in
+    old = directory + ".old"
+    shutil.rmtree(old, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, old)
+    os.rename(building, directory)
+    shutil.rmtree(old, ignore_errors=True)
+    return count
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError(
+            "Snapshot analytics need NumPy: pip install numpy"
+        ) from None
+    return numpy
+
+
+class ScoreSnapshot:
+    """
+    Memory-mapped view of a snapshot written by export_snapshot().
+
+    Attributes:
+        count: number of participants
+        scores: (count, 9) uint8 memmap, columns in GIFT_ORDER
+        answer_mask: (count, 6) uint8 memmap, packed answered bits
+        answer_values: (count, 12) uint8 memmap, packed answer values
+        church_ids: (count,) uint32 memmap
+        churches: church names, indexed by church_ids
+    """
+
+    def __init__(self, directory=DEFAULT_SNAPSHOT_DIR):
+        np = _numpy()
+        self.directory = directory
+        with open(os.path.join(directory, "snapshot.json"), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"Unknown snapshot version: {self.meta.get('version')}")
+        self.count = self.meta["count"]
+        self.gifts = self.meta["gifts"]
+        self.churches = self.meta["churches"]
+
+        def load(name):
+            return np.load(os.path.join(directory, name), mmap_mode="r")
+
+        self.scores = load("scores.npy")
+        self.answer_mask = load("answer_mask.npy")
+        self.answer_values = load("answer_values.npy")
+        self.church_ids = load("church_ids.npy")
+        self._completed_bits = load("completed.npy")
+        self._completed = None
+
+    @property
+    def completed(self):
+        """(count,) bool array of completed quizzes."""
+        if self._completed is None:
+            np = _numpy()
+            self._completed = np.unpackbits(
+                self._completed_bits, count=self.count
+            ).astype(bool)
+        return self._completed
+
+    def decode_answers(self, rows=None):
+        """
+        Unpack answers into a (rows, 45) uint8 array, ANSWER_MISSING if
+        unanswered.
+
+        Args:
+            rows: slice or boolean mask of the rows to decode (default all)
+        """
+        np = _numpy()
+        mask = self.answer_mask if rows is None else self.answer_mask[rows]
+        values = self.answer_values if rows is None else self.answer_values[rows]
+        answered = np.unpackbits(mask, axis=1, bitorder="little")[:, :QUESTIONS]
+        bits = np.unpackbits(values, axis=1, bitorder="little")
+        decoded = (bits[:, 0::2] | (bits[:, 1::2] << 1))[:, :QUESTIONS]
+        return np.where(answered == 1, decoded, ANSWER_MISSING).astype("uint8")
+
+    def mask(self, church_name=None, only_completed=False):
+        """Row selection for a church and/or completed quizzes, or None (all)."""
+        np = _numpy()
+        selected = None
+        if church_name is not None:
+            if church_name in self.churches:
+                church_id = self.churches.index(church_name)
+                selected = np.asarray(self.church_ids) == church_id
+            else:
+                selected = np.zeros(self.count, dtype=bool)
+        if only_completed:
+            selected = (
+                self.completed if selected is None else selected & self.completed
+            )
+        return selected
+
+    def _scores(self, church_name=None, only_completed=False):
+        selected = self.mask(church_name, only_completed)
+        return self.scores if selected is None else self.scores[selected]
+
+    def gift_averages(self, church_name=None, only_completed=False):
+        """Average score per gift: {gift: average}."""
+        scores = self._scores(church_name, only_completed)
+        if not len(scores):
+            return {gift: 0.0 for gift in self.gifts}
+        averages = scores.mean(axis=0, dtype="float64")
+        return dict(zip(self.gifts, averages.tolist()))
+
+    def score_distribution(self, gift, church_name=None, only_completed=False):
+        """How many participants have each score of ``gift``: [count at 0, 1, ...]."""
+        np = _numpy()
+        column = self._scores(church_name, only_completed)[:, self.gifts.index(gift)]
+        return np.bincount(column, minlength=16).tolist()
+
+    def gift_correlations(self, church_name=None, only_completed=False):
+        """Pearson correlation between gift scores: {gift: {gift: r}}."""
+        np = _numpy()
+        scores = self._scores(church_name, only_completed)
+        matrix = np.corrcoef(np.asarray(scores, dtype="float64"), rowvar=False)
+        return {
+            a: {b: float(matrix[i, j]) for j, b in enumerate(self.gifts)}
+            for i, a in enumerate(self.gifts)
+        }
+
+    def answer_counts(self, church_name=None, only_completed=False):
+        """Per question, how many chose each answer: (45, 4) array."""
+        np = _numpy()
+        selected = self.mask(church_name, only_completed)
+        counts = np.zeros((QUESTIONS, 4), dtype="int64")
+        # Decoded in chunks so memory stays bounded on large snapshots
+        for start in range(0, self.count, DECODE_CHUNK):
+            rows = slice(start, start + DECODE_CHUNK)
+            answers = self.decode_answers(rows)
+            if selected is not None:
+                answers = answers[selected[rows]]
+            for value in range(4):
+                counts[:, value] += (answers == value).sum(axis=0)
+        return counts
+
+
+def print_snapshot_stats(directory=DEFAULT_SNAPSHOT_DIR):
+    """Print the population statistics of a snapshot."""
+    from quiz_core import gift_names
+
+    snapshot = ScoreSnapshot(directory)
+    print("\n" + "=" * 80)
+    print("📈 ESTATÍSTICAS DO SNAPSHOT")
+    print("=" * 80)
+    print(f"\nParticipantes: {snapshot.count}")
+    print(f"Questionários completos: {int(snapshot.completed.sum())}")
+    print(f"Igrejas: {len(snapshot.churches)}\n")
+    print(f"{'Dom':<20} {'Média':<10} {'Distribuição (0-15)'}")
+    print("─" * 80)
+    for gift, average in snapshot.gift_averages().items():
+        distribution = snapshot.score_distribution(gift)
+        print(
+            f"{gift_names.get(gift, gift):<20} {average:<10.1f} "
+            f"{' '.join(str(n) for n in distribution)}"
+        )
+    print("\n" + "=" * 80 + "\n")
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+    target = args[0] if args else DEFAULT_SNAPSHOT_DIR
+
+    if "--stats" in sys.argv:
+        print_snapshot_stats(target)
+    else:
+        from test import init_firebase, iter_report_records
+
+        init_firebase()
+        written = export_snapshot(iter_report_records(with_answers=True), target)
+        print(f"✅ Snapshot of {written} participants written to {target}")
@@ -0,0 +1,136 @@
+"""
+Per-user sharded file layout for the local progress fallback.
+
+Used when ``QUIZ_STORAGE_BACKEND=sharded``. Every participant lives in a
+small JSON file of its own::
+
+    quiz_progress_shards/<first 2 hex chars of sha1(key)>/<key>.json
+
+Saves write a temporary file and atomically rename it into place, so a save
+or load only touches the user's own file and concurrent sessions never
+overwrite each other's progress. Reports walk the shard directories.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from urllib.parse import quote, unquote
+
+DEFAULT_SHARD_DIR = "quiz_progress_shards"
+
+
+class ShardStore:
+    """
+    One JSON file per progress key, spread over 256 subdirectories.
+    """
+
+    def __init__(self, root=DEFAULT_SHARD_DIR):
+        self.root = root
+
+    def path_for(self, key):
+        """Return the file path holding ``key``."""
+        prefix = hashlib.sha1(key.encode("utf-8")).hexdigest()[:2]
+        # Legacy keys are raw names, so escape anything unsafe in a filename
+        return os.path.join(self.root, prefix, quote(key, safe="") + ".json")
+
+    def get(self, key):
+        """Return the record stored under ``key``, or None."""
+        try:
+            with open(self.path_for(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (json.JSONDecodeError, IOError):
+            return None
+
+    def put(self, key, record):
+        """Atomically replace the record stored under ``key``."""
+        path = self.path_for(key)
+        shard_dir = os.path.dirname(path)
+        os.makedirs(shard_dir, exist_ok=True)
+        # A unique temporary file: sessions are threads of one process
+        fd, tmp_path = tempfile.mkstemp(dir=shard_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+    def delete(self, key):
+        """Remove the record stored under ``key``."""
+        try:
+            os.remove(self.path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def write_many(self, items):
+        """
+        Apply several writes.
+
+        Args:
+            items: iterable of (key, record); a record of None deletes the key
+        """
+        for key, record in items:
+            if record is None:
+                self.delete(key)
+            else:
+                self.put(key, record)
+
+    def exists(self):
+        """Return True if the shard directory exists."""
+        return os.path.isdir(self.root)
+
+    def iter_records(self):
+        """Yield (key, record) for every shard file."""
+        if not self.exists():
+            return
+        for prefix in sorted(os.listdir(self.root)):
+            shard_dir = os.path.join(self.root, prefix)
+            if not os.path.isdir(shard_dir):
+                continue
+            for filename in sorted(os.listdir(shard_dir)):
+                if not filename.endswith(".json"):
+                    continue
+                try:
+                    with open(
+                        os.path.join(shard_dir, filename), "r", encoding="utf-8"
+                    ) as f:
+                        record = json.load(f)
+                except (json.JSONDecodeError, IOError):
+                    continue
+                yield unquote(filename[: -len(".json")]), record
+
+
+def convert_monolithic(filename="quiz_progress.json", root=DEFAULT_SHARD_DIR):
+    """
+    Split an existing monolithic progress file into per-user shards.
+
+    Pending journal records (progress_journal.py) are included.
+
+    Returns:
+        int: number of records written
+    """
+    from progress_journal import load_all_records
+
+    data = load_all_records(filename) or {}
+    store = ShardStore(root)
+    for key, record in data.items():
+        store.put(key, record)
+    return len(data)
+
+
+if __name__ == "__main__":
+    # Usage: python shard_store.py [quiz_progress.json] [quiz_progress_shards]
+    source = sys.argv[1] if len(sys.argv) > 1 else "quiz_progress.json"
+    target = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_SHARD_DIR
+    count = convert_monolithic(source, target)
+    print(f"✅ Converted {count} participants from {source} into {target}/")
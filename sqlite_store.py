@@ -0,0 +1,279 @@
+"""
+SQLite storage backend for quiz progress and the church registry.
+
+Used instead of the JSON files when ``QUIZ_STORAGE_BACKEND=sqlite``. The
+database runs in WAL mode so many Streamlit sessions in one server process
+(and the CLI) can read while another session writes, and every save is a
+single-row upsert instead of a whole-file rewrite. Progress rows are keyed
+by ``normalize_username_key`` output and indexed on church, completed and
+last_updated so point lookups and church-filtered reports are index seeks.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+DEFAULT_DB_PATH = "quiz_progress.db"
+
+# Gift letters, for the per-gift score sums in stats()
+GIFT_ORDER = "ABCDEFGHI"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quiz_progress (
+    key TEXT PRIMARY KEY,
+    display_name TEXT NOT NULL,
+    church_name TEXT,
+    answers TEXT NOT NULL,
+    answers_packed TEXT,
+    scores TEXT NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    last_updated TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_progress_church ON quiz_progress (church_name);
+CREATE INDEX IF NOT EXISTS idx_progress_completed ON quiz_progress (completed);
+CREATE INDEX IF NOT EXISTS idx_progress_last_updated ON quiz_progress (last_updated);
+
+CREATE TABLE IF NOT EXISTS churches (
+    key TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TEXT
+);
+"""
+
+
+class SQLiteStore:
+    """
+    Progress and church storage in a single SQLite database.
+
+    Each thread gets its own connection; SQLite serializes writers itself
+    and WAL mode lets readers proceed during a write.
+    """
+
+    def __init__(self, path=DEFAULT_DB_PATH):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # Databases created before the packed answers format
+            columns = {
+                row["name"] for row in conn.execute("PRAGMA table_info(quiz_progress)")
+            }
+            if "answers_packed" not in columns:
+                conn.execute("ALTER TABLE quiz_progress ADD COLUMN answers_packed TEXT")
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Progress
+    # ------------------------------------------------------------------
+
+    def _row_to_record(self, row):
+        record = {
+            "display_name": row["display_name"],
+            "scores": json.loads(row["scores"]),
+            "last_updated": row["last_updated"],
+            "completed": bool(row["completed"]),
+        }
+        if row["answers_packed"]:
+            record["answers_packed"] = row["answers_packed"]
+        else:
+            record["answers"] = json.loads(row["answers"])
+        if row["church_name"]:
+            record["church_name"] = row["church_name"]
+        return record
+
+    def _upsert(self, conn, key, record):
+        conn.execute(
+            """
+            INSERT INTO quiz_progress
+                (key, display_name, church_name, answers, answers_packed,
+                 scores, completed, last_updated)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (key) DO UPDATE SET
+                display_name = excluded.display_name,
+                church_name = excluded.church_name,
+                answers = excluded.answers,
+                answers_packed = excluded.answers_packed,
+                scores = excluded.scores,
+                completed = excluded.completed,
+                last_updated = excluded.last_updated
+            """,
+            (
+                key,
+                record.get("display_name", key),
+                record.get("church_name"),
+                json.dumps({str(k): v for k, v in record.get("answers", {}).items()}),
+                record.get("answers_packed"),
+                json.dumps(record.get("scores", {}), ensure_ascii=False),
+                1 if record.get("completed") else 0,
+                record.get("last_updated"),
+            ),
+        )
+
+    def put(self, key, record):
+        """Insert or replace the progress row for ``key``."""
+        self.write_many([(key, record)])
+
+    def write_many(self, items):
+        """
+        Apply several upserts/deletes in one transaction.
+
+        Args:
+            items: iterable of (key, record); a record of None deletes the key
+        """
+        with self._connect() as conn:
+            for key, record in items:
+                if record is None:
+                    conn.execute("DELETE FROM quiz_progress WHERE key = ?", (key,))
+                else:
+                    self._upsert(conn, key, record)
+
+    def delete(self, key):
+        """Delete the progress row for ``key``."""
+        self.write_many([(key, None)])
+
+    def get(self, key):
+        """Return the progress record for ``key``, or None."""
+        row = (
+            self._connect()
+            .execute("SELECT * FROM quiz_progress WHERE key = ?", (key,))
+            .fetchone()
+        )
+        return self._row_to_record(row) if row else None
+
+    def iter_records(self, church_name=None, only_completed=False):
+        """
+        Yield (key, record) pairs, filtered through the indexes.
+
+        Args:
+            church_name: Only participants from this church
+            only_completed: Only completed quizzes
+        """
+        where, params = self._where(church_name, only_completed)
+        query = "SELECT * FROM quiz_progress" + where
+        for row in self._connect().execute(query, params):
+            yield row["key"], self._row_to_record(row)
+
+    @staticmethod
+    def _where(church_name=None, only_completed=False):
+        """Return the WHERE clause and parameters for the report filters."""
+        clauses, params = [], []
+        if church_name is not None:
+            clauses.append("church_name = ?")
+            params.append(church_name)
+        if only_completed:
+            clauses.append("completed = 1")
+        if not clauses:
+            return "", params
+        return " WHERE " + " AND ".join(clauses), params
+
+    def stats(self, church_name=None, only_completed=False):
+        """
+        Count participants and sum each gift score in SQL.
+
+        Returns:
+            tuple: (count, completed count, {gift: total score})
+        """
+        where, params = self._where(church_name, only_completed)
+        sums = ", ".join(
+            f"COALESCE(SUM(json_extract(scores, '$.{gift}')), 0)"
+            for gift in GIFT_ORDER
+        )
+        row = (
+            self._connect()
+            .execute(
+                f"SELECT COUNT(*), COALESCE(SUM(completed), 0), {sums} "
+                f"FROM quiz_progress{where}",
+                params,
+            )
+            .fetchone()
+        )
+        return row[0], row[1], dict(zip(GIFT_ORDER, row[2:]))
+
+    def load_all(self, church_name=None, only_completed=False):
+        """Return matching records as {key: record}."""
+        return dict(self.iter_records(church_name, only_completed))
+
+    # ------------------------------------------------------------------
+    # Churches
+    # ------------------------------------------------------------------
+
+    def get_churches(self):
+        """Return all church names, sorted."""
+        rows = self._connect().execute("SELECT name FROM churches ORDER BY name")
+        return [row["name"] for row in rows]
+
+    def add_church(self, church_name):
+        """
+        Add a church if its lowercase name is not registered yet.
+
+        Returns:
+            bool: True if the church was inserted
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO churches (key, name, created_at) VALUES (?, ?, ?)",
+                (church_name.lower().strip(), church_name, datetime.now().isoformat()),
+            )
+            return cursor.rowcount > 0
+
+    def import_json(self, progress_data=None, churches=None):
+        """
+        Bulk-load existing JSON data into the database.
+
+        Args:
+            progress_data: {key: record} as stored in quiz_progress.json
+            churches: list of church names as stored in churches.json
+        """
+        self.write_many((progress_data or {}).items())
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO churches (key, name, created_at) VALUES (?, ?, ?)",
+                [
+                    (name.lower().strip(), name, datetime.now().isoformat())
+                    for name in churches or []
+                ],
+            )
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_sqlite_store(path=None):
+    """Get the shared SQLiteStore for ``path`` (one per process)."""
+    path = os.path.abspath(path or os.environ.get("QUIZ_SQLITE_PATH", DEFAULT_DB_PATH))
+    with _stores_lock:
+        store = _stores.get(path)
+        if store is None:
+            store = SQLiteStore(path)
+            _stores[path] = store
+        return store
+
+
+if __name__ == "__main__":
+    # Import the existing JSON files into the database:
+    #   QUIZ_SQLITE_PATH=quiz_progress.db python sqlite_store.py
+    from progress_journal import load_all_records
+
+    store = get_sqlite_store()
+    progress = load_all_records("quiz_progress.json") or {}
+    churches = []
+    if os.path.exists("churches.json"):
+        with open("churches.json", "r", encoding="utf-8") as f:
+            churches = json.load(f).get("churches", [])
+    store.import_json(progress, churches)
+    print(
+        f"✅ Imported {len(progress)} participants and {len(churches)} churches "
+        f"into {store.path}"
+    )
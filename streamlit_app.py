@@ -1,66 +1,40 @@
+import copy
 import json
 import os
-import re
-import unicodedata
 from datetime import datetime
 
 import streamlit as st
 
-from test import QuizScorer, gifts
+from church_registry import add_to_manifest, church_cache, read_manifest
+from firebase_access import firestore_call
+from firebase_client import get_firestore_client
+from firebase_outbox import enqueue_write, start_reconciler
+from key_migration import legacy_keys
+from leaderboard import record_result
+from local_storage import load_record, save_record, use_sqlite
+from progress_layout import (
+    FLAT_COLLECTION,
+    church_doc_id,
+    partitioned,
+    progress_cache_key,
+    progress_collection,
+    progress_collection_path,
+    remember_flat_document,
+    take_flat_document,
+)
+from quiz_core import QuizScorer, expand_packed_answers, gifts, normalize_username_key
 from translations import LANGUAGES, get_gift_name, get_question, get_translations
+from ttl_cache import MISSING, TTLCache
+from write_behind import WriteBehindSaver
 
-# Firebase setup
-try:
-    import firebase_admin
-    from firebase_admin import credentials, firestore
-
-    # Initialize Firebase (only once)
-    if not firebase_admin._apps:
-        # Try to get credentials from Streamlit secrets
-        if "firebase" in st.secrets:
-            # Convert secrets to proper dict format for Firebase
-            # Explicitly convert to string to ensure compatibility
-            cred_dict = {
-                "type": str(st.secrets["firebase"]["type"]),
-                "project_id": str(st.secrets["firebase"]["project_id"]),
-                "private_key_id": str(st.secrets["firebase"]["private_key_id"]),
-                "private_key": str(st.secrets["firebase"]["private_key"]),
-                "client_email": str(st.secrets["firebase"]["client_email"]),
-                "client_id": str(st.secrets["firebase"]["client_id"]),
-                "auth_uri": str(st.secrets["firebase"]["auth_uri"]),
-                "token_uri": str(st.secrets["firebase"]["token_uri"]),
-                "auth_provider_x509_cert_url": str(
-                    st.secrets["firebase"]["auth_provider_x509_cert_url"]
-                ),
-                "client_x509_cert_url": str(
-                    st.secrets["firebase"]["client_x509_cert_url"]
-                ),
-            }
-            # Add optional fields if present
-            if "universe_domain" in st.secrets["firebase"]:
-                cred_dict["universe_domain"] = str(
-                    st.secrets["firebase"]["universe_domain"]
-                )
-
-            cred = credentials.Certificate(cred_dict)
-            firebase_admin.initialize_app(cred)
-            db = firestore.client()
-            FIREBASE_ENABLED = True
-            print("✅ Firebase initialized successfully!")
-        else:
-            FIREBASE_ENABLED = False
-            db = None
-            print("ℹ️ Firebase secrets not configured, using JSON fallback")
-    else:
-        db = firestore.client()
-        FIREBASE_ENABLED = True
-except Exception as e:
-    FIREBASE_ENABLED = False
-    db = None
-    print(f"⚠️ Firebase initialization failed: {e}")
-    import traceback
+# Firebase setup: created once per process and shared by all sessions
+# (see firebase_client.py), so reruns do no initialization work
+db = get_firestore_client()
+FIREBASE_ENABLED = db is not None
 
-    traceback.print_exc()
+# Drain Firestore writes that failed earlier (see firebase_outbox.py)
+if FIREBASE_ENABLED and db:
+    start_reconciler(lambda: db)
 
 # Initialize session state
 if "user_name" not in st.session_state:
@@ -108,65 +82,128 @@ with st.sidebar:
         st.rerun()
 
 
-def normalize_username_key(name):
+def progress_delta(persisted, normalized_key, name, scorer, church_name=None):
     """
-    Normalize username to create a safe, consistent key for storage.
-
-    This function:
-    - Converts to lowercase for case-insensitive matching
-    - Removes/replaces special characters that could cause issues
-    - Handles Unicode characters (accents, etc.)
-    - Replaces spaces with underscores
-    - Removes leading/trailing whitespace
+    Compute the Firestore field updates since the last persisted state.
 
     Args:
-        name: Original username string
+        persisted: Per-session view of the last persisted progress (or None)
+        normalized_key: Document ID being saved
+        name: Original display name
+        scorer: QuizScorer with the current progress
+        church_name: Current church name
 
     Returns:
-        Normalized key string safe for use as document ID or JSON key
+        dict of field paths -> values ({} when nothing changed), or
+        None when a full document write is needed (first save in this
+        session, another user/document, a church change that moves the
+        document to another partition, or answers were reset)
     """
-    if not name:
-        return ""
+    key = progress_cache_key(normalized_key, church_name)
+    if not persisted or persisted.get("key") != key:
+        return None
 
-    # Normalize Unicode characters (e.g., "Maíra" -> "Maira")
-    name = unicodedata.normalize("NFKD", name)
+    old_answers = persisted["answers"]
+    # A restarted quiz drops answers; a field update can't express that
+    if any(q not in scorer.answers for q in old_answers):
+        return None
+
+    changes = {}
+    if any(old_answers.get(q) != value for q, value in scorer.answers.items()):
+        # The whole answer sheet is one short packed string
+        changes["answers_packed"] = scorer.encode_answers()
+    for gift, score in scorer.scores.items():
+        if persisted["scores"].get(gift) != score:
+            changes[f"scores.{gift}"] = score
+
+    completed = len(scorer.answers) == 45
+    if persisted["completed"] != completed:
+        changes["completed"] = completed
+    if church_name and persisted["church_name"] != church_name:
+        changes["church_name"] = church_name
+    if persisted["display_name"] != name:
+        changes["display_name"] = name
+    return changes
+
+
+def remember_persisted(persisted, normalized_key, name, scorer, church_name=None):
+    """Record what was just written in the per-session persisted view."""
+    if persisted is None:
+        return
+    persisted.update(
+        {
+            # Scoped by church in the partitioned layout, like the document
+            "key": progress_cache_key(normalized_key, church_name),
+            "display_name": name,
+            "answers": dict(scorer.answers),
+            "scores": dict(scorer.scores),
+            "completed": len(scorer.answers) == 45,
+            "church_name": church_name or persisted.get("church_name"),
+        }
+    )
 
-    # Convert to lowercase
-    name = name.lower()
 
-    # Replace spaces with underscores
-    name = name.replace(" ", "_")
+@st.cache_resource
+def get_shared_progress_cache():
+    """
+    Process-wide LRU of loaded progress shared by all sessions.
 
-    # Remove or replace special characters, keep only alphanumeric and underscores
-    # This ensures Firebase document ID compatibility
-    name = re.sub(r"[^a-z0-9_-]", "", name)
+    Disabled unless QUIZ_PROGRESS_CACHE_TTL (seconds) is set, since other
+    processes (the CLI, other servers) may write the same records.
+    """
+    return TTLCache(
+        maxsize=int(os.environ.get("QUIZ_PROGRESS_CACHE_SIZE", 1024)),
+        ttl=float(os.environ.get("QUIZ_PROGRESS_CACHE_TTL", 0)),
+    )
 
-    # Remove multiple consecutive underscores
-    name = re.sub(r"_+", "_", name)
 
-    # Remove leading/trailing underscores
-    name = name.strip("_")
+def get_session_progress_cache():
+    """Get this session's read-through cache of progress by normalized key."""
+    if "progress_cache" not in st.session_state:
+        st.session_state.progress_cache = {}
+    return st.session_state.progress_cache
 
-    # Ensure it's not empty (fallback to 'user' if somehow empty)
-    if not name:
-        name = "user"
 
-    return name
+def cache_progress(normalized_key, data, session_cache=None, shared_cache=None):
+    """Store loaded (or just saved) progress in the read-through caches."""
+    data = copy.deepcopy(data)
+    if session_cache is not None:
+        session_cache[normalized_key] = data
+    if shared_cache is not None:
+        shared_cache.set(normalized_key, data)
 
 
-def save_progress_web(name, scorer, church_name=None, filename="quiz_progress.json"):
+def save_progress_web(
+    name,
+    scorer,
+    church_name=None,
+    filename="quiz_progress.json",
+    persisted=None,
+    session_cache=None,
+    shared_cache=None,
+):
     """
     Save user progress to Firebase or JSON file as fallback.
 
     Uses normalized username as key for consistency and safety.
     Stores original display name in the data for backward compatibility.
+
+    Answers are stored in the packed format (QuizScorer.encode_answers());
+    loads also accept the older 45-entry ``answers`` map.
+
+    When ``persisted`` (a per-session dict) is given, Firebase saves after
+    the first one only send the changed answers, score and metadata fields
+    through update(), and saves with no changes are skipped entirely.
+
+    The read-through caches used by load_progress_web are updated so later
+    loads in the session don't go back to storage.
     """
     # Normalize the username to create a safe key
     normalized_key = normalize_username_key(name)
 
     progress_data = {
         "display_name": name,  # Store original name for display
-        "answers": scorer.answers,
+        "answers_packed": scorer.encode_answers(),
         "scores": scorer.scores,
         "last_updated": datetime.now().isoformat(),
         "completed": len(scorer.answers) == 45,
@@ -176,80 +213,254 @@ def save_progress_web(name, scorer, church_name=None, filename="quiz_progress.js
     if church_name:
         progress_data["church_name"] = church_name
 
+    # Keep the read-through caches current (write-through)
+    loaded_form = dict(progress_data, answers=dict(scorer.answers))
+    del loaded_form["answers_packed"]
+    cache_key = progress_cache_key(normalized_key, church_name)
+    cache_progress(cache_key, loaded_form, session_cache, shared_cache)
+
     # Try Firebase first
     if FIREBASE_ENABLED and db:
         try:
-            # Convert integer keys to strings for Firestore compatibility
-            firebase_data = {
-                "display_name": name,  # Store original name for display
-                "answers": {str(k): v for k, v in scorer.answers.items()},
-                "scores": scorer.scores,
-                "last_updated": datetime.now().isoformat(),
-                "completed": len(scorer.answers) == 45,
-            }
-            if church_name:
-                firebase_data["church_name"] = church_name
-
-            # Check if old document exists with original name (for migration)
-            if name != normalized_key:
-                old_doc = db.collection("quiz_progress").document(name).get()
+            # quiz_progress/{user}, or churches/{id}/progress/{user}
+            # (see progress_layout.py)
+            collection = progress_collection(db, church_name)
+            doc_ref = collection.document(normalized_key)
+
+            # Delta write: only the fields that changed since the last save
+            changes = None
+            if persisted and persisted.get("backend") == "firebase":
+                changes = progress_delta(
+                    persisted, normalized_key, name, scorer, church_name
+                )
+            if changes is not None:
+                if not changes:
+                    print(f"⏭️  No changes to save for {name}")
+                    return
+                changes["last_updated"] = progress_data["last_updated"]
+                firestore_call(doc_ref.update, changes)
+                previous_church = persisted.get("church_name")
+                remember_persisted(persisted, normalized_key, name, scorer, church_name)
+                # A church change moves the entry between church boards
+                ranked = (
+                    "completed" in changes
+                    or "church_name" in changes
+                    or any(field.startswith("scores.") for field in changes)
+                )
+                if progress_data["completed"] and ranked:
+                    update_gift_leaderboards(
+                        normalized_key, name, scorer, church_name, previous_church
+                    )
+                print(
+                    f"✅ Progress saved to Firebase for {name} "
+                    f"({len(changes)} fields updated)"
+                )
+                return
+
+            firebase_data = dict(progress_data)
+            # A retake of a completed quiz starts here (see get_progress_saver)
+            leaves_boards = bool(persisted and persisted.get("on_leaderboard"))
+
+            # A church change in the partitioned layout moves the document
+            moved_from = None
+            if persisted and persisted.get("backend") == "firebase":
+                old_church = persisted.get("church_name")
+                old_key = progress_cache_key(normalized_key, old_church)
+                if old_church and old_key == persisted["key"] != cache_key:
+                    moved_from = old_church
+                    leaves_boards = leaves_boards or persisted["completed"]
+
+            # Check if old document exists with original name (for migration).
+            # The registry limits this probe to once per user per process and
+            # skips it once migrate_firebase_keys.py has completed.
+            if legacy_keys.needs_probe(db, name, normalized_key):
+                old_ref = db.collection(FLAT_COLLECTION).document(name)
+                old_doc = firestore_call(old_ref.get)
                 if old_doc.exists:
                     # Migrate: delete old document after saving new one
                     print(
                         f"🔄 Migrating Firebase data from '{name}' to '{normalized_key}'"
                     )
                     # Delete old document
-                    db.collection("quiz_progress").document(name).delete()
+                    firestore_call(old_ref.delete)
                     print(f"🗑️  Deleted old Firebase document '{name}'")
+                legacy_keys.removed_legacy(name)
 
             # Use normalized key as document ID
-            db.collection("quiz_progress").document(normalized_key).set(firebase_data)
+            firestore_call(doc_ref.set, firebase_data)
+            if partitioned() and church_name and take_flat_document(normalized_key):
+                # Progress moved into the church partition
+                flat_ref = db.collection(FLAT_COLLECTION).document(normalized_key)
+                firestore_call(flat_ref.delete)
+                print(f"🗑️  Moved '{normalized_key}' out of {FLAT_COLLECTION}")
+            if moved_from:
+                old_ref = progress_collection(db, moved_from).document(normalized_key)
+                firestore_call(old_ref.delete)
+                print(f"🗑️  Moved '{normalized_key}' out of church '{moved_from}'")
+                if leaves_boards:
+                    # Ranked under the old church's key
+                    update_gift_leaderboards(
+                        normalized_key, name, None, moved_from, remove=True
+                    )
+                    leaves_boards = False
+            if persisted is not None:
+                persisted.clear()
+                persisted["backend"] = "firebase"
+                remember_persisted(persisted, normalized_key, name, scorer, church_name)
             print(f"✅ Progress saved to Firebase for {name} (key: {normalized_key})")
+            if progress_data["completed"]:
+                update_gift_leaderboards(normalized_key, name, scorer, church_name)
+            elif leaves_boards:
+                # The boards only rank completed quizzes
+                update_gift_leaderboards(
+                    normalized_key, name, None, church_name, remove=True
+                )
             return
         except Exception as e:
             print(f"⚠️ Firebase save failed: {e}, falling back to JSON")
+            # Keep the write so the reconciler can send it to Firestore later
+            enqueue_write(
+                progress_collection_path(church_name), normalized_key, progress_data
+            )
 
-    # Fallback to JSON file
-    data = {}
-    if os.path.exists(filename):
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            data = {}
+    # Skip local writes that would not change anything
+    if persisted and persisted.get("backend") == "local":
+        if progress_delta(persisted, normalized_key, name, scorer, church_name) == {}:
+            print(f"⏭️  No changes to save for {name}")
+            return
 
-    # Use normalized key, but also check for backward compatibility
-    # If old key exists, migrate it
-    if name in data and name != normalized_key:
-        # Migrate old data to new normalized key
-        old_data = data.pop(name)
-        if "display_name" not in old_data:
-            old_data["display_name"] = name
-        data[normalized_key] = old_data
-        print(f"🔄 Migrated data from '{name}' to '{normalized_key}'")
+    # Fallback to local storage (journaled JSON file or SQLite)
+    save_record(name, normalized_key, progress_data, filename, background=True)
+    if persisted is not None:
+        persisted.clear()
+        persisted["backend"] = "local"
+        remember_persisted(persisted, normalized_key, name, scorer, church_name)
 
-    data[normalized_key] = progress_data
 
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def update_gift_leaderboards(
+    normalized_key, name, scorer, church_name=None, previous_church=None, remove=False
+):
+    """
+    Put a completed (or retaken) quiz on the materialized gift leaderboards,
+    or take it off them when a retake starts (``remove``).
 
+    A failure marks the boards stale, so top-N queries scan until
+    migrate_leaderboards.py rebuilds them; the progress itself is saved.
+    """
+    try:
+        record_result(
+            db,
+            progress_cache_key(normalized_key, church_name),
+            normalized_key,
+            name,
+            None if remove else dict(scorer.scores),
+            church_name,
+            previous_church,
+        )
+    except Exception as e:
+        print(f"⚠️ Leaderboard update failed for {name}: {e}")
+
+
+def get_progress_saver():
+    """
+    Get this session's write-behind saver.
 
-def load_progress_web(name, filename="quiz_progress.json"):
+    Answers are handed to the saver and persisted by a background thread, so
+    "Next" doesn't wait for the Firestore round-trip.
+    """
+    if "progress_saver" not in st.session_state:
+        # Last persisted state of this session, used for delta writes. A
+        # completed quiz being retaken is still on the leaderboards until
+        # the first save
+        persisted = {
+            "on_leaderboard": bool(st.session_state.get("has_completed", False))
+        }
+        # Captured here: the worker thread can't use st.session_state
+        session_cache = get_session_progress_cache()
+        shared_cache = get_shared_progress_cache()
+
+        def save(name, scorer, church_name=None):
+            save_progress_web(
+                name,
+                scorer,
+                church_name,
+                persisted=persisted,
+                session_cache=session_cache,
+                shared_cache=shared_cache,
+            )
+
+        st.session_state.progress_saver = WriteBehindSaver(save)
+    return st.session_state.progress_saver
+
+
+def load_progress_web(
+    name,
+    filename="quiz_progress.json",
+    session_cache=None,
+    shared_cache=None,
+    church_name=None,
+):
     """
     Load user progress from Firebase or JSON file as fallback.
 
     Tries normalized key first, then falls back to original name for backward compatibility.
+
+    With ``session_cache`` (and optionally the process-wide ``shared_cache``)
+    the result, including "not found", is cached by normalized key, so the
+    onboarding steps read storage at most once per user.
+
+    In the church-partitioned Firebase layout the participant's church is
+    part of the key; without it only local storage is checked.
     """
     # Normalize the username to create a safe key
     normalized_key = normalize_username_key(name)
+    cache_key = progress_cache_key(normalized_key, church_name)
+
+    if session_cache is not None and cache_key in session_cache:
+        return copy.deepcopy(session_cache[cache_key])
+    if shared_cache is not None:
+        data = shared_cache.get(cache_key)
+        if data is not MISSING:
+            cache_progress(cache_key, data, session_cache)
+            return copy.deepcopy(data)
+
+    data = read_progress(name, normalized_key, filename, church_name)
+    cache_progress(cache_key, data, session_cache, shared_cache)
+    return data
+
+
+def load_session_progress(name, church_name=None):
+    """load_progress_web through this session's and the shared cache."""
+    return load_progress_web(
+        name,
+        session_cache=get_session_progress_cache(),
+        shared_cache=get_shared_progress_cache(),
+        church_name=church_name,
+    )
 
-    # Try Firebase first
-    if FIREBASE_ENABLED and db:
+
+def read_progress(
+    name, normalized_key, filename="quiz_progress.json", church_name=None
+):
+    """Read progress from storage, without caching."""
+    # Try Firebase first (a partitioned layout needs the church)
+    if FIREBASE_ENABLED and db and (church_name or not partitioned()):
         try:
             # Try normalized key first
-            doc = db.collection("quiz_progress").document(normalized_key).get()
+            doc_ref = progress_collection(db, church_name).document(normalized_key)
+            doc = firestore_call(doc_ref.get)
+            if not doc.exists and partitioned():
+                # Not migrated yet: use the flat document if it is this church's
+                flat_doc = firestore_call(
+                    db.collection(FLAT_COLLECTION).document(normalized_key).get
+                )
+                if flat_doc.exists and flat_doc.to_dict().get(
+                    "church_name", church_name
+                ) == church_name:
+                    remember_flat_document(normalized_key)
+                    doc = flat_doc
             if doc.exists:
-                data = doc.to_dict()
+                data = expand_packed_answers(doc.to_dict())
                 # Convert string keys back to integers for answers
                 if "answers" in data and isinstance(data["answers"], dict):
                     data["answers"] = {int(k): v for k, v in data["answers"].items()}
@@ -258,10 +469,12 @@ def load_progress_web(name, filename="quiz_progress.json"):
                 )
                 return data
             # Fallback: try original name for backward compatibility
-            if name != normalized_key:
-                doc = db.collection("quiz_progress").document(name).get()
+            if legacy_keys.needs_probe(db, name, normalized_key):
+                doc = firestore_call(db.collection(FLAT_COLLECTION).document(name).get)
                 if doc.exists:
-                    data = doc.to_dict()
+                    # Let the next save migrate it
+                    legacy_keys.found_legacy(name)
+                    data = expand_packed_answers(doc.to_dict())
                     if "answers" in data and isinstance(data["answers"], dict):
                         data["answers"] = {
                             int(k): v for k, v in data["answers"].items()
@@ -271,31 +484,37 @@ def load_progress_web(name, filename="quiz_progress.json"):
         except Exception as e:
             print(f"⚠️ Firebase load failed: {e}, falling back to JSON")
 
-    # Fallback to JSON file
-    if not os.path.exists(filename):
-        return None
-
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Try normalized key first
-            if normalized_key in data:
-                return data[normalized_key]
-            # Fallback: try original name for backward compatibility
-            if name in data:
-                return data[name]
-            return None
-    except (json.JSONDecodeError, IOError):
-        return None
+    # Fallback to local storage (journaled JSON file or SQLite)
+    return expand_packed_answers(load_record(name, normalized_key, filename))
 
 
 def get_churches_list(filename="churches.json"):
-    """Get list of all churches from Firebase or JSON file as fallback."""
+    """
+    Get the sorted list of all churches.
+
+    Served from the process-wide cache in church_registry.py, which reloads
+    it with load_churches_list() at most once per TTL.
+    """
+    return church_cache.get(lambda: load_churches_list(filename))
+
+
+def get_church_index(filename="churches.json"):
+    """Get the search index over the cached church list (church_registry.py)."""
+    return church_cache.index(lambda: load_churches_list(filename))
+
+
+def load_churches_list(filename="churches.json"):
+    """Load list of all churches from Firebase or JSON file as fallback."""
     # Try Firebase first
     if FIREBASE_ENABLED and db:
         try:
+            # One read from the manifest (see church_registry.py)
+            churches = read_manifest(db)
+            if churches is not None:
+                print(f"✅ Loaded {len(churches)} churches from the manifest")
+                return churches
             churches_ref = db.collection("churches")
-            docs = churches_ref.stream()
+            docs = firestore_call(churches_ref.stream)
             churches = []
             for doc in docs:
                 data = doc.to_dict()
@@ -307,6 +526,12 @@ def get_churches_list(filename="churches.json"):
         except Exception as e:
             print(f"⚠️ Firebase load failed: {e}, falling back to JSON")
 
+    # Fallback to SQLite if configured
+    if use_sqlite():
+        from sqlite_store import get_sqlite_store
+
+        return get_sqlite_store().get_churches()
+
     # Fallback to JSON file
     if not os.path.exists(filename):
         return []
@@ -326,18 +551,40 @@ def add_church(church_name, filename="churches.json"):
     if not church_name:
         return False
 
+    # Same name up to accents, case, spacing and punctuation: don't add it again
+    index = get_church_index(filename)
+    existing = index.find_duplicate(church_name)
+    if existing:
+        print(f"ℹ️ Church '{church_name}' is already registered as '{existing}'")
+        return False
+    for similar, ratio in index.find_similar(church_name):
+        print(f"⚠️ Church '{church_name}' looks like '{similar}' ({ratio:.0%})")
+
     # Try Firebase first
     if FIREBASE_ENABLED and db:
+        # Use church name as document ID (normalized)
+        doc_id = church_doc_id(church_name)
+        church_data = {"name": church_name, "created_at": datetime.now().isoformat()}
         try:
-            # Use church name as document ID (normalized)
-            doc_id = church_name.lower().strip()
-            db.collection("churches").document(doc_id).set(
-                {"name": church_name, "created_at": datetime.now().isoformat()}
-            )
+            # Church document and manifest entry in one transaction
+            add_to_manifest(db, church_name, doc_id, church_data)
             print(f"✅ Church '{church_name}' added to Firebase")
+            church_cache.add(church_name)
             return True
         except Exception as e:
             print(f"⚠️ Firebase save failed: {e}, falling back to JSON")
+            # Keep the write so the reconciler can send it to Firestore later
+            enqueue_write("churches", doc_id, church_data)
+
+    # Fallback to SQLite if configured
+    if use_sqlite():
+        from sqlite_store import get_sqlite_store
+
+        if get_sqlite_store().add_church(church_name):
+            print(f"✅ Church '{church_name}' added to SQLite")
+            church_cache.add(church_name)
+            return True
+        return False
 
     # Fallback to JSON file
     data = {"churches": []}
@@ -360,11 +607,15 @@ def add_church(church_name, filename="churches.json"):
         with open(filename, "w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         print(f"✅ Church '{church_name}' added to JSON")
+        church_cache.add(church_name)
         return True
 
     return False
 
 
+# Churches shown per page in the Step 2 picker
+CHURCH_PAGE_SIZE = 50
+
 # Header
 st.title(f"🎁 {ui['page_title']}")
 st.markdown("---")
@@ -381,7 +632,7 @@ if st.session_state.user_name is None:
             st.session_state.user_name = user_name.strip()
             st.session_state.scorer = QuizScorer(gifts)
             # Check for existing progress and load church if available
-            saved_progress = load_progress_web(user_name)
+            saved_progress = load_session_progress(user_name)
             if saved_progress:
                 if "church_name" in saved_progress:
                     st.session_state.church_name = saved_progress["church_name"]
@@ -398,8 +649,16 @@ elif st.session_state.church_name is None:
     st.write(f"### {ui['hello'].format(st.session_state.user_name)}")
     st.subheader(ui["select_church"])
 
-    # Get list of existing churches
-    churches_list = get_churches_list()
+    # Search index over the existing churches (typeahead)
+    church_index = get_church_index()
+    church_query = st.text_input(ui["search_church"], key="church_search")
+    if st.session_state.get("church_query") != church_query:
+        st.session_state.church_query = church_query
+        st.session_state.church_pages = 1
+    church_pages = st.session_state.get("church_pages", 1)
+    churches_list, more_churches = church_index.search(
+        church_query, limit=CHURCH_PAGE_SIZE * church_pages
+    )
 
     # Create options list with "Add new" option
     ADD_NEW_OPTION = "➕ " + ui["add_new_church"]
@@ -410,18 +669,33 @@ elif st.session_state.church_name is None:
     selected_option = st.selectbox(
         ui["church_name"], options=church_options, key="church_select"
     )
+    if more_churches and st.button(ui["more_churches"]):
+        st.session_state.church_pages = church_pages + 1
+        st.rerun()
 
     # Show text input if "Add new" is selected
     new_church_name = None
     if selected_option == ADD_NEW_OPTION:
-        new_church_name = st.text_input(ui["enter_church_name"], key="new_church_input")
+        new_church_name = st.text_input(
+            ui["enter_church_name"], value=church_query, key="new_church_input"
+        )
+        if new_church_name and new_church_name.strip():
+            similar = church_index.find_similar(new_church_name)
+            if similar:
+                st.warning(
+                    ui["similar_churches"].format(
+                        ", ".join(name for name, _ in similar)
+                    )
+                )
 
     if st.button(ui["start"], type="primary"):
         if selected_option != ADD_NEW_OPTION:
             # User selected an existing church
             st.session_state.church_name = selected_option
             # Check for existing progress
-            saved_progress = load_progress_web(st.session_state.user_name)
+            saved_progress = load_session_progress(
+                st.session_state.user_name, st.session_state.church_name
+            )
             if saved_progress and not saved_progress.get("completed", False):
                 st.session_state.has_progress = True
                 st.session_state.saved_progress = saved_progress
@@ -434,13 +708,18 @@ elif st.session_state.church_name is None:
                     st.session_state.church_name = saved_progress["church_name"]
             st.rerun()
         elif new_church_name and new_church_name.strip():
-            # User wants to add a new church
+            # User wants to add a new church (or typed an existing one)
             church_name = new_church_name.strip()
-            if add_church(church_name):
+            existing = church_index.find_duplicate(church_name)
+            if existing:
+                church_name = existing
+            if existing or add_church(church_name):
                 st.session_state.church_name = church_name
                 st.success(ui["church_added"])
                 # Check for existing progress
-                saved_progress = load_progress_web(st.session_state.user_name)
+                saved_progress = load_session_progress(
+                    st.session_state.user_name, st.session_state.church_name
+                )
                 if saved_progress and not saved_progress.get("completed", False):
                     st.session_state.has_progress = True
                     st.session_state.saved_progress = saved_progress
@@ -533,6 +812,15 @@ elif st.session_state.current_question <= 45:
     progress = (q_num - 1) / 45
     st.progress(progress, text=ui["progress"].format(q_num - 1))
 
+    # Sync status of the background saver
+    saver = get_progress_saver()
+    if saver.last_error:
+        st.caption(ui["sync_failed"])
+    elif saver.dirty:
+        st.caption(ui["syncing"])
+    elif saver.last_synced:
+        st.caption(ui["last_synced"].format(saver.last_synced.strftime("%H:%M:%S")))
+
     st.markdown("---")
 
     # Question
@@ -577,29 +865,36 @@ elif st.session_state.current_question <= 45:
 
     with col2:
         if st.button(ui["save_exit"], use_container_width=True):
-            save_progress_web(
+            saver.submit(
                 st.session_state.user_name,
                 st.session_state.scorer,
                 st.session_state.church_name,
             )
-            st.success(ui["progress_saved"])
-            st.info(ui["continue_later"])
-            if st.button(ui["ok"]):
-                st.session_state.clear()
-                st.rerun()
+            if saver.flush():
+                st.success(ui["progress_saved"])
+                st.info(ui["continue_later"])
+                if st.button(ui["ok"]):
+                    st.session_state.clear()
+                    st.rerun()
+            else:
+                st.error(ui["save_failed"])
 
     with col3:
         if answer is not None:
             if st.button(ui["next"], use_container_width=True, type="primary"):
                 # Save answer
                 st.session_state.scorer.answer_question(q_num, answer)
-                save_progress_web(
+                saver.submit(
                     st.session_state.user_name,
                     st.session_state.scorer,
                     st.session_state.church_name,
                 )
-                st.session_state.current_question += 1
-                st.rerun()
+                # Make sure the completed quiz is persisted before the results
+                if q_num == 45 and not saver.flush():
+                    st.error(ui["save_failed"])
+                else:
+                    st.session_state.current_question += 1
+                    st.rerun()
 
 # Step 4: Show results
 else:
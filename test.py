@@ -1,3 +1,15 @@
+from quiz_core import (  # noqa: F401 - re-exported for existing imports
+    PACKED_ANSWERS_VERSION,
+    QuizScorer,
+    calculate_scores_batch,
+    expand_packed_answers,
+    gift_names,
+    gifts,
+    normalize_username_key,
+    pack_answers,
+    unpack_answers,
+)
+
 questions = {
     1: "Gosto de apresentar a verdade de Deus numa forma interessante e entusiasta.",
     2: "Estou sempre pronto para colocar em posição secundária meu conforto pessoal a fim de que as necessidades alheias sejam satisfeitas.",
@@ -46,275 +58,45 @@ questions = {
     45: "Estou disposto a assumir a responsabilidade por um grupo de irmãos.",
 }
 
-gifts = {
-    "A": [1, 10, 19, 28, 37],
-    "B": [2, 11, 20, 29, 38],
-    "C": [3, 12, 21, 30, 39],
-    "D": [4, 13, 22, 31, 40],
-    "E": [5, 14, 23, 32, 41],
-    "F": [6, 15, 24, 33, 42],
-    "G": [7, 16, 25, 34, 43],
-    "H": [8, 17, 26, 35, 44],
-    "I": [9, 18, 27, 36, 45],
-}
-
-# Gift names/descriptions (optional)
-gift_names = {
-    "A": "Profecia",
-    "B": "Serviço",
-    "C": "Ensino",
-    "D": "Exortação",
-    "E": "Contribuição",
-    "F": "Liderança",
-    "G": "Misericórdia",
-    "H": "Evangelista",
-    "I": "Pastor",
-}
-
-
-class QuizScorer:
-    """
-    Efficient quiz scorer for spiritual gifts assessment.
-
-    Time Complexity: O(1) per answer update
-    Space Complexity: O(g + q) where g=gifts, q=questions
-    """
-
-    def __init__(self, gifts_config):
-        self.gifts_config = gifts_config
-        self.answers = {}  # question_num -> score (0-3)
-        self.scores = {gift: 0 for gift in gifts_config.keys()}
-
-        # Build inverted index: question -> [gifts]
-        # This allows O(1) updates when answering questions
-        self.question_to_gifts = {}
-        for gift, question_list in gifts_config.items():
-            for q in question_list:
-                if q not in self.question_to_gifts:
-                    self.question_to_gifts[q] = []
-                self.question_to_gifts[q].append(gift)
-
-    def answer_question(self, question_num, value):
-        """
-        Answer a question with a value from 0-3.
-        Updates affected gift scores incrementally.
-
-        Args:
-            question_num: int (1-45)
-            value: int (0-3)
-        """
-        if not (1 <= question_num <= 45):
-            raise ValueError(f"Question number must be 1-45, got {question_num}")
-        if not (0 <= value <= 3):
-            raise ValueError(f"Answer value must be 0-3, got {value}")
-
-        # Get previous value (if answered before)
-        old_value = self.answers.get(question_num, 0)
-        self.answers[question_num] = value
-
-        # Update only affected gifts (O(1) - typically 1 gift per question)
-        delta = value - old_value
-        for gift in self.question_to_gifts[question_num]:
-            self.scores[gift] += delta
-
-    def batch_answer(self, answers_dict):
-        """
-        Answer multiple questions at once.
-
-        Args:
-            answers_dict: dict {question_num: value}
-        """
-        for q_num, value in answers_dict.items():
-            self.answer_question(q_num, value)
-
-    def get_scores(self):
-        """Get all gift scores as dictionary."""
-        return self.scores.copy()
-
-    def get_ranked_results(self):
-        """
-        Get gifts ranked by score (highest first).
-
-        Returns:
-            list of tuples: [(gift, score), ...]
-        """
-        return sorted(self.scores.items(), key=lambda x: x[1], reverse=True)
-
-    def get_top_gift(self):
-        """
-        Get the highest scoring gift.
-
-        Returns:
-            tuple: (gift, score)
-        """
-        return max(self.scores.items(), key=lambda x: x[1])
-
-    def get_top_n_gifts(self, n=3):
-        """
-        Get top N gifts by score.
-
-        Args:
-            n: number of top gifts to return
-
-        Returns:
-            list of tuples: [(gift, score), ...]
-        """
-        return self.get_ranked_results()[:n]
-
-    def get_progress(self):
-        """
-        Get quiz completion progress.
-
-        Returns:
-            dict: {
-                'answered': int,
-                'total': int,
-                'percentage': float
-            }
-        """
-        answered = len(self.answers)
-        total = 45
-        return {
-            "answered": answered,
-            "total": total,
-            "percentage": (answered / total) * 100,
-        }
-
-    def reset(self):
-        """Reset all answers and scores."""
-        self.answers = {}
-        self.scores = {gift: 0 for gift in self.gifts_config.keys()}
-
-    def validate_config(self):
-        """
-        Validate that gift configuration covers all 45 questions exactly once.
-
-        Returns:
-            dict: validation results
-        """
-        all_questions = []
-        for questions_list in self.gifts_config.values():
-            all_questions.extend(questions_list)
-
-        all_questions_set = set(all_questions)
-        expected_questions = set(range(1, 46))
-
-        return {
-            "valid": all_questions_set == expected_questions,
-            "total_mappings": len(all_questions),
-            "unique_questions": len(all_questions_set),
-            "missing": expected_questions - all_questions_set,
-            "duplicates": len(all_questions) - len(all_questions_set),
-        }
-
-
-# Helper function for batch calculation (if you have all answers)
-def calculate_scores_batch(answers, gifts_config):
-    """
-    Calculate scores directly from complete answers.
-    Use when you have all answers upfront (simpler but less flexible).
-
-    Args:
-        answers: dict {question_num: value}
-        gifts_config: dict {gift: [question_numbers]}
-
-    Returns:
-        dict: {gift: score}
-
-    Time Complexity: O(n) where n = total question mappings (45)
-    """
-    scores = {}
-    for gift, question_list in gifts_config.items():
-        scores[gift] = sum(answers.get(q, 0) for q in question_list)
-    return scores
-
-
-def normalize_username_key(name):
-    """
-    Normalize username to create a safe, consistent key for storage.
-    Same implementation as in streamlit_app.py for consistency.
-    """
-    import re
-    import unicodedata
-    
-    if not name:
-        return ""
-    
-    # Normalize Unicode characters (e.g., "Maíra" -> "Maira")
-    name = unicodedata.normalize('NFKD', name)
-    
-    # Convert to lowercase
-    name = name.lower()
-    
-    # Replace spaces with underscores
-    name = name.replace(' ', '_')
-    
-    # Remove or replace special characters, keep only alphanumeric and underscores
-    name = re.sub(r'[^a-z0-9_-]', '', name)
-    
-    # Remove multiple consecutive underscores
-    name = re.sub(r'_+', '_', name)
-    
-    # Remove leading/trailing underscores
-    name = name.strip('_')
-    
-    # Ensure it's not empty (fallback to 'user' if somehow empty)
-    if not name:
-        name = 'user'
-    
-    return name
-
 
 def save_progress(name, scorer, filename="quiz_progress.json"):
     """
-    Save user progress to a JSON file.
+    Save user progress to local storage.
+
+    With the default JSON backend each save appends one record to the journal
+    instead of rewriting the whole progress file (see progress_journal.py);
+    QUIZ_STORAGE_BACKEND=sqlite stores it in SQLite instead (see local_storage.py).
 
     Args:
         name: User's name
         scorer: QuizScorer instance with current progress
         filename: File to save progress to
     """
-    import json
-    import os
     from datetime import datetime
 
+    from local_storage import save_record
+
     # Normalize the username to create a safe key
     normalized_key = normalize_username_key(name)
 
-    # Load existing data or create new
-    data = {}
-    if os.path.exists(filename):
-        try:
-            with open(filename, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            data = {}
-
-    # Use normalized key, but also check for backward compatibility
-    # If old key exists, migrate it
-    if name in data and name != normalized_key:
-        # Migrate old data to new normalized key
-        old_data = data.pop(name)
-        if "display_name" not in old_data:
-            old_data["display_name"] = name
-        data[normalized_key] = old_data
-
-    # Save user's progress
-    data[normalized_key] = {
-        "display_name": name,  # Store original name for display
-        "answers": scorer.answers,
-        "scores": scorer.scores,
-        "last_updated": datetime.now().isoformat(),
-        "completed": len(scorer.answers) == 45,
-    }
-
-    with open(filename, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # Save user's progress (a legacy non-normalized key is migrated)
+    save_record(
+        name,
+        normalized_key,
+        {
+            "display_name": name,  # Store original name for display
+            "answers_packed": scorer.encode_answers(),
+            "scores": scorer.scores,
+            "last_updated": datetime.now().isoformat(),
+            "completed": len(scorer.answers) == 45,
+        },
+        filename,
+    )
 
 
 def load_progress(name, filename="quiz_progress.json"):
     """
-    Load user progress from JSON file.
+    Load user progress from local storage (journaled JSON file or SQLite).
 
     Args:
         name: User's name
@@ -323,27 +105,13 @@ def load_progress(name, filename="quiz_progress.json"):
     Returns:
         dict with 'answers' and 'scores', or None if not found
     """
-    import json
-    import os
+    from local_storage import load_record
 
     # Normalize the username to create a safe key
     normalized_key = normalize_username_key(name)
 
-    if not os.path.exists(filename):
-        return None
-
-    try:
-        with open(filename, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            # Try normalized key first
-            if normalized_key in data:
-                return data[normalized_key]
-            # Fallback: try original name for backward compatibility
-            if name in data:
-                return data[name]
-            return None
-    except (json.JSONDecodeError, IOError):
-        return None
+    # Try normalized key first, then the original name for backward compatibility
+    return expand_packed_answers(load_record(name, normalized_key, filename))
 
 
 # Firebase configuration
@@ -355,90 +123,64 @@ def init_firebase():
     """
     Initialize Firebase connection.
     Can be called from Streamlit or standalone scripts.
+
+    Uses the process-wide client from firebase_client.py, so calling this
+    again (or from the Streamlit app) does not initialize anything twice.
     """
     global FIREBASE_ENABLED, db
 
-    try:
-        import firebase_admin
-        from firebase_admin import credentials, firestore
+    from firebase_client import get_firestore_client
 
-        # Check if already initialized
-        if firebase_admin._apps:
-            db = firestore.client()
-            FIREBASE_ENABLED = True
-            return True
+    db = get_firestore_client()
+    FIREBASE_ENABLED = db is not None
+    return FIREBASE_ENABLED
 
-        # Try different credential sources
-        # 1. Try Streamlit secrets (if running in Streamlit)
-        try:
-            import streamlit as st
-
-            if "firebase" in st.secrets:
-                cred_dict = {
-                    "type": str(st.secrets["firebase"]["type"]),
-                    "project_id": str(st.secrets["firebase"]["project_id"]),
-                    "private_key_id": str(st.secrets["firebase"]["private_key_id"]),
-                    "private_key": str(st.secrets["firebase"]["private_key"]),
-                    "client_email": str(st.secrets["firebase"]["client_email"]),
-                    "client_id": str(st.secrets["firebase"]["client_id"]),
-                    "auth_uri": str(st.secrets["firebase"]["auth_uri"]),
-                    "token_uri": str(st.secrets["firebase"]["token_uri"]),
-                    "auth_provider_x509_cert_url": str(
-                        st.secrets["firebase"]["auth_provider_x509_cert_url"]
-                    ),
-                    "client_x509_cert_url": str(
-                        st.secrets["firebase"]["client_x509_cert_url"]
-                    ),
-                }
-                if "universe_domain" in st.secrets["firebase"]:
-                    cred_dict["universe_domain"] = str(
-                        st.secrets["firebase"]["universe_domain"]
-                    )
-
-                cred = credentials.Certificate(cred_dict)
-                firebase_admin.initialize_app(cred)
-                db = firestore.client()
-                FIREBASE_ENABLED = True
-                print("✅ Firebase initialized from Streamlit secrets")
-                return True
-        except ImportError:
-            pass  # Streamlit not available
-
-        # 2. Try environment variable with path to service account JSON
-        import os
-
-        firebase_cred_path = os.environ.get("FIREBASE_CREDENTIALS")
-        if firebase_cred_path and os.path.exists(firebase_cred_path):
-            cred = credentials.Certificate(firebase_cred_path)
-            firebase_admin.initialize_app(cred)
-            db = firestore.client()
-            FIREBASE_ENABLED = True
-            print("✅ Firebase initialized from credentials file")
-            return True
-
-        # 3. Try local serviceAccountKey.json
-        if os.path.exists("serviceAccountKey.json"):
-            cred = credentials.Certificate("serviceAccountKey.json")
-            firebase_admin.initialize_app(cred)
-            db = firestore.client()
-            FIREBASE_ENABLED = True
-            print("✅ Firebase initialized from serviceAccountKey.json")
-            return True
-
-        print("ℹ️ Firebase credentials not found, using JSON file fallback")
-        return False
 
-    except Exception as e:
-        print(f"⚠️ Firebase initialization failed: {e}")
-        FIREBASE_ENABLED = False
-        db = None
-        return False
+# Fields the reports need; answers stay on the server
+REPORT_FIELDS = ("display_name", "scores", "completed", "church_name")
+# Fields the reports skip when reading local storage
+REPORT_SKIP_FIELDS = ("answers", "answers_packed")
+
+
+def iter_participants_firebase(
+    church_name=None, only_completed=False, fields=None
+):
+    """
+    Yield participants from Firebase page by page (see firebase_export.py).
 
+    Args:
+        church_name: If set, only read this church's participants (its
+            partition in the church layout, see progress_layout.py)
+        only_completed: If True, only fetch completed quizzes (filtered in
+            Firestore)
+        fields: If set, only fetch these fields (e.g. REPORT_FIELDS)
+
+    Yields:
+        (key, {answers, scores, last_updated, completed})
+
+    Raises:
+        Exception: if a page still fails after its retries
+    """
+    from firebase_export import iter_progress_documents
 
-def get_all_participants_firebase():
+    documents = iter_progress_documents(db, church_name, only_completed, fields)
+    for key, doc_data in documents:
+        doc_data = expand_packed_answers(doc_data)
+        # Convert string keys back to integers for answers
+        if "answers" in doc_data and isinstance(doc_data["answers"], dict):
+            doc_data["answers"] = {int(k): v for k, v in doc_data["answers"].items()}
+        yield key, doc_data
+
+
+def get_all_participants_firebase(
+    church_name=None, only_completed=False, fields=None
+):
     """
     Get all participants data from Firebase.
 
+    Same arguments as iter_participants_firebase(), which reports should
+    prefer to avoid holding every participant in memory.
+
     Returns:
         dict: {name: {answers, scores, last_updated, completed}}
     """
@@ -446,91 +188,160 @@ def get_all_participants_firebase():
         return {}
 
     try:
-        docs = db.collection("quiz_progress").stream()
-        data = {}
-        for doc in docs:
-            doc_data = doc.to_dict()
-            # Convert string keys back to integers for answers
-            if "answers" in doc_data and isinstance(doc_data["answers"], dict):
-                doc_data["answers"] = {
-                    int(k): v for k, v in doc_data["answers"].items()
-                }
-            data[doc.id] = doc_data
-        return data
+        return dict(iter_participants_firebase(church_name, only_completed, fields))
     except Exception as e:
         print(f"⚠️ Failed to fetch from Firebase: {e}")
         return {}
 
 
+def iter_report_records(
+    filename="quiz_progress.json",
+    use_firebase=True,
+    church_name=None,
+    only_completed=False,
+    with_answers=False,
+):
+    """
+    Yield (key, record) pairs for the reports.
+
+    Streams from Firebase when enabled, otherwise from local storage (the
+    JSON file is parsed incrementally, see json_stream.py). Local storage
+    is used when Firebase is off, has no matching participants, or fails
+    before the first one. A failure after that is raised, so no report is
+    silently built from part of the data.
+
+    The answers are left out unless ``with_answers`` is True; then each
+    record has an ``answers`` dict ({question: value}).
+    """
+    from local_storage import iter_all_records
+
+    if use_firebase and FIREBASE_ENABLED and db:
+        print("📊 Fetching data from Firebase...")
+        count = 0
+        fields = None if with_answers else REPORT_FIELDS
+        try:
+            for item in iter_participants_firebase(
+                church_name, only_completed, fields=fields
+            ):
+                count += 1
+                yield item
+        except Exception as e:
+            if count:
+                raise
+            print(f"⚠️ Failed to fetch from Firebase: {e}")
+        if count:
+            print(f"✅ Retrieved {count} participants from Firebase")
+            return
+
+    print(f"📊 Loading data from {filename}...")
+    # Streamed one participant at a time; without with_answers the answers
+    # are never decoded
+    skip_fields = () if with_answers else REPORT_SKIP_FIELDS
+    records = iter_all_records(
+        filename, church_name, only_completed, skip_fields=skip_fields
+    )
+    if records is None:
+        print("❌ No data source available")
+        return
+    count = 0
+    for key, record in records:
+        count += 1
+        yield key, expand_packed_answers(record) if with_answers else record
+    print(f"✅ Retrieved {count} participants from local storage")
+
+
 def generate_gift_report(
-    filename="quiz_progress.json", only_completed=True, use_firebase=True
+    filename="quiz_progress.json",
+    only_completed=True,
+    use_firebase=True,
+    church_name=None,
 ):
     """
     Generate a report showing all participants ranked by score for each gift.
-    Tries Firebase first, then falls back to JSON file.
+    Tries Firebase first, then falls back to local storage.
 
     Args:
         filename: JSON file with saved progress (fallback)
         only_completed: If True, only include completed quizzes
         use_firebase: If True, try to fetch from Firebase first
+        church_name: If set, only include participants from this church
 
     Returns:
         dict: {gift: [(name, score), ...]} sorted by score descending
     """
-    import json
-    import os
+    report = _from_report_records(
+        lambda records: _collect_gift_report(records, only_completed, church_name),
+        filename,
+        use_firebase,
+        church_name,
+        only_completed,
+    )
 
-    data = {}
+    # Sort each gift by score (descending)
+    for gift in report:
+        report[gift].sort(key=lambda x: x[1], reverse=True)
 
-    # Try Firebase first if enabled
-    if use_firebase and FIREBASE_ENABLED and db:
-        print("📊 Fetching data from Firebase...")
-        data = get_all_participants_firebase()
-        if data:
-            print(f"✅ Retrieved {len(data)} participants from Firebase")
-
-    # Fallback to JSON file if Firebase didn't work
-    if not data:
-        if os.path.exists(filename):
-            print(f"📊 Loading data from {filename}...")
-            try:
-                with open(filename, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                print(f"✅ Retrieved {len(data)} participants from JSON file")
-            except (json.JSONDecodeError, IOError):
-                print("❌ Failed to load JSON file")
-                return {}
-        else:
-            print("❌ No data source available")
-            return {}
+    return report
+
+
+def _from_report_records(
+    collect, filename, use_firebase, church_name, only_completed=False
+):
+    """
+    Run ``collect`` over iter_report_records(), redoing it from local
+    storage if the Firebase export fails midway.
+    """
+    try:
+        return collect(
+            iter_report_records(filename, use_firebase, church_name, only_completed)
+        )
+    except Exception as e:
+        if not use_firebase:
+            raise
+        print(f"⚠️ Firebase export failed midway: {e}, falling back to JSON")
+        return collect(
+            iter_report_records(filename, False, church_name, only_completed)
+        )
 
-    # Organize data by gift
-    report = {gift: [] for gift in gifts.keys()}
 
-    for key, user_data in data.items():
+def _gift_rows(records, only_completed, church_name, with_keys=False):
+    """
+    Yield (name, scores) of the records the gift rankings include, or
+    (name, scores, key) with ``with_keys``.
+    """
+    for key, user_data in records:
         # Skip incomplete quizzes if requested
         if only_completed and not user_data.get("completed", False):
             continue
+        if church_name is not None and user_data.get("church_name") != church_name:
+            continue
 
         # Use display_name if available, otherwise fall back to key
-        display_name = user_data.get("display_name", key)
-        scores = user_data.get("scores", {})
+        name = user_data.get("display_name", key)
+        if with_keys:
+            yield name, user_data.get("scores", {}), key
+        else:
+            yield name, user_data.get("scores", {})
+
+
+def _collect_gift_report(records, only_completed, church_name):
+    """Organize (key, record) pairs by gift: {gift: [(name, score), ...]}."""
+    report = {gift: [] for gift in gifts.keys()}
 
-        # Add each user's score to each gift
+    # Add each user's score to each gift
+    for display_name, scores in _gift_rows(records, only_completed, church_name):
         for gift, score in scores.items():
             report[gift].append((display_name, score))
 
-    # Sort each gift by score (descending)
-    for gift in report:
-        report[gift].sort(key=lambda x: x[1], reverse=True)
-
     return report
 
 
-def display_gift_report(filename="quiz_progress.json", use_firebase=True):
+def display_gift_report(
+    filename="quiz_progress.json", use_firebase=True, church_name=None
+):
     """
     Display a formatted report showing all participants ranked by gift scores.
-    Uses Firebase by default, falls back to JSON file.
+    Uses Firebase by default, falls back to local storage.
     """
     # Show data source
     if use_firebase and FIREBASE_ENABLED:
@@ -538,7 +349,9 @@ def display_gift_report(filename="quiz_progress.json", use_firebase=True):
     elif use_firebase and not FIREBASE_ENABLED:
         print("\n📄 Firebase não disponível, usando arquivo local\n")
 
-    report = generate_gift_report(filename, use_firebase=use_firebase)
+    report = generate_gift_report(
+        filename, use_firebase=use_firebase, church_name=church_name
+    )
 
     if not report or all(len(scores) == 0 for scores in report.values()):
         print("\n❌ Nenhum dado encontrado. Complete alguns questionários primeiro.\n")
@@ -565,63 +378,116 @@ def display_gift_report(filename="quiz_progress.json", use_firebase=True):
 
 
 def get_top_performers_by_gift(
-    filename="quiz_progress.json", top_n=3, use_firebase=True
+    filename="quiz_progress.json", top_n=3, use_firebase=True, church_name=None
 ):
     """
     Get top N performers for each gift.
 
+    Reads the materialized leaderboards in Firebase when they are built;
+    otherwise streams all participants through bounded heaps (top_k.py),
+    without building or sorting the full rankings. Either way, equal
+    scores rank by participant key.
+
     Args:
         filename: JSON file with saved progress (fallback)
         top_n: Number of top performers to return per gift
         use_firebase: If True, try to fetch from Firebase first
+        church_name: If set, only include participants from this church
 
     Returns:
         dict: {gift: [(name, score), ...]}
     """
-    report = generate_gift_report(filename, use_firebase=use_firebase)
-
-    top_performers = {}
-    for gift, rankings in report.items():
-        top_performers[gift] = rankings[:top_n]
-
-    return top_performers
-
+    if use_firebase and FIREBASE_ENABLED and db:
+        # One read of the materialized leaderboards (see leaderboard.py)
+        from leaderboard import read_top_performers
 
-def generate_participant_summary(filename="quiz_progress.json", use_firebase=True):
+        try:
+            top_performers = read_top_performers(db, church_name, top_n)
+            if top_performers is not None:
+                return top_performers
+        except Exception as e:
+            print(f"⚠️ Leaderboard read failed: {e}, ranking all participants")
+
+    from top_k import top_k_by_gift
+
+    return _from_report_records(
+        lambda records: top_k_by_gift(
+            _gift_rows(records, True, church_name, with_keys=True), top_n, gifts
+        ),
+        filename,
+        use_firebase,
+        church_name,
+        only_completed=True,
+    )
+
+
+def generate_participant_summary(
+    filename="quiz_progress.json",
+    use_firebase=True,
+    church_name=None,
+    top_n=None,
+    memory_rows=None,
+):
     """
     Generate a summary report of all participants with their top gifts.
-    Uses Firebase by default, falls back to JSON file.
+    Uses Firebase by default, falls back to local storage.
 
     Args:
         filename: JSON file with saved progress (fallback)
         use_firebase: If True, try to fetch from Firebase first
+        church_name: If set, only include participants from this church
+        top_n: If set, only the ``top_n`` highest top scores, selected with
+            a bounded heap instead of sorting everyone
+        memory_rows: If set, sort on disk (external_sort.py), holding at
+            most this many rows in memory
 
     Returns:
-        list: [(name, top_gift, top_score, completed), ...]
+        list: [(name, top_gift, top_score, completed), ...] sorted by
+        top score descending. With ``memory_rows``, an ExternalSort of the
+        same rows instead: it has len() and can be iterated once.
     """
-    import json
-    import os
+    if memory_rows is not None:
+        from external_sort import ExternalSort
 
-    data = {}
-
-    # Try Firebase first if enabled
-    if use_firebase and FIREBASE_ENABLED and db:
-        data = get_all_participants_firebase()
-
-    # Fallback to JSON file if Firebase didn't work
-    if not data:
-        if os.path.exists(filename):
+        def spill(records):
+            rows = ExternalSort(
+                key=lambda x: x[2], reverse=True, run_size=memory_rows
+            )
             try:
-                with open(filename, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-            except (json.JSONDecodeError, IOError):
-                return []
-        else:
-            return []
+                rows.extend(_iter_participant_summary(records, church_name))
+            except Exception:
+                rows.close()
+                raise
+            return rows
+
+        return _from_report_records(spill, filename, use_firebase, church_name)
+
+    if top_n is not None:
+        from top_k import TopK
+
+        def collect(records):
+            top = TopK(top_n)
+            for row in _iter_participant_summary(records, church_name):
+                top.push(row[2], row)
+            return [row for row, _ in top.items()]
+
+        return _from_report_records(collect, filename, use_firebase, church_name)
+
+    summary = _from_report_records(
+        lambda records: list(_iter_participant_summary(records, church_name)),
+        filename,
+        use_firebase,
+        church_name,
+    )
+    return sorted(summary, key=lambda x: x[2], reverse=True)
 
-    summary = []
 
-    for key, user_data in data.items():
+def _iter_participant_summary(records, church_name):
+    """Yield (name, top_gift, top_score, completed) rows from records."""
+    for key, user_data in records:
+        if church_name is not None and user_data.get("church_name") != church_name:
+            continue
+
         # Use display_name if available, otherwise fall back to key
         display_name = user_data.get("display_name", key)
         scores = user_data.get("scores", {})
@@ -629,25 +495,47 @@ def generate_participant_summary(filename="quiz_progress.json", use_firebase=Tru
 
         if scores:
             top_gift = max(scores.items(), key=lambda x: x[1])
-            summary.append((display_name, top_gift[0], top_gift[1], completed))
-
-    return sorted(summary, key=lambda x: x[2], reverse=True)
+            yield (display_name, top_gift[0], top_gift[1], completed)
 
 
-def display_participant_summary(filename="quiz_progress.json", use_firebase=True):
+def display_participant_summary(
+    filename="quiz_progress.json",
+    use_firebase=True,
+    church_name=None,
+    memory_rows=None,
+    page_size=None,
+):
     """
     Display a summary of all participants with their top gift.
-    Uses Firebase by default, falls back to JSON file.
+    Uses Firebase by default, falls back to local storage.
+
+    The rows are sorted on disk when there are more than ``memory_rows``
+    (default: QUIZ_SORT_MEMORY_ROWS, see external_sort.py), so archives
+    larger than memory can be listed.
+
+    Args:
+        filename: JSON file with saved progress (fallback)
+        use_firebase: If True, try to fetch from Firebase first
+        church_name: If set, only include participants from this church
+        memory_rows: Rows held in memory while sorting
+        page_size: If set, pause after each page of this many rows
     """
+    from external_sort import default_run_size
+
     # Show data source
     if use_firebase and FIREBASE_ENABLED:
         print("\n🔥 Conectado ao Firebase\n")
     elif use_firebase and not FIREBASE_ENABLED:
         print("\n📄 Firebase não disponível, usando arquivo local\n")
 
-    summary = generate_participant_summary(filename, use_firebase=use_firebase)
+    summary = generate_participant_summary(
+        filename,
+        use_firebase=use_firebase,
+        church_name=church_name,
+        memory_rows=memory_rows or default_run_size(),
+    )
 
-    if not summary:
+    if not len(summary):
         print("\n❌ Nenhum participante encontrado.\n")
         return
 
@@ -658,14 +546,85 @@ def display_participant_summary(filename="quiz_progress.json", use_firebase=True
     print(f"{'Nome':<20} {'Dom Principal':<15} {'Pontuação':<12} {'Status'}")
     print("─" * 60)
 
-    for name, gift, score, completed in summary:
-        gift_name = gift_names.get(gift, gift)
-        status = "✓ Completo" if completed else "⚠ Incompleto"
-        print(f"{name:<20} {gift_name:<15} {score:<12} {status}")
+    rows = iter(summary)
+    try:
+        for shown, (name, gift, score, completed) in enumerate(rows, 1):
+            gift_name = gift_names.get(gift, gift)
+            status = "✓ Completo" if completed else "⚠ Incompleto"
+            print(f"{name:<20} {gift_name:<15} {score:<12} {status}")
+
+            if page_size and shown % page_size == 0 and shown < len(summary):
+                more = input(
+                    f"\n-- {shown}/{len(summary)} -- ENTER para mais, q para sair: "
+                )
+                if more.strip().lower() == "q":
+                    break
+                print()
+    finally:
+        # Removes the sort's temporary files when stopping early
+        close = getattr(rows, "close", None)
+        if close:
+            close()
 
     print("\n" + "=" * 80 + "\n")
 
 
+def get_participant_stats(
+    filename="quiz_progress.json",
+    use_firebase=True,
+    church_name=None,
+    only_completed=False,
+):
+    """
+    Get participant totals and gift score averages without loading records.
+    Uses Firestore aggregation queries, falls back to local storage.
+
+    Args:
+        filename: JSON file with saved progress (fallback)
+        use_firebase: If True, try Firebase first
+        church_name: If set, only include participants from this church
+        only_completed: If True, only include completed quizzes
+
+    Returns:
+        dict: {count, completed, score_sums, score_averages}
+    """
+    from local_storage import load_stats
+    from progress_stats import firebase_stats, make_stats
+
+    if use_firebase and FIREBASE_ENABLED and db:
+        try:
+            return firebase_stats(db, church_name, only_completed)
+        except Exception as e:
+            print(f"⚠️ Firebase aggregation failed: {e}, falling back to JSON")
+
+    stats = load_stats(filename, church_name, only_completed)
+    return stats if stats is not None else make_stats(0, 0, {})
+
+
+def display_participant_stats(
+    filename="quiz_progress.json", use_firebase=True, church_name=None
+):
+    """
+    Display participant totals and the average score of each gift.
+    """
+    stats = get_participant_stats(
+        filename, use_firebase=use_firebase, church_name=church_name
+    )
+
+    print("\n" + "=" * 80)
+    print("📈 ESTATÍSTICAS DOS PARTICIPANTES")
+    print("=" * 80)
+    print(f"\nTotal de participantes: {stats['count']}")
+    print(f"Questionários completos: {stats['completed']}\n")
+    print(f"{'Dom':<20} {'Média':<10} {'Total'}")
+    print("─" * 60)
+    for gift, average in stats["score_averages"].items():
+        gift_name = gift_names.get(gift, gift)
+        total = stats["score_sums"][gift]
+        print(f"{gift_name:<20} {average:<10.1f} {total}")
+    print("\n" + "=" * 80 + "\n")
+
+
 def run_interactive_quiz():
     """
     Run an interactive quiz session where user answers all 45 questions.
@@ -838,6 +797,10 @@ def run_interactive_quiz():
     return scorer
 
 
+# Participants shown per page in the CLI summary
+SUMMARY_PAGE_SIZE = 50
+
+
 def main_menu():
     """
     Main menu for the Spiritual Gifts Quiz application.
@@ -872,7 +835,7 @@ def main_menu():
             display_gift_report()
             input("\nPressione ENTER para continuar...")
         elif choice == "3":
-            display_participant_summary()
+            display_participant_summary(page_size=SUMMARY_PAGE_SIZE)
             input("\nPressione ENTER para continuar...")
         elif choice == "4":
             print("\n👋 Até logo!\n")
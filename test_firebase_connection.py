@@ -70,6 +70,13 @@ except Exception as e:
 
     traceback.print_exc()
 
+# Step 5: Show circuit breaker status
+print("\n5️⃣  Firebase circuit breaker status...")
+from firebase_access import get_breaker_status
+
+for field, value in get_breaker_status().items():
+    print(f"   {field}: {value}")
+
 print("\n" + "=" * 80)
 print("Test complete!")
 print("=" * 80 + "\n")
@@ -0,0 +1,105 @@
+"""
+Streaming top-k selection for the reports.
+
+The top N of a ranking doesn't need the whole ranking sorted. TopK keeps a
+bounded heap of the best ``k`` items seen so far, so it runs in O(N log k)
+time and O(k) memory over an iterator of any length. Ties keep arrival
+order, the same result as a stable sort by score, descending, unless each
+item comes with a tie-breaker.
+"""
+
+import heapq
+
+
+class _Reversed:
+    """Tie-breaker wrapper: the lowest value ranks best, so it is evicted last."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+    def __lt__(self, other):
+        return other.value < self.value
+
+    def __gt__(self, other):
+        return self.value < other.value
+
+
+class TopK:
+    """
+    The ``k`` highest-scored items of a stream.
+
+    Usage:
+        top = TopK(3)
+        for name, score in rows:
+            top.push(score, name)
+        top.items()  # [(name, score), ...] best first
+    """
+
+    def __init__(self, k):
+        self.k = k
+        # Min-heap of (score, [tie-breaker,] -arrival, item): the root is the
+        # item to evict, the lowest score and, among equal scores, the highest
+        # tie-breaker or the latest arrival
+        self._heap = []
+        self._seen = 0
+
+    def push(self, score, item, tie=None):
+        """
+        Offer one item; it is kept only if it ranks among the best ``k``.
+
+        ``tie`` ranks equal scores, lowest first (e.g. the participant key);
+        pass one with every item or with none.
+        """
+        heap = self._heap
+        if self.k <= 0:
+            self._seen += 1
+            return  # Nothing is kept, and there is no root to compare with
+        if len(heap) >= self.k and score < heap[0][0]:
+            self._seen += 1
+            return  # Ranks below every kept item
+        if tie is None:
+            entry = (score, -self._seen, item)
+        else:
+            entry = (score, _Reversed(tie), -self._seen, item)
+        self._seen += 1
+        if len(heap) < self.k:
+            heapq.heappush(heap, entry)
+        # A later equal score never displaces the root: ties keep arrival order
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    def __len__(self):
+        return len(self._heap)
+
+    def items(self):
+        """Kept items as (item, score) pairs, best first."""
+        ranked = sorted(self._heap, key=lambda entry: entry[:-1], reverse=True)
+        return [(entry[-1], entry[0]) for entry in ranked]
+
+
+def top_k_by_gift(rows, k, gifts):
+    """
+    Top ``k`` names per gift from a stream of (name, scores, key) rows.
+
+    Equal scores rank by participant key, lowest first, like the
+    materialized leaderboards (leaderboard.py).
+
+    Args:
+        rows: iterable of (name, {gift: score}, participant key)
+        k: Number of entries to keep per gift
+        gifts: Gift letters to rank
+
+    Returns:
+        dict: {gift: [(name, score), ...]} best first
+    """
+    tops = {gift: TopK(k) for gift in gifts}
+    for name, scores, key in rows:
+        for gift, score in scores.items():
+            if gift in tops:
+                tops[gift].push(score, name, key)
+    return {gift: top.items() for gift, top in tops.items()}
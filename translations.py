@@ -236,6 +236,13 @@ UI_STRINGS = {
         "add_new_church": "➕ Adicionar nova igreja",
         "enter_church_name": "Digite o nome da nova igreja:",
         "church_added": "✅ Igreja adicionada com sucesso!",
+        "search_church": "🔎 Buscar igreja:",
+        "more_churches": "Mostrar mais igrejas",
+        "similar_churches": "⚠️ Já existem igrejas parecidas: {}. Selecione uma delas se for a mesma.",
+        "last_synced": "☁️ Última sincronização: {}",
+        "syncing": "⏳ Sincronizando respostas...",
+        "sync_failed": "⚠️ Falha ao sincronizar, tentaremos novamente.",
+        "save_failed": "❌ Não foi possível salvar seu progresso agora. Suas respostas foram mantidas; tente novamente em instantes.",
     },
     "es": {
         "page_title": "Prueba de Dones Espirituales",
@@ -279,6 +286,13 @@ UI_STRINGS = {
         "add_new_church": "➕ Agregar nueva iglesia",
         "enter_church_name": "Ingrese el nombre de la nueva iglesia:",
         "church_added": "✅ ¡Iglesia agregada con éxito!",
+        "search_church": "🔎 Buscar iglesia:",
+        "more_churches": "Mostrar más iglesias",
+        "similar_churches": "⚠️ Ya existen iglesias parecidas: {}. Seleccione una de ellas si es la misma.",
+        "last_synced": "☁️ Última sincronización: {}",
+        "syncing": "⏳ Sincronizando respuestas...",
+        "sync_failed": "⚠️ Error al sincronizar, lo intentaremos de nuevo.",
+        "save_failed": "❌ No fue posible guardar su progreso ahora. Sus respuestas se mantuvieron; intente de nuevo en unos instantes.",
     },
     "en": {
         "page_title": "Spiritual Gifts Test",
@@ -322,6 +336,13 @@ UI_STRINGS = {
         "add_new_church": "➕ Add new church",
         "enter_church_name": "Enter the name of the new church:",
         "church_added": "✅ Church added successfully!",
+        "search_church": "🔎 Search church:",
+        "more_churches": "Show more churches",
+        "similar_churches": "⚠️ Similar churches already exist: {}. Select one of them if it is the same.",
+        "last_synced": "☁️ Last synced: {}",
+        "syncing": "⏳ Syncing answers...",
+        "sync_failed": "⚠️ Sync failed, we will retry.",
+        "save_failed": "❌ Your progress could not be saved right now. Your answers were kept; please try again in a moment.",
     }
 }
 
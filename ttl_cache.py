@@ -0,0 +1,64 @@
+"""
+Small thread-safe LRU cache with a time-to-live, for process-wide caches
+shared by all Streamlit sessions.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+# Returned by TTLCache.get() when the key is missing or expired
+MISSING = object()
+
+
+class TTLCache:
+    """
+    LRU cache whose entries expire ``ttl`` seconds after being set.
+
+    A ``ttl`` of 0 disables the cache (every get() misses).
+    """
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._data = OrderedDict()  # key -> (expires_at, value)
+
+    @property
+    def enabled(self):
+        return self.ttl > 0 and self.maxsize > 0
+
+    def get(self, key, default=MISSING):
+        """Return the cached value for ``key`` or ``default``."""
+        if not self.enabled:
+            return default
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Cache ``value`` under ``key``, evicting the least recently used."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key):
+        """Drop ``key`` from the cache."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop every entry."""
+        with self._lock:
+            self._data.clear()
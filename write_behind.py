@@ -0,0 +1,153 @@
+"""
+Write-behind persistence for per-answer progress saves.
+
+Each Streamlit session owns a WriteBehindSaver. Clicking "Next" only records
+the latest progress snapshot on the saver and returns immediately; a small
+pool of background worker threads picks up dirty savers and runs the real
+save (Firestore or the local fallback), so one slow save doesn't hold up
+the other sessions. Because every save carries the full progress,
+snapshots queued while a save is in flight are coalesced into a single
+write. A failed save is kept and retried with exponential backoff.
+``flush()`` forces a synchronous save and is used on "Save and Exit" and
+on quiz completion.
+
+Settings (environment variables):
+    QUIZ_SAVE_WORKERS   background save threads (default 4)
+"""
+
+import os
+import queue
+import threading
+from datetime import datetime
+from types import SimpleNamespace
+
+DEFAULT_WORKERS = 4
+
+# Seconds before retrying a failed save, doubled on each failure
+RETRY_INITIAL_DELAY = 1.0
+RETRY_MAX_DELAY = 60.0
+
+_work_queue = queue.Queue()
+_workers = []
+_worker_lock = threading.Lock()
+
+
+def _worker_count():
+    try:
+        return max(1, int(os.environ.get("QUIZ_SAVE_WORKERS", DEFAULT_WORKERS)))
+    except ValueError:
+        return DEFAULT_WORKERS
+
+
+def _worker_loop():
+    while True:
+        saver = _work_queue.get()
+        try:
+            saver._drain()
+        except Exception as e:
+            print(f"⚠️ Background save failed: {e}")
+        finally:
+            _work_queue.task_done()
+
+
+def _ensure_workers():
+    with _worker_lock:
+        _workers[:] = [worker for worker in _workers if worker.is_alive()]
+        while len(_workers) < _worker_count():
+            worker = threading.Thread(
+                target=_worker_loop,
+                name=f"progress-write-behind-{len(_workers) + 1}",
+                daemon=True,
+            )
+            worker.start()
+            _workers.append(worker)
+
+
+def snapshot_scorer(scorer):
+    """Copy the parts of a QuizScorer that are persisted."""
+    return SimpleNamespace(answers=dict(scorer.answers), scores=dict(scorer.scores))
+
+
+class WriteBehindSaver:
+    """
+    Per-session write-behind queue in front of a save function.
+
+    Args:
+        save_fn: callable(name, scorer, church_name) doing the real write
+    """
+
+    def __init__(self, save_fn):
+        self.save_fn = save_fn
+        self.last_synced = None  # datetime of the last successful save
+        self.last_error = None  # str of the last failure, None after a success
+
+        self._lock = threading.Lock()  # guards _pending / _queued
+        self._save_lock = threading.Lock()  # serializes actual writes
+        self._pending = None  # latest (name, scorer snapshot, church_name)
+        self._queued = False  # in the work queue or waiting for a retry
+        self._retry_delay = RETRY_INITIAL_DELAY
+
+    @property
+    def dirty(self):
+        """True while there is progress not yet persisted."""
+        with self._lock:
+            return self._pending is not None
+
+    def submit(self, name, scorer, church_name=None):
+        """Queue the current progress for a background save."""
+        with self._lock:
+            self._pending = (name, snapshot_scorer(scorer), church_name)
+            if self._queued:
+                return  # Coalesced into the save that is already queued
+            self._queued = True
+        self._enqueue()
+
+    def _enqueue(self):
+        _ensure_workers()
+        _work_queue.put(self)
+
+    def _schedule_retry(self):
+        """Queue the kept snapshot again after the backoff delay."""
+        with self._lock:
+            if self._queued or self._pending is None:
+                return  # A newer submit already queued a save
+            self._queued = True
+            delay = self._retry_delay
+            self._retry_delay = min(self._retry_delay * 2, RETRY_MAX_DELAY)
+        timer = threading.Timer(delay, self._enqueue)
+        timer.daemon = True
+        timer.start()
+
+    def _drain(self):
+        with self._save_lock:
+            with self._lock:
+                pending = self._pending
+                self._pending = None
+                self._queued = False
+            if pending is None:
+                return True
+            try:
+                self.save_fn(*pending)
+            except Exception as e:
+                with self._lock:
+                    # Keep the failed snapshot unless a newer one arrived
+                    if self._pending is None:
+                        self._pending = pending
+                self.last_error = str(e)
+                print(f"⚠️ Background save failed: {e}")
+                self._schedule_retry()
+                return False
+            self.last_synced = datetime.now()
+            self.last_error = None
+            self._retry_delay = RETRY_INITIAL_DELAY
+            return True
+
+    def flush(self):
+        """
+        Persist any pending progress synchronously.
+
+        Returns:
+            bool: True if everything submitted so far has been saved; on
+            False the progress stays queued for a background retry
+        """
+        return self._drain()